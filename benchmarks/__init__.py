@@ -0,0 +1,3 @@
+"""
+Benchmarks of data loading, the search indices and the routes. Run with `python -m benchmarks`.
+"""
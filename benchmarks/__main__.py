@@ -0,0 +1,113 @@
+"""
+Run the benchmarks and save the results as JSON, to compare them between commits.
+
+    python -m benchmarks                              # real data, 10k and 100k synthetic substances
+    python -m benchmarks --datasets real --iterations 500
+    python -m benchmarks --compare benchmarks/results/<earlier results>.json
+
+Every dataset is benchmarked in a process of its own, so its peak RSS is its own.
+"""
+from typing import Any, Dict, List
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+_REPOSITORY_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_RESULTS_PATH = os.path.join('benchmarks', 'results')
+
+# p50 latency increase reported as a regression when comparing results
+_REGRESSION_THRESHOLD = 0.1
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=_REPOSITORY_PATH, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def _run_dataset(dataset_name: str, iterations: int, seed: int) -> Dict[str, Any]:
+    """Benchmark a dataset in a new process and return its results."""
+    completed = subprocess.run(
+        [sys.executable, '-m', 'benchmarks', '--worker', dataset_name, '--iterations', str(iterations), '--seed', str(seed)],
+        cwd=_REPOSITORY_PATH, stdout=subprocess.PIPE, text=True
+    )
+    if completed.returncode != 0:
+        # e.g. killed for running out of memory
+        return {'error': f'Benchmark process exited with code {completed.returncode}'}
+    return json.loads(completed.stdout)
+
+
+def _compare(baseline: Dict[str, Any], results: Dict[str, Any]) -> List[str]:
+    """Describe the change in p50 latency of every benchmark found in both results."""
+    lines = []
+    for dataset_name, dataset_results in results['datasets'].items():
+        baseline_benchmarks = baseline['datasets'].get(dataset_name, {}).get('benchmarks', {})
+        for name, benchmark in dataset_results.get('benchmarks', {}).items():
+            baseline_benchmark = baseline_benchmarks.get(name)
+            # benchmarks that were too slow to measure have an error instead of latencies
+            if baseline_benchmark is None or not baseline_benchmark.get('p50_ms') or 'p50_ms' not in benchmark:
+                continue
+            change = benchmark['p50_ms'] / baseline_benchmark['p50_ms'] - 1
+            flag = '  REGRESSION' if change > _REGRESSION_THRESHOLD else ''
+            lines.append(
+                f"{dataset_name:>8} {name:<32} {baseline_benchmark['p50_ms']:>10.3f} ms -> {benchmark['p50_ms']:>10.3f} ms {change:>+8.1%}{flag}"
+            )
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmark data loading, search and routes.')
+    parser.add_argument('--datasets', default='real,10000,100000',
+                        help='comma-separated datasets: `real` or a number of synthetic substances')
+    parser.add_argument('--iterations', type=int, default=200, help='calls measured per benchmark')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic datasets and benchmark inputs')
+    parser.add_argument('--output', help='results file, by default under benchmarks/results/')
+    parser.add_argument('--compare', help='earlier results file to compare the p50 latencies with')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.worker:
+        from benchmarks.suite import run_dataset_process
+        json.dump(run_dataset_process(arguments.worker, arguments.iterations, arguments.seed), sys.stdout)
+        return
+
+    commit = _git_commit()
+    results: Dict[str, Any] = {
+        'commit': commit,
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'iterations': arguments.iterations,
+        'seed': arguments.seed,
+        'datasets': {},
+    }
+    for dataset_name in arguments.datasets.split(','):
+        print(f'Benchmarking {dataset_name} dataset...', file=sys.stderr)
+        results['datasets'][dataset_name] = _run_dataset(dataset_name, arguments.iterations, arguments.seed)
+
+    output_path = arguments.output or os.path.join(
+        _REPOSITORY_PATH, _RESULTS_PATH, f"{results['created'][:19].replace(':', '')}-{commit}.json"
+    )
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Results written to {output_path}', file=sys.stderr)
+
+    if arguments.compare:
+        with open(arguments.compare) as f:
+            baseline = json.load(f)
+        print(f"Compared with {baseline['commit']}:")
+        for line in _compare(baseline, results):
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+Benchmarks of data loading, the search indices and the routes, run against one dataset.
+"""
+from benchmarks.synthetic import generate_substance_data
+from src import create_app, data
+from src.utils.trie import SuffixTrie
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from urllib.parse import quote
+import json
+import os
+import random
+import resource
+import sys
+import time
+import xxhash
+
+# the suffix trie stores a node per character of every suffix,
+# which does not fit in memory for much larger datasets
+_SUFFIX_TRIE_MAX_SUBSTANCES = 10_000
+
+# inputs every benchmark cycles through
+_SAMPLE_SIZE = 50
+
+# benchmarks with a call slower than this are reported as too slow instead of measured,
+# so one route that does not scale to a dataset does not keep the others from running
+_MAX_CALL_SECONDS = 5.0
+
+
+def _peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far."""
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+def _time_once(function: Callable[[], Any]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        function()
+    except MemoryError:
+        return {'error': 'MemoryError'}
+    return {'seconds': round(time.perf_counter() - started, 4)}
+
+
+def _measure(call: Callable[[Any], Any], inputs: Sequence[Any], iterations: int) -> Dict[str, Any]:
+    """
+    Call `call` `iterations` times, cycling through `inputs`, after calling it once on
+    every input so caches filled on first access are measured in their steady state.
+    Returns the p50 and p99 latency and the throughput, or an error if a call takes
+    longer than `_MAX_CALL_SECONDS`.
+    """
+    for value in inputs:
+        call_started = time.perf_counter()
+        call(value)
+        call_seconds = time.perf_counter() - call_started
+        if call_seconds > _MAX_CALL_SECONDS:
+            return {'error': f'A call took {call_seconds:.1f} seconds, over {_MAX_CALL_SECONDS} seconds, so it was not measured'}
+
+    latencies: List[int] = []
+    started = time.perf_counter()
+    for iteration in range(iterations):
+        value = inputs[iteration % len(inputs)]
+        call_started = time.perf_counter_ns()
+        call(value)
+        latencies.append(time.perf_counter_ns() - call_started)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'iterations': iterations,
+        'p50_ms': round(latencies[len(latencies) // 2] / 1e6, 4),
+        'p99_ms': round(latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)] / 1e6, 4),
+        'throughput_per_second': round(iterations / elapsed, 1),
+    }
+
+
+def _get_ok(client, url: str) -> None:
+    response = client.get(url)
+    if response.status_code != 200:
+        raise AssertionError(f'{url} answered {response.status_code}')
+
+
+def run_dataset(size: Optional[int], iterations: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Benchmark the real data (a size of None) or a synthetic dataset of `size` substances.
+    Meant to run in a process of its own, so the peak RSS is that of this dataset.
+    """
+    baseline_rss = _peak_rss_bytes()
+    data_file_contents = data._read_data_file()
+    if size is not None:
+        real_substance_data = json.loads(data_file_contents)
+        data_file_contents = json.dumps(generate_substance_data(real_substance_data, size, seed)).encode('utf-8')
+        del real_substance_data
+
+    result: Dict[str, Any] = {'data_file_bytes': len(data_file_contents)}
+    startup: Dict[str, Any] = {}
+    result['startup'] = startup
+
+    # Startup: parse and validate, then build every index as a worker does without a snapshot
+    substance_data: Dict[str, Dict] = {}
+    startup['init_substance_data'] = _time_once(lambda: substance_data.update(data._init_substance_data(data_file_contents)))
+    result['substances'] = len(substance_data)
+    indices: Dict[str, Any] = {}
+    startup['record_hashes'] = _time_once(lambda: indices.update(record_hashes=data._init_record_hashes(substance_data)))
+    for index_name, _, build_index in data._SUBSTANCE_INDEX_BUILDERS:
+        startup[index_name] = _time_once(lambda: indices.update({index_name: build_index(substance_data, indices)}))
+        if 'error' in startup[index_name]:
+            result['error'] = f'Building {index_name} failed, the remaining benchmarks were skipped'
+            result['peak_rss_bytes'] = _peak_rss_bytes()
+            result['baseline_rss_bytes'] = baseline_rss
+            return result
+
+    # Serve the dataset being benchmarked instead of the real data
+    data._dataset = dataset = data.Dataset(
+        xxhash.xxh3_64_hexdigest(data_file_contents), substance_data, indices, data._init_svg_file_names()
+    )
+    del data_file_contents
+
+    sampler = random.Random(seed)
+    # substances are only served under a slug when they have TripSit data
+    slugs = sampler.sample(sorted(dataset.slug_to_substance_name), min(_SAMPLE_SIZE, len(dataset.slug_to_substance_name)))
+    substance_names = [dataset.slug_to_substance_name[slug] for slug in slugs]
+    queries = [
+        substance_name[:sampler.randint(3, 6)]
+        for substance_name in substance_names
+    ]
+    typo_queries = [query[:1] + query[2:] + 'e' for query in queries]
+    category_slugs = sorted(dataset.category_index)
+
+    benchmarks: Dict[str, Any] = {}
+    result['benchmarks'] = benchmarks
+
+    # Search indices; the suffix array is built at startup as `trie`, the unused suffix trie is compared with it
+    search_terms = list(data._iter_substance_search_terms(substance_data))
+    benchmarks['suffix_array_search_top_k'] = _measure(lambda query: dataset.substance_trie.search_top_k(query, 10), queries, iterations)
+    benchmarks['fuzzy_index_search'] = _measure(lambda query: dataset.substance_fuzzy_index.search(query, 10), typo_queries, iterations)
+    if len(substance_data) <= _SUFFIX_TRIE_MAX_SUBSTANCES:
+        suffix_tries: List[SuffixTrie] = []
+        startup['suffix_trie_build'] = _time_once(
+            lambda: suffix_tries.append(SuffixTrie.from_items((term, substance_name) for term, substance_name, _ in search_terms))
+        )
+        benchmarks['suffix_trie_search_substring'] = _measure(suffix_tries[0].search_substring, queries, iterations)
+    del search_terms
+
+    # Routes, with the page cache disabled so substance pages are rendered every time
+    os.environ['FLASK_PAGE_CACHE_MAX_SIZE'] = '0'
+    app = create_app()
+    app.config.update({'TESTING': True})
+    client = app.test_client()
+    route_benchmarks: Dict[str, Callable[[Any], None]] = {
+        'autocomplete': lambda query: _get_ok(client, f'/autocomplete?query={quote(query)}'),
+        'substance_page': lambda slug: _get_ok(client, f'/substance/{slug}'),
+        'category_page': lambda category_slug: _get_ok(client, f'/category/{category_slug}'),
+        'api_substance': lambda slug: _get_ok(client, f'/api/substance/{slug}'),
+        'api_substance_source': lambda slug: _get_ok(client, f'/api/substance/{slug}/sources/tripsit'),
+        'api_substance_fields': lambda slug: _get_ok(client, f'/api/substance/{slug}?fields=dosage,timing'),
+        'api_category': lambda category_slug: _get_ok(client, f'/api/category/{category_slug}'),
+        'api_substances_batch': lambda offset: _get_ok(client, f'/api/substances?slugs={",".join(slugs[offset:offset + 10])}'),
+        'api_interactions': lambda offset: _get_ok(client, f'/api/interactions?slugs={",".join(slugs[offset:offset + 3])}'),
+        'api_substance_interactions': lambda slug: _get_ok(client, f'/api/interactions/{slug}'),
+        'api_search': lambda category_slug: _get_ok(client, f'/api/search?category={category_slug}&route=oral,insufflated&svg=true'),
+    }
+    route_inputs: Dict[str, Sequence[Any]] = {
+        'autocomplete': [query for query in queries if len(query) > 1],
+        'category_page': category_slugs,
+        'api_category': category_slugs,
+        'api_search': category_slugs,
+        'api_substances_batch': range(0, max(len(slugs) - 10, 1)),
+        'api_interactions': range(0, max(len(slugs) - 3, 1)),
+    }
+    for name, call in route_benchmarks.items():
+        benchmarks[name] = _measure(call, route_inputs.get(name, slugs), iterations)
+
+    result['peak_rss_bytes'] = _peak_rss_bytes()
+    result['baseline_rss_bytes'] = baseline_rss
+    return result
+
+
+def run_dataset_process(dataset_name: str, iterations: int, seed: int) -> Dict[str, Any]:
+    """Benchmark a dataset (`real` or a number of substances) and return its results."""
+    size = None if dataset_name == 'real' else int(dataset_name)
+    # keep the results apart from anything the app logs to stdout
+    stdout, sys.stdout = sys.stdout, sys.stderr
+    try:
+        return run_dataset(size, iterations, seed)
+    finally:
+        sys.stdout = stdout
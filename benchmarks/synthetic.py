@@ -0,0 +1,43 @@
+"""
+Synthetic substance data for benchmarking at larger scales than the real data.
+"""
+from typing import Dict
+import json
+import random
+
+
+def generate_substance_data(real_substance_data: Dict[str, Dict], size: int, seed: int = 0) -> Dict[str, Dict]:
+    """
+    Generate `size` substances: every real substance, then renamed copies of real ones.
+
+    Copies are made of substances up to the median size, so a synthetic dataset
+    is made of typical records rather than dominated by the few largest ones.
+    Their names, pretty names and aliases get a numeric suffix, and everything
+    else, including categories and interactions, is kept as is.
+    """
+    substance_data = dict(real_substance_data)
+    encoded_records = sorted(
+        ((json.dumps(sources_data), substance_name) for substance_name, sources_data in real_substance_data.items()),
+        key=lambda encoded_record: (len(encoded_record[0]), encoded_record[1])
+    )
+    templates = encoded_records[:len(encoded_records) // 2 + 1]
+    random.Random(seed).shuffle(templates)
+
+    copy_number = 0
+    while len(substance_data) < size:
+        encoded_sources_data, template_name = templates[copy_number % len(templates)]
+        copy_number += 1
+        substance_name = f'{template_name}-s{copy_number}'
+        if substance_name in substance_data:
+            continue
+
+        sources_data = json.loads(encoded_sources_data)
+        for details in sources_data.values():
+            if not details:
+                continue
+            details['name'] = substance_name
+            details['pretty_name'] = f"{details.get('pretty_name') or template_name} {copy_number}"
+            details['aliases'] = [f'{alias} {copy_number}' for alias in details.get('aliases') or []]
+        substance_data[substance_name] = sources_data
+
+    return substance_data
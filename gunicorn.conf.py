@@ -0,0 +1,32 @@
+"""
+Gunicorn settings for running SubstanceSearch in production:
+
+    gunicorn wsgi:app
+
+With `preload_app` the substance data and indices are loaded once in the
+master process and shared with the forked workers copy-on-write.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+if preload_app:
+    # Keep the garbage collector from running in the master while the app is
+    # loaded; a collection there would touch every object right before forking
+    gc.disable()
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far into the permanent generation. Collections
+    # in the workers then never visit (and so never write to) the shared pages
+    if preload_app:
+        gc.freeze()
+        # Collections now only visit objects allocated since, so turn them back on
+        # in the master, which keeps allocating as it re-forks workers, and with
+        # it in every worker forked from it
+        gc.enable()
@@ -1,11 +1,13 @@
 from flask import Flask
-from flask_minify import Minify
 from flask_cors import CORS
-from src.utils import slugify
-from src.blueprints.views.utils import cache
+from src.utils import cached_slugify
+from src.blueprints.views.utils import cache, minify, metrics, page_cache, leaderboard_provider, data_watcher, _warm_page_cache
 from src.blueprints.views import views_bp
 from src.blueprints.api import api_bp
+from src.utils.compression import PrecompressedStatic
 from src.config import DefaultConfig
+from src import data
+from src.cli import register_commands
 from re import match
 
 
@@ -24,19 +26,31 @@ def create_app() -> Flask:
         },
         r"/api/*": {
             "origins": app.config['CORS_ORIGINS'],
-            "methods": ["GET"],
+            "methods": ["GET", "POST"],
             "allow_headers": ["Content-Type"]
         }
     })
-    Minify(app=app, html=True, js=True, cssless=True)
+    # first, so requests are timed including the hooks of the other extensions
+    metrics.init_app(app)
+    minify.init_app(app)
 
-    cache.init_app(app, config={"CACHE_TYPE": "SimpleCache"})
+    cache.init_app(app)
+    page_cache.init_app(app)
+    leaderboard_provider.init_app(app)
+    data_watcher.init_app(app, data.DATA_FILE_PATH)
+    PrecompressedStatic().init_app(app)
 
     # modify jinja environment
-    app.jinja_env.globals.update(slugify=slugify, match=match)
+    app.jinja_env.globals.update(slugify=cached_slugify, match=match)
 
     # register blueprints
     app.register_blueprint(views_bp)
     app.register_blueprint(api_bp)
 
+    # register command line commands
+    register_commands(app)
+
+    if app.config['PAGE_CACHE_WARMUP']:
+        _warm_page_cache(app)
+
     return app
@@ -1,8 +1,6 @@
 from flask import jsonify, make_response, Response
 from src.data import (
-    RAW_SUBSTANCE_DATA,
-    SLUG_TO_SUBSTANCE_NAME,
-    get_substance_data_for_source,
+    get_dataset,
     DataSource,
     AVAILABLE_SOURCES
 )
@@ -18,10 +16,10 @@ def api_substance(slug: str) -> Response:
 
     # Get substance name from slug
     decoded_slug = unquote(slug)
-    substance_name = SLUG_TO_SUBSTANCE_NAME.get(decoded_slug.lower(), '')
+    substance_name = get_dataset().slug_to_substance_name.get(decoded_slug.lower(), '')
     
     # Get substance data
-    substance_data = RAW_SUBSTANCE_DATA.get(substance_name, {})
+    substance_data = get_dataset().raw_substance_data.get(substance_name, {})
     if not substance_data:
         return make_response({"error": "Substance not found"}, 404)
 
@@ -40,10 +38,10 @@ def api_substance_source(slug: str, source: str) -> Response:
 
     # Get substance name from slug
     decoded_slug = unquote(slug)
-    substance_name = SLUG_TO_SUBSTANCE_NAME.get(decoded_slug.lower(), '')
+    substance_name = get_dataset().slug_to_substance_name.get(decoded_slug.lower(), '')
     
     # Get substance data
-    substance_data = RAW_SUBSTANCE_DATA.get(substance_name, {})
+    substance_data = get_dataset().raw_substance_data.get(substance_name, {})
     if not substance_data:
         return make_response({"error": "Substance not found"}, 404)
 
@@ -1,14 +1,26 @@
-from flask import jsonify, make_response, Response
+from flask import current_app, jsonify, make_response, request, Response
 from src.data import (
-    RAW_SUBSTANCE_DATA,
-    SLUG_TO_SUBSTANCE_NAME,
-    get_substance_data_for_source,
+    get_dataset,
+    INTERACTION_SEVERITIES,
     DataSource,
-    AVAILABLE_SOURCES
+    AVAILABLE_SOURCES,
+    DEFAULT_SOURCE
 )
 from src.utils import validate_slug
+from src.utils.dosage import DOSE_LEVELS, normalize_units, to_base
 from urllib.parse import unquote
+import math
 from src.blueprints.api import api_bp
+from src.blueprints.api.utils import (
+    _fetch_encoded_substance,
+    _fetch_encoded_category,
+    _fetch_encoded_batch_item,
+    _parse_fields,
+    _parse_dose_bound,
+    _encode_batch_json,
+    _iter_batch_ndjson,
+    _encoded_json_response
+)
 
 @api_bp.route('/substance/<path:slug>')
 def substance(slug: str) -> Response:
@@ -18,16 +30,22 @@ def substance(slug: str) -> Response:
     if not is_valid_slug:
         return make_response({"error": slug_validation_error_message}, 400)
 
+    # Validate fields
+    fields, fields_error_message = _parse_fields(request.args.get('fields'))
+    if fields_error_message:
+        return make_response({"error": fields_error_message}, 400)
+
     # Get substance name from slug
+    dataset = get_dataset()
     decoded_slug = unquote(slug)
-    substance_name = SLUG_TO_SUBSTANCE_NAME.get(decoded_slug.lower(), '')
+    substance_name = dataset.slug_to_substance_name.get(decoded_slug.lower(), '')
     
-    # Get substance data
-    substance_data = RAW_SUBSTANCE_DATA.get(substance_name, {})
-    if not substance_data:
+    # Get pre-encoded substance data
+    encoded_substance_data = _fetch_encoded_substance(dataset, substance_name, fields=fields)
+    if encoded_substance_data is None:
         return make_response({"error": "Substance not found"}, 404)
 
-    return jsonify(substance_data)
+    return _encoded_json_response(encoded_substance_data, request)
 
 @api_bp.route('/substance/<path:slug>/sources/<path:source>')
 def substance_source(slug: str, source: str) -> Response:
@@ -41,18 +59,252 @@ def substance_source(slug: str, source: str) -> Response:
     if not is_valid_slug:
         return make_response({"error": slug_validation_error_message}, 400)
 
+    # Validate fields
+    fields, fields_error_message = _parse_fields(request.args.get('fields'))
+    if fields_error_message:
+        return make_response({"error": fields_error_message}, 400)
+
     # Get substance name from slug
+    dataset = get_dataset()
     decoded_slug = unquote(slug)
-    substance_name = SLUG_TO_SUBSTANCE_NAME.get(decoded_slug.lower(), '')
+    substance_name = dataset.slug_to_substance_name.get(decoded_slug.lower(), '')
     
     # Get substance data
-    substance_data = RAW_SUBSTANCE_DATA.get(substance_name, {})
+    substance_data = dataset.raw_substance_data.get(substance_name, {})
     if not substance_data:
         return make_response({"error": "Substance not found"}, 404)
 
-    # Get data for specific source
-    source_data = substance_data.get(source)
-    if not source_data:
+    # Get pre-encoded data for specific source
+    encoded_source_data = _fetch_encoded_substance(dataset, substance_name, source, fields)
+    if encoded_source_data is None:
         return make_response({"error": f"No data available for source: {source}"}, 404)
 
-    return jsonify(source_data) 
\ No newline at end of file
+    return _encoded_json_response(encoded_source_data, request)
+ 
+
+@api_bp.route('/substances', methods=['GET', 'POST'])
+def substances() -> Response:
+    """
+    API endpoint to get data for many substances at once, for all sources or a specific source.
+    Slugs are passed as a comma-separated `slugs` query parameter, or as a `slugs` list in a JSON body.
+    Substances that are not found get an error of their own instead of failing the whole batch.
+    """
+    if request.method == 'POST':
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict) or not isinstance(body.get('slugs'), list):
+            return make_response({"error": "Request body must be a JSON object with a list of slugs"}, 400)
+        slugs = [str(slug) for slug in body['slugs']]
+        source = body.get('source')
+        response_format = body.get('format', 'json')
+        fields_value = body.get('fields')
+        if isinstance(fields_value, list):
+            fields_value = ','.join(str(field) for field in fields_value)
+        elif fields_value is not None and not isinstance(fields_value, str):
+            return make_response({"error": "fields must be a comma-separated string or a list"}, 400)
+    else:
+        slugs = [slug for slug in request.args.get('slugs', '').split(',') if slug]
+        source = request.args.get('source')
+        response_format = request.args.get('format', 'json')
+        fields_value = request.args.get('fields')
+
+    # Validate batch
+    max_batch_size = current_app.config['API_MAX_BATCH_SIZE']
+    if not 1 <= len(slugs) <= max_batch_size:
+        return make_response({"error": f"Provide between 1 and {max_batch_size} substance slugs"}, 400)
+    if source is not None and source not in AVAILABLE_SOURCES:
+        return make_response({"error": f"Invalid source. Available sources: {', '.join(AVAILABLE_SOURCES)}"}, 400)
+    if response_format not in ('json', 'ndjson'):
+        return make_response({"error": "Invalid format. Available formats: json, ndjson"}, 400)
+    fields, fields_error_message = _parse_fields(fields_value)
+    if fields_error_message:
+        return make_response({"error": fields_error_message}, 400)
+
+    # Get pre-encoded data for every slug, once per slug
+    dataset = get_dataset()
+    items = dict(_fetch_encoded_batch_item(dataset, slug, source, fields) for slug in slugs)
+
+    if response_format == 'ndjson':
+        return Response(_iter_batch_ndjson(list(items.items())), mimetype='application/x-ndjson')
+    return _encoded_json_response(_encode_batch_json(list(items.items())), request)
+
+
+@api_bp.route('/category/<path:category_slug>')
+def category(category_slug: str) -> Response:
+    """API endpoint to get a category and the substances in it."""
+    # Validate slug
+    is_valid_slug, slug_validation_error_message = validate_slug(category_slug)
+    if not is_valid_slug:
+        return make_response({"error": slug_validation_error_message}, 400)
+
+    # Get pre-encoded category data
+    encoded_category_data = _fetch_encoded_category(get_dataset(), category_slug.lower())
+    if encoded_category_data is None:
+        return make_response({"error": "Category not found"}, 404)
+
+    return _encoded_json_response(encoded_category_data, request)
+
+
+@api_bp.route('/interactions')
+def interactions() -> Response:
+    """
+    API endpoint to check a combination of substances for interactions between them.
+    Interactions the substances list with terms matching no substance are returned as unresolved,
+    as the data can not tell whether they concern the other substances.
+    """
+    slugs = [slug for slug in request.args.get('slugs', '').split(',') if slug]
+    max_substances = current_app.config['API_MAX_INTERACTION_SUBSTANCES']
+    if not 2 <= len(slugs) <= max_substances:
+        return make_response({"error": f"Provide between 2 and {max_substances} substance slugs"}, 400)
+
+    # Get substance names from slugs
+    dataset = get_dataset()
+    substance_names = []
+    for slug in slugs:
+        is_valid_slug, slug_validation_error_message = validate_slug(slug)
+        if not is_valid_slug:
+            return make_response({"error": slug_validation_error_message}, 400)
+
+        substance_name = dataset.slug_to_substance_name.get(unquote(slug).lower())
+        if substance_name is None:
+            return make_response({"error": f"Substance not found: {slug}"}, 404)
+        if substance_name not in substance_names:
+            substance_names.append(substance_name)
+
+    return jsonify({
+        "substances": [dataset.substance_name_to_slug[substance_name] for substance_name in substance_names],
+        "interactions": [
+            {
+                "substances": [dataset.substance_name_to_slug[substance_name], dataset.substance_name_to_slug[other_substance_name]],
+                "severity": severity
+            }
+            for substance_name, other_substance_name, severity in dataset.interaction_matrix.check(substance_names)
+        ],
+        # interactions listed with terms matching no substance, which may concern the others, so unknown rather than safe
+        "unresolved": [
+            {
+                "substance": dataset.substance_name_to_slug[substance_name],
+                "term": term,
+                "severity": severity
+            }
+            for substance_name in substance_names
+            for term, severity in dataset.interaction_matrix.unresolved(substance_name)
+        ]
+    })
+
+
+@api_bp.route('/interactions/<path:slug>')
+def substance_interactions(slug: str) -> Response:
+    """API endpoint to get every substance interacting with a substance, optionally of one severity."""
+    severity = request.args.get('severity')
+    if severity is not None and severity not in INTERACTION_SEVERITIES:
+        return make_response({"error": f"Invalid severity. Available severities: {', '.join(INTERACTION_SEVERITIES)}"}, 400)
+
+    # Validate slug
+    is_valid_slug, slug_validation_error_message = validate_slug(slug)
+    if not is_valid_slug:
+        return make_response({"error": slug_validation_error_message}, 400)
+
+    # Get substance name from slug
+    dataset = get_dataset()
+    substance_name = dataset.slug_to_substance_name.get(unquote(slug).lower())
+    if substance_name is None:
+        return make_response({"error": "Substance not found"}, 404)
+
+    # Most severe first
+    severities = [severity] if severity is not None else INTERACTION_SEVERITIES[::-1]
+    return jsonify({
+        "substance": dataset.substance_name_to_slug[substance_name],
+        "interactions": {
+            severity: [
+                dataset.substance_name_to_slug[other_substance_name]
+                for other_substance_name in dataset.interaction_matrix.interactions_with(substance_name, severity)
+            ]
+            for severity in severities
+        },
+        "unresolved": [
+            {"term": term, "severity": unresolved_severity}
+            for term, unresolved_severity in dataset.interaction_matrix.unresolved(substance_name)
+            if unresolved_severity in severities
+        ]
+    })
+
+
+@api_bp.route('/dosage')
+def dosage() -> Response:
+    """
+    API endpoint to find the substances whose doses of a route and level overlap a range of doses,
+    e.g. every substance with a common oral dose overlapping 10-20 mg.
+    Doses are compared in base units (mg for mass, ml for volume), and either bound may be left open.
+    """
+    route = request.args.get('route', '').strip().lower()
+    if not route:
+        return make_response({"error": "Provide a route of administration (e.g., oral)"}, 400)
+
+    level = request.args.get('level', 'common')
+    if level not in DOSE_LEVELS:
+        return make_response({"error": f"Invalid level. Available levels: {', '.join(DOSE_LEVELS)}"}, 400)
+
+    source = request.args.get('source', DEFAULT_SOURCE)
+    if source not in AVAILABLE_SOURCES:
+        return make_response({"error": f"Invalid source. Available sources: {', '.join(AVAILABLE_SOURCES)}"}, 400)
+
+    unit_base = normalize_units(request.args.get('units', 'mg'))
+    if unit_base is None:
+        return make_response({"error": "Invalid units. Provide the units of the doses (e.g., mg)"}, 400)
+    base_units, factor = unit_base
+
+    # Validate dose range
+    minimum, minimum_error_message = _parse_dose_bound(request.args.get('min'))
+    maximum, maximum_error_message = _parse_dose_bound(request.args.get('max'))
+    if minimum_error_message or maximum_error_message:
+        return make_response({"error": minimum_error_message or maximum_error_message}, 400)
+    if minimum is None and maximum is None:
+        return make_response({"error": "Provide a min or max dose"}, 400)
+    low = to_base(minimum, factor) if minimum is not None else float('-inf')
+    high = to_base(maximum, factor) if maximum is not None else float('inf')
+    # finite doses in large units can overflow once converted to the base unit
+    if (minimum is not None and not math.isfinite(low)) or (maximum is not None and not math.isfinite(high)):
+        return make_response({"error": f"Invalid dose. Provide min and max small enough to convert to {base_units}"}, 400)
+    if low > high:
+        return make_response({"error": "The min dose must not be greater than the max dose"}, 400)
+
+    dataset = get_dataset()
+    return jsonify({
+        "route": route,
+        "level": level,
+        "source": source,
+        "units": base_units,
+        "min": low if minimum is not None else None,
+        "max": high if maximum is not None else None,
+        "substances": [
+            {
+                "slug": dataset.substance_name_to_slug[substance_name],
+                "min": dose_low,
+                # heavy doses have no upper bound
+                "max": dose_high if math.isfinite(dose_high) else None
+            }
+            for substance_name, dose_low, dose_high in dataset.dosage_indices[source].search(route, level, base_units, low, high)
+        ]
+    })
+
+
+@api_bp.route('/search')
+def search() -> Response:
+    """
+    API endpoint to filter substances on any combination of facets, with the count of substances for every facet value.
+    Each facet (category, route, source, interaction, svg) is a comma-separated query parameter of values;
+    substances match any of the values of a facet, and every facet given.
+    """
+    dataset = get_dataset()
+    facet_index = dataset.facet_index
+    selections = {
+        facet: [value for value in request.args.get(facet, '').lower().split(',') if value]
+        for facet in facet_index.facets
+    }
+    result = facet_index.search(selections)
+
+    return jsonify({
+        "total": len(result.keys),
+        "substances": [dataset.substance_name_to_slug[substance_name] for substance_name in result.keys],
+        "facets": result.counts
+    })
@@ -0,0 +1,264 @@
+from flask import Request, Response, current_app
+from src.data import Dataset, DataSource
+from src.utils import validate_slug
+from src.utils.compression import compress, select_encoding
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+from urllib.parse import unquote
+import json
+import math
+import re
+import xxhash
+
+
+class _EncodedJSON(NamedTuple):
+    """A JSON document encoded once, with a strong ETag of its content."""
+    body: bytes
+    etag: str
+    # compressed bodies keyed by content encoding, filled in as clients ask for them;
+    # None for documents built per request, which are not worth compressing
+    compressed_bodies: Optional[Dict[str, bytes]] = None
+
+
+class _EncodedCaches(NamedTuple):
+    """Documents encoded from one version of the data."""
+    version: str
+    # Encoded substance documents keyed by (substance name, source).
+    # A source of None is the document with every source.
+    substances: Dict[Tuple[str, Optional[DataSource]], _EncodedJSON]
+    # Encoded `"field":value` fragments of source documents keyed by (substance name, source),
+    # so projections on a set of fields are spliced together instead of encoded again.
+    fields: Dict[Tuple[str, DataSource], Dict[str, bytes]]
+    # Encoded category documents keyed by category slug.
+    categories: Dict[str, _EncodedJSON]
+
+
+_encoded_caches = _EncodedCaches('', {}, {}, {})
+
+
+def _fetch_encoded_caches(dataset: Dataset) -> _EncodedCaches:
+    """
+    Returns the caches of documents encoded from a dataset.
+    The caches of a previous version of the data are dropped when the data is reloaded.
+    """
+    global _encoded_caches
+    encoded_caches = _encoded_caches
+    if encoded_caches.version != dataset.version:
+        encoded_caches = _encoded_caches = _EncodedCaches(dataset.version, {}, {}, {})
+    return encoded_caches
+
+
+def _encode_json(value: Any, compressible: bool = False) -> _EncodedJSON:
+    """
+    Encode a value the same way `jsonify` does and hash the result.
+    Compressible documents are served compressed to clients that accept it.
+    """
+    body = (json.dumps(value, ensure_ascii=True, sort_keys=True, separators=(',', ':')) + '\n').encode('utf-8')
+    return _EncodedJSON(body, xxhash.xxh3_64_hexdigest(body), {} if compressible else None)
+
+
+def _parse_fields(fields_value: Optional[str]) -> Tuple[Optional[Tuple[str, ...]], str]:
+    """
+    Parse a comma-separated `fields` parameter into a sorted tuple of field names.
+    Returns None for the fields if the parameter is missing, and an error message if it is invalid.
+    """
+    if fields_value is None:
+        return None, ""
+
+    fields = tuple(sorted({field for field in fields_value.split(',') if field}))
+    if not fields or not all(re.match(r'^[a-z_]+$', field) for field in fields):
+        return None, "Invalid fields. Provide comma-separated field names (e.g., dosage,timing)"
+    return fields, ""
+
+
+def _parse_dose_bound(value: Optional[str]) -> Tuple[Optional[float], str]:
+    """
+    Parse a `min` or `max` dose parameter.
+    Returns None for the dose if the parameter is missing, and an error message if it is invalid.
+    """
+    if value is None:
+        return None, ""
+
+    try:
+        dose = float(value)
+    except ValueError:
+        dose = float('nan')
+    if not math.isfinite(dose) or dose < 0:
+        return None, "Invalid dose. Provide min and max as non-negative numbers (e.g., min=10&max=20)"
+    return dose, ""
+
+
+def _fetch_encoded_fields(dataset: Dataset, substance_name: str, source: DataSource) -> Dict[str, bytes]:
+    """Fetch the encoded fragment of every field of a source document, encoding them on first access."""
+    encoded_fields = _fetch_encoded_caches(dataset).fields
+    key = (substance_name, source)
+    fragments = encoded_fields.get(key)
+    if fragments is not None:
+        return fragments
+
+    source_data = dataset.raw_substance_data[substance_name][source]
+    fragments = encoded_fields[key] = {
+        field: _encode_json(field).body[:-1] + b':' + _encode_json(value).body[:-1]
+        for field, value in source_data.items()
+    }
+    return fragments
+
+
+def _project_encoded_source(dataset: Dataset, substance_name: str, source: DataSource, fields: Tuple[str, ...]) -> bytes:
+    """Encode the given fields of a source document, skipping those it does not have."""
+    fragments = _fetch_encoded_fields(dataset, substance_name, source)
+    return b'{' + b','.join(fragments[field] for field in fields if field in fragments) + b'}'
+
+
+def _fetch_encoded_substance(
+    dataset: Dataset,
+    substance_name: str,
+    source: Optional[DataSource] = None,
+    fields: Optional[Tuple[str, ...]] = None
+) -> Optional[_EncodedJSON]:
+    """
+    Fetch the encoded document for a substance, or for one of its sources.
+    Documents are encoded on first access and reused until the data is reloaded.
+    With `fields`, source documents only contain those fields.
+    Returns None if there is no data.
+    """
+    if fields is not None:
+        return _fetch_encoded_substance_projection(dataset, substance_name, source, fields)
+
+    encoded_substances = _fetch_encoded_caches(dataset).substances
+    key = (substance_name, source)
+    encoded = encoded_substances.get(key)
+    if encoded is not None:
+        return encoded
+
+    substance_data = dataset.raw_substance_data.get(substance_name, {})
+    if source is not None:
+        substance_data = substance_data.get(source)
+    if not substance_data:
+        return None
+
+    encoded = encoded_substances[key] = _encode_json(substance_data, compressible=True)
+    return encoded
+
+
+def _fetch_encoded_substance_projection(
+    dataset: Dataset,
+    substance_name: str,
+    source: Optional[DataSource],
+    fields: Tuple[str, ...]
+) -> Optional[_EncodedJSON]:
+    """
+    Build the document for a substance, or one of its sources, with only the given fields.
+    The ETag is derived from the ETag of the whole document and the field set.
+    """
+    encoded = _fetch_encoded_substance(dataset, substance_name, source)
+    if encoded is None:
+        return None
+
+    if source is not None:
+        body = _project_encoded_source(dataset, substance_name, source, fields)
+    else:
+        body = b'{' + b','.join(
+            _encode_json(source_name).body[:-1] + b':' + _project_encoded_source(dataset, substance_name, source_name, fields)
+            for source_name in sorted(dataset.raw_substance_data[substance_name])
+        ) + b'}'
+
+    return _EncodedJSON(body + b'\n', xxhash.xxh3_64_hexdigest(f'{encoded.etag}:{",".join(fields)}'))
+
+
+def _fetch_encoded_category(dataset: Dataset, category_slug: str) -> Optional[_EncodedJSON]:
+    """
+    Fetch the encoded document for a category, encoding it on first access.
+    Returns None if there is no such category.
+    """
+    encoded_categories = _fetch_encoded_caches(dataset).categories
+    encoded = encoded_categories.get(category_slug)
+    if encoded is not None:
+        return encoded
+
+    category_entry = dataset.category_index.get(category_slug)
+    if not category_entry:
+        return None
+
+    encoded = encoded_categories[category_slug] = _encode_json(category_entry, compressible=True)
+    return encoded
+
+
+def _fetch_encoded_batch_item(
+    dataset: Dataset,
+    slug: str,
+    source: Optional[DataSource] = None,
+    fields: Optional[Tuple[str, ...]] = None
+) -> Tuple[str, Union[_EncodedJSON, str]]:
+    """
+    Fetch the encoded document for one substance of a batch.
+    Returns the normalized slug and either the document or an error message.
+    """
+    is_valid_slug, slug_validation_error_message = validate_slug(slug)
+    if not is_valid_slug:
+        return slug, slug_validation_error_message
+
+    decoded_slug = unquote(slug).lower()
+    substance_name = dataset.slug_to_substance_name.get(decoded_slug)
+    if substance_name is None:
+        return decoded_slug, "Substance not found"
+
+    encoded = _fetch_encoded_substance(dataset, substance_name, source, fields)
+    if encoded is None:
+        return decoded_slug, f"No data available for source: {source}"
+    return decoded_slug, encoded
+
+
+def _encode_batch_json(items: List[Tuple[str, Union[_EncodedJSON, str]]]) -> _EncodedJSON:
+    """
+    Encode a batch as one JSON object of documents and one of errors, keyed by slug.
+    Documents are spliced in from their encoded form instead of being encoded again.
+    """
+    documents = {slug: item for slug, item in items if isinstance(item, _EncodedJSON)}
+    errors = {slug: item for slug, item in items if not isinstance(item, _EncodedJSON)}
+
+    body = b''.join([
+        b'{"errors":',
+        _encode_json(errors).body[:-1],
+        b',"substances":{',
+        b','.join(
+            _encode_json(slug).body[:-1] + b':' + documents[slug].body[:-1]
+            for slug in sorted(documents)
+        ),
+        b'}}\n'
+    ])
+    return _EncodedJSON(body, xxhash.xxh3_64_hexdigest(body))
+
+
+def _iter_batch_ndjson(items: List[Tuple[str, Union[_EncodedJSON, str]]]) -> Iterator[bytes]:
+    """Yields a batch as newline-delimited JSON, one line per slug."""
+    for slug, item in items:
+        if isinstance(item, _EncodedJSON):
+            yield b'{"data":' + item.body[:-1] + b',"slug":' + _encode_json(slug).body[:-1] + b'}\n'
+        else:
+            yield _encode_json({"error": item, "slug": slug}).body
+
+
+def _encoded_json_response(encoded: _EncodedJSON, request: Request) -> Response:
+    """
+    Build a cacheable response for an encoded document, compressed if it
+    is compressible and the client accepts a compressed response.
+    Each document is compressed once per content encoding.
+    Answers with 304 Not Modified when the client already has it.
+    """
+    encoding = select_encoding(request.accept_encodings) if encoded.compressed_bodies is not None else None
+    if encoding is None:
+        response = Response(encoded.body, mimetype='application/json')
+        response.set_etag(encoded.etag)
+    else:
+        compressed_body = encoded.compressed_bodies.get(encoding)
+        if compressed_body is None:
+            compressed_body = encoded.compressed_bodies[encoding] = compress(encoded.body, [encoding], quick=True)[encoding]
+        response = Response(compressed_body, mimetype='application/json')
+        response.content_encoding = encoding
+        # a compressed body is a different representation, so it needs an ETag of its own
+        response.set_etag(f'{encoded.etag}-{encoding}')
+
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['API_CACHE_MAX_AGE']
+    return response.make_conditional(request)
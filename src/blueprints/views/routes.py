@@ -7,21 +7,25 @@ from flask import (
     make_response,
     current_app
 )
-import requests
 import csv
+import hmac
 from src.data import (
-    RAW_SUBSTANCE_DATA,
-    SUBSTANCE_TRIE,
-    CATEGORY_CARD_NAMES,
-    SVG_FILES,
-    SLUG_TO_SUBSTANCE_NAME,
-    get_substance_data_for_source,
+    get_dataset,
     DEFAULT_SOURCE,
     AVAILABLE_SOURCES,
     DataSource
 )
-from src.utils import validate_slug, slugify
-from src.blueprints.views.utils import cache, _fetch_theme, _fetch_data_source, _rank_to_display_string
+from src.utils import validate_slug
+from src.blueprints.views.utils import (
+    minify,
+    metrics,
+    page_cache,
+    view_cache,
+    leaderboard_provider,
+    _fetch_theme,
+    _fetch_data_source,
+    _reload_dataset_in_background
+)
 from src.blueprints.views import views_bp
 from urllib.parse import unquote
 
@@ -30,59 +34,23 @@ from urllib.parse import unquote
 def home() -> Response:
     return make_response(render_template(
         'index.html',
-        categories=CATEGORY_CARD_NAMES,
+        categories=get_dataset().category_card_names,
         theme=_fetch_theme(request)
     ))
 
 
 @views_bp.route('/leaderboard')
-@cache.cached()  # one day timeout
+@view_cache.cached(vary=lambda: _fetch_theme(request))
 def leaderboard() -> Response:
-    try:
-        # setup request prerequisites
-        auth_token = current_app.config['GITHUB_AUTH_TOKEN']
-        headers = {
-            'Accept': 'application/vnd.github+json',
-            'Authorization': f'Bearer {auth_token}',
-            'X-Github-Api-Version': '2022-11-28'
-        }
-        current_app.logger.info("Fetching leaderboard data")
-        r = requests.get(
-            'https://api.github.com/repos/ded-grl/SubstanceSearch/contributors',
-            headers=headers
-        )
-        contributors = r.json()
-
-        # Check if contributors is a list before processing
-        if isinstance(contributors, list):
-            # Filter out GitHub Actions bot
-            contributors = [c for c in contributors if c.get('login') != 'github-actions[bot]']
-            
-            # sort by contributions
-            contributors.sort(key=lambda x: x['contributions'], reverse=True)
-            
-            # add rank and label the contributors
-            for i, contributor in enumerate(contributors):
-                contributor['rank'] = _rank_to_display_string(i + 1)
-        else:
-            # Handle case where contributors is not a list
-            current_app.logger.warning(f"Unexpected contributors format: {type(contributors)}")
-            contributors = []  # Use an empty list as fallback
+    # Contributors are refreshed in the background, this never waits for GitHub
+    contributors = leaderboard_provider.get_contributors()
 
-        return make_response(render_template(
-            'leaderboard.html',
-            title='Leaderboard',
-            contributors=contributors,
-            theme=_fetch_theme(request)
-        ))
-    except Exception as e:
-        current_app.logger.error(f"Error fetching leaderboard data: {e}")
-        return make_response(render_template(
-            'error.html',
-            title='Error',
-            message='Error fetching leaderboard data.',
-            theme=_fetch_theme(request)
-        ), 500)
+    return make_response(render_template(
+        'leaderboard.html',
+        title='Leaderboard',
+        contributors=contributors,
+        theme=_fetch_theme(request)
+    ))
 
 
 @views_bp.route('/autocomplete')
@@ -91,32 +59,31 @@ def autocomplete() -> Response:
     if not query or len(query) <= 1:
         return jsonify([])
 
-    # Use search_substring method which is the correct method for the SuffixTrie
-    result_substance_names = SUBSTANCE_TRIE.search_substring(query)
-    
-    # We need to return data in the format expected by the frontend
-    results = []
-    for substance_name in result_substance_names[:10]:  # Limit to 10 results
-        # Get substance data
-        substance_data = RAW_SUBSTANCE_DATA.get(substance_name, {})
-        if not substance_data:
-            continue
-            
-        # Get the data from TripSit as it's more consistent
-        tripsit_data = substance_data.get('tripsit', {})
-        if not tripsit_data:
-            continue
-            
-        # Format the data as expected by the frontend
-        result = {
-            'name': substance_name,
-            'pretty_name': tripsit_data.get('pretty_name', substance_name),
-            'aliases': tripsit_data.get('aliases', []),
-            'slug': slugify(substance_name)
-        }
-        results.append(result)
+    limit = current_app.config['AUTOCOMPLETE_RESULT_LIMIT']
+    dataset = get_dataset()
+
+    # Ranked search: exact matches, then prefix matches, then shorter names, then common substances
+    with metrics.timer('trie_search'):
+        result_substance_names = dataset.substance_trie.search_top_k(query, limit)
+
+    # Fall back to typo-tolerant matches when the substring search finds too little
+    if len(result_substance_names) < current_app.config['AUTOCOMPLETE_FUZZY_MIN_RESULTS']:
+        with metrics.timer('fuzzy_search'):
+            fuzzy_substance_names = dataset.substance_fuzzy_index.search(query, limit)
+        for substance_name in fuzzy_substance_names:
+            if len(result_substance_names) >= limit:
+                break
+            if substance_name not in result_substance_names:
+                result_substance_names.append(substance_name)
     
-    return jsonify(results)
+    # Entries are encoded in the format expected by the frontend when the data is loaded;
+    # substances without TripSit data have none and are left out
+    autocomplete_entries = dataset.autocomplete_entries
+    encoded_results = ','.join(
+        autocomplete_entries[substance_name]
+        for substance_name in result_substance_names if substance_name in autocomplete_entries
+    )
+    return Response(f'[{encoded_results}]\n', mimetype='application/json')
 
 
 @views_bp.route('/substance/<path:slug>')
@@ -131,12 +98,15 @@ def substance(slug: str) -> Response:
             theme=_fetch_theme(request)
         ), 400)
 
+    # Fetch the dataset once, so a reload during the request does not mix two versions of the data
+    dataset = get_dataset()
+
     # Get substance name from slug
     decoded_slug = unquote(slug)
-    substance_name = SLUG_TO_SUBSTANCE_NAME.get(decoded_slug.lower(), '')
+    substance_name = dataset.slug_to_substance_name.get(decoded_slug.lower(), '')
     
     # Get substance data from the raw data
-    substance_data = RAW_SUBSTANCE_DATA.get(substance_name, {})
+    substance_data = dataset.raw_substance_data.get(substance_name, {})
     if not substance_data:
         return make_response(render_template(
             'error.html',
@@ -155,9 +125,17 @@ def substance(slug: str) -> Response:
             if available_source in substance_data and substance_data.get(available_source):
                 source = available_source
                 break
+
+    # The page only depends on the substance, source and theme, so serve it from the page cache if possible
+    theme = _fetch_theme(request)
+    page_key = (substance_name, source, theme)
+    page = page_cache.get(dataset.version, page_key)
+    if page is not None:
+        return make_response(page)
     
     # Get the substance data for the selected source
-    substance_info = substance_data.get(source, {})
+    # Copy it so the shared data (also served by the API) is never modified
+    substance_info = dict(substance_data.get(source, {}))
     substance_info['name'] = substance_name  # Ensure the name is included
     
     # Always use TripSit categories if available
@@ -170,23 +148,28 @@ def substance(slug: str) -> Response:
         if src in substance_data and substance_data.get(src):
             substance_available_sources.append(src)
     
-    # SVG_FILES is a set, so check if the SVG exists in the set
+    # svg_files is a set, so check if the SVG exists in the set
     svg_filename = f"{substance_name.lower()}.svg"
-    has_svg = svg_filename in SVG_FILES
+    has_svg = svg_filename in dataset.svg_files
     
     # Add other necessary data for the template
     all_sources_data = substance_data
     
-    return make_response(render_template(
+    html = render_template(
         'substance.html',
         substance=substance_info,  # Use 'substance' as the variable name to match the template
         substance_name=substance_name,
         current_source=source,
         available_sources=substance_available_sources,
         all_sources_data=all_sources_data,
-        svg_files=SVG_FILES,
-        theme=_fetch_theme(request)
-    ))
+        svg_files=dataset.svg_files,
+        theme=theme
+    )
+    with metrics.timer('minify'):
+        page = minify.parser.minify(html, 'html').encode('utf-8')
+    page_cache.set(dataset.version, page_key, page)
+
+    return make_response(page)
 
 
 @views_bp.route('/category/<path:category_slug>')
@@ -201,14 +184,9 @@ def category(category_slug: str) -> Response:
             theme=_fetch_theme(request)
         ), 400)
 
-    # Find category name from slug
-    category_name = None
-    for cat in CATEGORY_CARD_NAMES:  # CATEGORY_CARD_NAMES is a list, not a dict
-        if slugify(cat).lower() == category_slug.lower():
-            category_name = cat
-            break
-
-    if not category_name:
+    # Find category and its substances from slug
+    category_entry = get_dataset().category_index.get(category_slug.lower())
+    if not category_entry:
         return make_response(render_template(
             'error.html',
             title='Not Found',
@@ -216,20 +194,8 @@ def category(category_slug: str) -> Response:
             theme=_fetch_theme(request)
         ), 404)
 
-    # Find substances in this category
-    substances = []
-    for substance_name, substance_data in RAW_SUBSTANCE_DATA.items():
-        # Check if the substance belongs to this category
-        if source_data := substance_data.get('tripsit', {}):  # Use tripsit data for categories
-            if 'categories' in source_data and category_name.lower() in [c.lower() for c in source_data.get('categories', [])]:
-                substance_slug = slugify(substance_name)
-                # Check if SVG exists
-                has_svg = substance_name.lower() in SVG_FILES
-                substances.append({
-                    'name': substance_name,
-                    'slug': substance_slug,
-                    'has_svg': has_svg
-                })
+    category_name = category_entry['name']
+    substances = category_entry['substances']
 
     return make_response(render_template(
         'category.html',
@@ -256,8 +222,36 @@ def api_docs() -> Response:
         theme=_fetch_theme(request)
     ))
 
+@views_bp.route('/page-cache/stats')
+def page_cache_stats() -> Response:
+    # Internal cache keys and sizes are only exposed alongside /metrics
+    if not current_app.config['METRICS_ENABLED']:
+        return make_response("Not Found", 404)
+    return jsonify(page_cache.stats())
+
+@views_bp.route('/cache/stats')
+def view_cache_stats() -> Response:
+    # Internal cache keys and sizes are only exposed alongside /metrics
+    if not current_app.config['METRICS_ENABLED']:
+        return make_response("Not Found", 404)
+    return jsonify(view_cache.stats())
+
 @views_bp.route('/leaderboard/clear-cache')
 def clear_leaderboard_cache() -> Response:
-    # Clear the cache for the leaderboard route
-    cache.delete_memoized(leaderboard)
-    return make_response("Leaderboard cache cleared", 200) 
\ No newline at end of file
+    # Clear the cache for the leaderboard route in every worker
+    view_cache.invalidate('views.leaderboard')
+    leaderboard_provider.request_refresh()
+    return make_response("Leaderboard cache cleared", 200) 
+
+@views_bp.route('/data/reload', methods=['POST'])
+def reload_data() -> Response:
+    # Only available when a token is configured
+    token = current_app.config['DATA_RELOAD_TOKEN']
+    if not token:
+        return make_response("Not Found", 404)
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return make_response("Unauthorized", 401)
+
+    # Requests keep being served from the current data until the new data is swapped in
+    _reload_dataset_in_background(current_app._get_current_object())
+    return make_response("Data reload started", 202)
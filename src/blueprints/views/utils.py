@@ -1,9 +1,46 @@
-from flask import Request
-from src.data import AVAILABLE_SOURCES, DEFAULT_SOURCE, DataSource
+from flask import Flask, Request, Response
+from src.data import AVAILABLE_SOURCES, DEFAULT_SOURCE, DataSource, get_dataset, reload_dataset
+from src.utils.file_watcher import FileWatcher
+from src.utils.page_cache import PageCache
+from src.utils.leaderboard import LeaderboardProvider
+from src.utils.metrics import Metrics
+from src.utils.view_cache import ViewCache
 from flask_caching import Cache
+from flask_minify import Minify
+from threading import Thread
+import os
 
-# Initialize cache
+
+# Initialize latency histograms, collected only when enabled
+metrics = Metrics()
+
+
+class _Minify(Minify):
+    """Minifier that leaves compressed responses alone, they were minified before being compressed."""
+
+    def main(self, response: Response) -> Response:
+        if response.content_encoding:
+            return response
+        with metrics.timer('minify'):
+            return super().main(response)
+
+
+# Initialize cache and the cache of rendered views in it
 cache = Cache()
+view_cache = ViewCache(cache)
+
+# Initialize minifier. Substance pages are minified by the view itself,
+# so the minified page can be stored in the page cache
+minify = _Minify(html=True, js=True, cssless=True, bypass=['views.substance'])
+
+# Initialize cache of minified substance pages
+page_cache = PageCache()
+
+# Initialize leaderboard contributors, refreshed in the background
+leaderboard_provider = LeaderboardProvider(metrics=metrics)
+
+# Initialize watcher reloading the substance data when its file changes
+data_watcher = FileWatcher(reload_dataset)
 
 def _fetch_theme(request: Request) -> str:
     """Fetch the theme preference from the query parameters."""
@@ -30,13 +67,30 @@ def _fetch_data_source(request: Request) -> DataSource:
     return DEFAULT_SOURCE
 
 
-def _rank_to_display_string(rank: int) -> str:
-    """Convert a numerical rank to a display string with emoji."""
-    emoji = ''
-    if rank == 1:
-        emoji = '🥇 '
-    elif rank == 2:
-        emoji = '🥈 '
-    elif rank == 3:
-        emoji = '🥉 '
-    return f'{emoji}{rank}' 
\ No newline at end of file
+def _warm_page_cache(app: Flask) -> None:
+    """Render every substance page variant (source and theme) into the page cache."""
+    client = app.test_client()
+    for slug in get_dataset().slug_to_substance_name:
+        for source in AVAILABLE_SOURCES:
+            for theme in ['light', 'dark']:
+                client.get(f'/substance/{slug}', query_string={'source': source, 'theme': theme})
+
+
+def _reload_dataset_in_background(app: Flask) -> None:
+    """Reload the substance data in a background thread, logging errors instead of raising them."""
+    def reload() -> None:
+        try:
+            if reload_dataset():
+                app.logger.info(f"Reloaded substance data, version {get_dataset().version}")
+        except Exception as e:
+            app.logger.warning(f"Error reloading substance data: {e!r}")
+
+    Thread(target=reload, name='data-reload', daemon=True).start()
+
+
+def _minify_static_file(path: str, content: bytes) -> bytes:
+    """Minify a static stylesheet or script the same way the minifier does when serving it."""
+    tag = {'.css': 'style', '.js': 'script'}.get(os.path.splitext(path)[1])
+    if tag is None:
+        return content
+    return minify.parser.minify(content.decode('utf-8'), tag).encode('utf-8')
@@ -0,0 +1,323 @@
+"""
+Build of `data/datamed/data.json` from the raw source dumps.
+
+`raw_tripsit.json` and `raw_psychonaut.json` are lists of substances as returned
+by the TripSit and PsychonautWiki APIs. Every substance is normalized into the
+`tripsit` and `psychonautwiki` record shape served by the app, keyed by its
+TripSit name or its lowercased PsychonautWiki name.
+
+Substances are normalized in parallel across a process pool. The output of every
+substance is cached by a hash of its raw inputs, so after editing one substance
+only that substance is normalized again.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from src.data import (
+    AVAILABLE_SOURCES, DATA_FILE_PATH, DataSource, _assert_valid_substance_data, _write_validation_manifest,
+    write_data_record_store, write_data_snapshot
+)
+from src.export import _write_file
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import json
+import os
+import re
+import xxhash
+
+RAW_TRIPSIT_PATH = os.path.join('data', 'datamed', 'raw_tripsit.json')
+RAW_PSYCHONAUT_PATH = os.path.join('data', 'datamed', 'raw_psychonaut.json')
+BUILD_CACHE_PATH = os.path.join('data', 'datamed', 'data.build-cache')
+
+# Bump whenever the normalization changes, so cached substances are normalized again
+_BUILD_VERSION = 1
+
+_TRIPSIT_URL = 'https://drugs.tripsit.me/'
+_PSYCHONAUTWIKI_URL = 'https://psychonautwiki.org/wiki/'
+
+# numbers in TripSit dose strings, without signs, exponents or trailing dots
+_TRIPSIT_NUMBER_PATTERN = re.compile(r'\d*\.?\d+')
+_TRIPSIT_UNITS_PATTERN = re.compile(r'[a-zA-Z]*$')
+_TRIPSIT_NOTE_PATTERN = re.compile(r'NOTE: (.*)')
+
+# (normalized timing field, PsychonautWiki duration fields in order of preference)
+_PSYCHONAUTWIKI_TIMING_FIELDS: List[Tuple[str, Tuple[str, ...]]] = [
+    ('onset', ('onset', 'comeup')),
+    ('duration', ('peak',)),
+    ('aftereffects', ('afterglow',)),
+]
+
+# (normalized timing field, TripSit formatted field)
+_TRIPSIT_TIMING_FIELDS: List[Tuple[str, str]] = [
+    ('onset', 'formatted_onset'),
+    ('duration', 'formatted_duration'),
+    ('aftereffects', 'formatted_aftereffects'),
+]
+
+RawSources = Dict[DataSource, Dict]
+
+
+class BuildSummary(NamedTuple):
+    substances: int
+    # substances normalized again, the others were taken from the build cache
+    built: int
+    data_version: str
+    # False if data.json already had the built contents
+    changed: bool
+
+
+def _empty_properties() -> Dict[str, Any]:
+    return {'summary': '', 'avoid': '', 'test_kits': '', 'half_life': '', 'warnings': [], 'note': ''}
+
+
+def _empty_links() -> Dict[str, List[str]]:
+    return {'experiences': [], 'research': [], 'wikipedia': [], 'general': []}
+
+
+def _parse_tripsit_number(text: str) -> Optional[float]:
+    return float(text) if _TRIPSIT_NUMBER_PATTERN.fullmatch(text) else None
+
+
+def _parse_tripsit_dose(dose: Optional[str], units: str) -> Dict[str, Optional[float]]:
+    """
+    Parse a TripSit dose such as `10-20mg` or `15mg` into its minimum and maximum.
+    Only the units of the route are stripped, and only from the maximum, so doses
+    such as `10mg-20mg`, `20mg+` or `1-2g` for a route in mg are (partly) unknown.
+    """
+    if dose is None:
+        return {'min': None, 'max': None}
+
+    parts = dose.split('-')
+    if len(parts) == 1:
+        value = _parse_tripsit_number(dose.replace(units, '') if units else dose)
+        return {'min': value, 'max': value}
+    if len(parts) == 2:
+        maximum = parts[1].replace(units, '') if units else parts[1]
+        return {'min': _parse_tripsit_number(parts[0]), 'max': _parse_tripsit_number(maximum)}
+    return {'min': None, 'max': None}
+
+
+def normalize_tripsit(raw_substance: Dict) -> Dict:
+    """Normalize a substance of the TripSit API into a `tripsit` record."""
+    raw_properties = raw_substance.get('properties') or {}
+    properties = _empty_properties()
+    properties['summary'] = raw_properties.get('summary', '')
+    properties['avoid'] = raw_properties.get('avoid', '')
+    # the note is the first one found in any property, e.g. after the doses in `dose`
+    for property_name in sorted(raw_properties):
+        property_value = raw_properties[property_name]
+        note_match = _TRIPSIT_NOTE_PATTERN.search(property_value) if isinstance(property_value, str) else None
+        if note_match:
+            properties['note'] = note_match.group(1)
+            break
+
+    timing: Dict[str, Dict] = {}
+    for timing_field, raw_field in _TRIPSIT_TIMING_FIELDS:
+        raw_timing = raw_substance.get(raw_field) or {}
+        timing[timing_field] = {
+            route: {'value': value, 'unit': raw_timing.get('_unit')}
+            for route, value in raw_timing.items() if route != '_unit'
+        }
+
+    routes: Dict[str, Dict] = {}
+    for route, doses in (raw_substance.get('formatted_dose') or {}).items():
+        # the units of a route are those at the end of its first dose
+        units = _TRIPSIT_UNITS_PATTERN.search(next(iter(doses.values()), '')).group()
+        routes[route.lower()] = {
+            'units': units,
+            'threshold': None,
+            'light': _parse_tripsit_dose(doses.get('Light'), units),
+            'common': _parse_tripsit_dose(doses.get('Common'), units),
+            'strong': _parse_tripsit_dose(doses.get('Strong'), units),
+            'heavy': _parse_tripsit_dose(doses.get('Heavy'), units)['min'],
+        }
+
+    combos = raw_substance.get('combos') or {}
+    name = raw_substance['name']
+    return {
+        'name': name,
+        'pretty_name': raw_substance['pretty_name'],
+        'aliases': raw_substance.get('aliases') or [],
+        'categories': raw_substance.get('categories') or [],
+        'properties': properties,
+        'timing': timing,
+        'dosage': {'routes': routes, 'bioavailability': None},
+        'effects': raw_substance.get('formatted_effects') or [],
+        'effects_detailed': [],
+        'interactions': {
+            'dangerous': [combo_name for combo_name, combo in combos.items() if combo.get('status') == 'Dangerous'],
+            'unsafe': [],
+            'caution': [],
+        },
+        'links': {**_empty_links(), 'general': (raw_substance.get('sources') or {}).get('_general', [])},
+        'legal_status': {'international': ''},
+        'metadata': {'last_updated': '', 'source_url': _TRIPSIT_URL + name, 'confidence_score': None},
+    }
+
+
+def _format_psychonautwiki_range(value_range: Dict) -> str:
+    minimum, maximum = value_range.get('min'), value_range.get('max')
+    return f"{'' if minimum is None else minimum}-{'' if maximum is None else maximum}"
+
+
+def _to_float(value: Any) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+def _normalize_psychonautwiki_dose_range(value_range: Optional[Dict]) -> Dict[str, Optional[float]]:
+    value_range = value_range or {}
+    return {'min': _to_float(value_range.get('min')), 'max': _to_float(value_range.get('max'))}
+
+
+def normalize_psychonautwiki(raw_substance: Dict) -> Dict:
+    """Normalize a substance of the PsychonautWiki API into a `psychonautwiki` record."""
+    timing: Dict[str, Dict] = {timing_field: {} for timing_field, _ in _PSYCHONAUTWIKI_TIMING_FIELDS}
+    routes: Dict[str, Dict] = {}
+    for roa in raw_substance.get('roas') or []:
+        durations = roa.get('duration') or {}
+        for timing_field, duration_fields in _PSYCHONAUTWIKI_TIMING_FIELDS:
+            duration = next((durations[field] for field in duration_fields if durations.get(field)), None)
+            if duration:
+                timing[timing_field][roa['name']] = {
+                    'value': _format_psychonautwiki_range(duration),
+                    'unit': duration.get('units'),
+                }
+
+        dose = roa.get('dose')
+        if dose:
+            routes[roa['name']] = {
+                'units': dose.get('units'),
+                'threshold': _to_float(dose.get('threshold')),
+                'light': _normalize_psychonautwiki_dose_range(dose.get('light')),
+                'common': _normalize_psychonautwiki_dose_range(dose.get('common')),
+                'strong': _normalize_psychonautwiki_dose_range(dose.get('strong')),
+                'heavy': _to_float(dose.get('heavy')),
+            }
+
+    properties = _empty_properties()
+    if raw_substance.get('addictionPotential'):
+        properties['note'] = f"Addiction potential: {raw_substance['addictionPotential']}"
+
+    effects = raw_substance.get('effects') or []
+    name = raw_substance['name']
+    return {
+        'name': name,
+        'pretty_name': name,
+        'aliases': raw_substance.get('commonNames') or [],
+        'categories': [],
+        'properties': properties,
+        'timing': timing,
+        'dosage': {'routes': routes, 'bioavailability': None},
+        'effects': [effect['name'] for effect in effects],
+        'effects_detailed': [{'name': effect['name'], 'url': effect['url'], 'category': ''} for effect in effects],
+        'interactions': {
+            'dangerous': [interaction['name'] for interaction in raw_substance.get('dangerousInteractions') or []],
+            'unsafe': [interaction['name'] for interaction in raw_substance.get('unsafeInteractions') or []],
+            'caution': [interaction['name'] for interaction in raw_substance.get('uncertainInteractions') or []],
+        },
+        'links': _empty_links(),
+        'legal_status': {'international': ''},
+        'metadata': {
+            'last_updated': '',
+            'source_url': _PSYCHONAUTWIKI_URL + name.lower().replace(' ', '_'),
+            'confidence_score': None,
+        },
+    }
+
+
+_NORMALIZERS = {
+    'tripsit': normalize_tripsit,
+    'psychonautwiki': normalize_psychonautwiki,
+}
+
+
+def _read_raw_sources() -> Dict[str, RawSources]:
+    """
+    Read both raw source dumps, grouped by substance name.
+    The PsychonautWiki dump lists some substances twice; the first is used.
+    """
+    with open(RAW_TRIPSIT_PATH, 'rb') as f:
+        raw_tripsit = json.load(f)
+    with open(RAW_PSYCHONAUT_PATH, 'rb') as f:
+        raw_psychonaut = json.load(f)
+
+    raw_sources: Dict[str, RawSources] = {}
+    for raw_substance in raw_tripsit:
+        raw_sources.setdefault(raw_substance['name'], {}).setdefault('tripsit', raw_substance)
+    for raw_substance in raw_psychonaut:
+        raw_sources.setdefault(raw_substance['name'].lower(), {}).setdefault('psychonautwiki', raw_substance)
+    return raw_sources
+
+
+def _hash_raw_sources(raw_sources: RawSources) -> str:
+    encoded_sources = json.dumps([_BUILD_VERSION, raw_sources], sort_keys=True, separators=(',', ':'))
+    return xxhash.xxh3_64_hexdigest(encoded_sources.encode('utf-8'))
+
+
+def _build_substance(raw_sources: RawSources) -> Dict[str, Dict]:
+    return {source: _NORMALIZERS[source](raw_sources[source]) for source in AVAILABLE_SOURCES if source in raw_sources}
+
+
+def _read_build_cache() -> Dict[str, Dict]:
+    try:
+        with open(BUILD_CACHE_PATH, 'rb') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _read_data_file_if_exists() -> Optional[bytes]:
+    try:
+        with open(DATA_FILE_PATH, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def build_data_file(workers: Optional[int] = None) -> BuildSummary:
+    """
+    Build `data.json` from the raw source dumps, normalizing the substances whose raw
+    inputs changed since the last build across `workers` processes (defaults to the CPU count),
+    then write the data snapshot and record store derived from it.
+
+    Every file is written through a temporary file, so workers never read a partial one.
+    The snapshot and record store only match the data file they were built from, so a
+    worker starting between the writes parses `data.json` instead of loading them.
+    Raises AssertionError listing every violation, without writing anything, if the built data is invalid.
+    """
+    raw_sources = _read_raw_sources()
+    input_hashes = {substance_name: _hash_raw_sources(sources) for substance_name, sources in raw_sources.items()}
+    build_cache = _read_build_cache()
+
+    substance_names_to_build = [
+        substance_name for substance_name, input_hash in input_hashes.items() if input_hash not in build_cache
+    ]
+    if substance_names_to_build:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            built_records = executor.map(
+                _build_substance, [raw_sources[substance_name] for substance_name in substance_names_to_build], chunksize=32
+            )
+            for substance_name, record in zip(substance_names_to_build, built_records):
+                build_cache[input_hashes[substance_name]] = record
+
+    substance_data = {substance_name: build_cache[input_hashes[substance_name]] for substance_name in sorted(raw_sources)}
+    _assert_valid_substance_data(substance_data)
+    data_file_contents = json.dumps(substance_data, indent=2, ensure_ascii=False).encode('utf-8')
+
+    changed = data_file_contents != _read_data_file_if_exists()
+    if changed:
+        _write_file(DATA_FILE_PATH, data_file_contents)
+    # validated once here, so neither the snapshot build nor the workers validate it again
+    _write_validation_manifest(xxhash.xxh3_64_hexdigest(data_file_contents))
+    data_version = write_data_snapshot()
+    write_data_record_store()
+
+    # only keep the substances of this build, so the cache does not grow with every edit
+    _write_file(
+        BUILD_CACHE_PATH,
+        json.dumps({input_hash: build_cache[input_hash] for input_hash in input_hashes.values()}).encode('utf-8')
+    )
+
+    return BuildSummary(
+        substances=len(substance_data),
+        built=len(substance_names_to_build),
+        data_version=data_version,
+        changed=changed
+    )
@@ -0,0 +1,77 @@
+import json
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+from src.build import BUILD_CACHE_PATH, build_data_file
+from src.export import export_static_site
+from src.utils.compression import compress_static_files
+from src.blueprints.views.utils import _minify_static_file
+from src.data import (
+    DATA_FILE_PATH, DATA_SNAPSHOT_PATH, DATA_RECORD_STORE_PATH, DATA_VALIDATION_MANIFEST_PATH, validate_data_file,
+    write_data_snapshot, write_data_record_store
+)
+
+
+@click.command('build-snapshot')
+def build_snapshot_command() -> None:
+    """Write the pre-parsed data snapshot and record store loaded at startup."""
+    data_version = write_data_snapshot()
+    click.echo(f'Wrote {DATA_SNAPSHOT_PATH} for data version {data_version}')
+    write_data_record_store()
+    click.echo(f'Wrote {DATA_RECORD_STORE_PATH} for data version {data_version}')
+
+
+@click.command('build-data')
+@click.option('--workers', type=int, default=None, help='Number of normalization processes. Defaults to the CPU count.')
+def build_data_command(workers: int) -> None:
+    """Build data.json, its snapshot and record store from the raw TripSit and PsychonautWiki dumps."""
+    summary = build_data_file(workers)
+    click.echo(f'Normalized {summary.built} of {summary.substances} substances, the others were cached in {BUILD_CACHE_PATH}')
+    if summary.changed:
+        click.echo(f'Wrote {DATA_FILE_PATH} for data version {summary.data_version}')
+    else:
+        click.echo(f'{DATA_FILE_PATH} is up to date at data version {summary.data_version}')
+    click.echo(f'Wrote {DATA_SNAPSHOT_PATH} and {DATA_RECORD_STORE_PATH}')
+
+
+@click.command('validate-data')
+def validate_data_command() -> None:
+    """Validate data.json against the record schema and report every violation."""
+    try:
+        data_version, violations = validate_data_file()
+    except json.JSONDecodeError as error:
+        raise click.ClickException(f'{DATA_FILE_PATH} is not valid JSON: {error}')
+    for violation in violations:
+        click.echo(violation, err=True)
+    if violations:
+        raise click.ClickException(f'{len(violations)} violations in {DATA_FILE_PATH}')
+    click.echo(f'{DATA_FILE_PATH} is valid, recorded data version {data_version} in {DATA_VALIDATION_MANIFEST_PATH}')
+
+
+@click.command('export-static')
+@click.argument('output_directory', default='build', type=click.Path(file_okay=False))
+@click.option('--workers', type=int, default=None, help='Number of render processes. Defaults to the CPU count.')
+@with_appcontext
+def export_static_command(output_directory: str, workers: int) -> None:
+    """Render every page, API document and static asset into OUTPUT_DIRECTORY."""
+    summary = export_static_site(current_app.static_folder, output_directory, workers)
+    click.echo(f'Exported to {output_directory}: {summary.written} written, {summary.unchanged} unchanged, {summary.removed} removed')
+    for url in summary.failed:
+        click.echo(f'Skipped {url}: did not respond with 200 OK', err=True)
+
+
+@click.command('compress-static')
+@with_appcontext
+def compress_static_command() -> None:
+    """Write brotli and gzip compressed siblings of static files, served to clients that accept them."""
+    written = compress_static_files(current_app.static_folder, _minify_static_file)
+    click.echo(f'Wrote {written} compressed files to {current_app.static_folder}')
+
+
+def register_commands(app: Flask) -> None:
+    """Register the command line commands with the app."""
+    app.cli.add_command(build_snapshot_command)
+    app.cli.add_command(build_data_command)
+    app.cli.add_command(validate_data_command)
+    app.cli.add_command(export_static_command)
+    app.cli.add_command(compress_static_command)
@@ -3,4 +3,42 @@ import os
 
 class DefaultConfig:
     GITHUB_AUTH_TOKEN = os.environ.get('GITHUB_API_TOKEN')
+    LEADERBOARD_URL = 'https://api.github.com/repos/ded-grl/SubstanceSearch/contributors'
+    # contributors shown until the first fetch from GitHub succeeds
+    LEADERBOARD_SEED_PATH = os.path.join('data', 'leaderboard.csv')
+    # seconds between background refreshes of the leaderboard, and before retrying a failed one
+    LEADERBOARD_REFRESH_INTERVAL = 60 * 60
+    LEADERBOARD_RETRY_INTERVAL = 60
+    # seconds to wait for GitHub to connect and to respond
+    LEADERBOARD_REQUEST_TIMEOUT = 5
+    # where substance data lives: `memory` parses all of it into every worker,
+    # `mmap` decodes substances on access from a memory-mapped record store.
+    # read when `src.data` is imported, so only environment variables apply
+    SUBSTANCE_DATA_BACKEND = os.environ.get('SUBSTANCE_DATA_BACKEND', 'memory')
+    # decoded substances each worker keeps with the `mmap` backend
+    SUBSTANCE_RECORD_CACHE_SIZE = int(os.environ.get('SUBSTANCE_RECORD_CACHE_SIZE', 64))
+    # seconds between checks of the data file for changes, reloaded without a restart; 0 disables them
+    DATA_RELOAD_INTERVAL = 0
+    # bearer token of POST /data/reload, which reloads the data in the worker answering it; unset disables it
+    DATA_RELOAD_TOKEN = None
     CORS_ORIGINS = ['https://localhost:5000']
+    # Flask-Caching backend of cached views. SimpleCache is separate in every worker;
+    # FileSystemCache (with CACHE_DIR) or RedisCache (with CACHE_REDIS_URL) is shared by all of them
+    CACHE_TYPE = 'SimpleCache'
+    CACHE_DEFAULT_TIMEOUT = 300
+    # seconds clients and proxies may reuse API responses; ETags change whenever the data does
+    API_CACHE_MAX_AGE = 3600
+    # most substances a single batch request to /api/substances may ask for
+    API_MAX_BATCH_SIZE = 50
+    # most substances a single interaction check may combine
+    API_MAX_INTERACTION_SUBSTANCES = 10
+    # total bytes of minified substance pages kept per worker; 0 disables the page cache
+    PAGE_CACHE_MAX_SIZE = 64 * 1024 * 1024
+    # render every substance page variant into the page cache when the app is created
+    PAGE_CACHE_WARMUP = False
+    # collect latency histograms of requests, templates, searches, minification and leaderboard
+    # fetches, exposed per worker at /metrics in the Prometheus text format
+    METRICS_ENABLED = False
+    AUTOCOMPLETE_RESULT_LIMIT = 10
+    # typo-tolerant matches are only added when the substring search finds fewer results than this
+    AUTOCOMPLETE_FUZZY_MIN_RESULTS = 3
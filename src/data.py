@@ -1,29 +1,159 @@
 import json
+import logging
 import os
-from src.utils.trie import SuffixTrie
+import pickle
+import re
+import xxhash
+from src.utils.suffix_array import SuffixArray
+from src.utils.fuzzy import FuzzyIndex
+from src.utils.record_store import RecordStore, write_record_store
+from src.utils.interactions import InteractionMatrix, INTERACTION_SEVERITIES
+from src.utils.dosage import DosageIndex
+from src.utils.facets import FacetIndex
+from src.utils.schema import DictOf, ListOf, Nullable, Number, compile_schema
 from src.utils import slugify
-from typing import Set, List, Dict, Optional, Literal
+from src.config import DefaultConfig
+from threading import Lock
+from typing import Set, FrozenSet, List, Dict, Optional, Literal, Iterator, Tuple, Any, Mapping, Callable
 
 DataSource = Literal['tripsit', 'psychonautwiki']
 
 AVAILABLE_SOURCES: List[DataSource] = ['tripsit', 'psychonautwiki']
 DEFAULT_SOURCE: DataSource = 'tripsit'
 
-def _validate_substance_data(substance_data: Dict) -> None:
+DATA_FILE_PATH = os.path.join('data', 'datamed', 'data.json')
+DATA_SNAPSHOT_PATH = os.path.join('data', 'datamed', 'data.snapshot')
+DATA_RECORD_STORE_PATH = os.path.join('data', 'datamed', 'data.records')
+
+DATA_VALIDATION_MANIFEST_PATH = os.path.join('data', 'datamed', 'data.validated')
+
+_logger = logging.getLogger(__name__)
+
+# Bump whenever the snapshot contents or the pickled index classes change,
+# so snapshots written by older code are rebuilt instead of loaded
+_DATA_SNAPSHOT_VERSION = 12
+
+# Bump whenever the record schema changes, so data validated against an older schema is validated again
+_DATA_SCHEMA_VERSION = 1
+
+_DOSE_RANGE_SCHEMA = {'min': Nullable(Number), 'max': Nullable(Number)}
+_TIMING_SCHEMA = DictOf({'value': str, 'unit': Nullable(str)})
+
+# schema of the record of a substance from one source
+_SUBSTANCE_RECORD_SCHEMA = {
+    'name': str,
+    'pretty_name': str,
+    'aliases': ListOf(str),
+    'categories': ListOf(str),
+    'properties': {
+        'summary': str,
+        'avoid': str,
+        'test_kits': str,
+        'half_life': str,
+        'warnings': ListOf(str),
+        'note': str,
+    },
+    'timing': {
+        'onset': _TIMING_SCHEMA,
+        'duration': _TIMING_SCHEMA,
+        'aftereffects': _TIMING_SCHEMA,
+    },
+    'dosage': {
+        'routes': DictOf({
+            'units': Nullable(str),
+            'threshold': Nullable(Number),
+            'light': _DOSE_RANGE_SCHEMA,
+            'common': _DOSE_RANGE_SCHEMA,
+            'strong': _DOSE_RANGE_SCHEMA,
+            'heavy': Nullable(Number),
+        }),
+        'bioavailability': object,
+    },
+    'effects': ListOf(str),
+    'effects_detailed': ListOf({'name': str, 'url': str, 'category': str}),
+    'interactions': {severity: ListOf(str) for severity in INTERACTION_SEVERITIES},
+    'links': {
+        'experiences': ListOf(str),
+        'research': ListOf(str),
+        'wikipedia': ListOf(str),
+        'general': ListOf(str),
+    },
+    'legal_status': {'international': str},
+    'metadata': {
+        'last_updated': str,
+        'source_url': str,
+        'confidence_score': Nullable(Number),
+    },
+}
+_validate_substance_record = compile_schema(_SUBSTANCE_RECORD_SCHEMA)
+
+def validate_substance_data(substance_data: Any) -> List[str]:
     """
-    Basic validation of substance data structure.
-    Skips validation of any None values.
+    Validate substance data against the record schema.
+    Returns a message for every violation found, empty if the data is valid.
     """
-    assert substance_data is not None
-    
-    if isinstance(substance_data, dict):
-        for key, value in substance_data.items():
-            if isinstance(value, (dict, list)) and value is not None:
-                _validate_substance_data(value)
-    elif isinstance(substance_data, list):
-        for value in substance_data:
-            if isinstance(value, (dict, list)) and value is not None:
-                _validate_substance_data(value)
+    if not isinstance(substance_data, dict):
+        return [f'Expected dictionary data, got {type(substance_data).__name__}']
+
+    violations: List[str] = []
+    for substance_name, substance_data_by_source in substance_data.items():
+        if not isinstance(substance_data_by_source, dict):
+            violations.append(f'{substance_name}: expected dict, got {type(substance_data_by_source).__name__}')
+            continue
+        if not any(source in substance_data_by_source for source in AVAILABLE_SOURCES):
+            violations.append(f'{substance_name}: missing required source data')
+        for source in AVAILABLE_SOURCES:
+            if source in substance_data_by_source:
+                _validate_substance_record(substance_data_by_source[source], f'{substance_name}.{source}', violations)
+    return violations
+
+def _assert_valid_substance_data(substance_data: Any) -> None:
+    """Raises AssertionError listing every violation if the substance data is invalid."""
+    violations = validate_substance_data(substance_data)
+    if violations:
+        raise AssertionError(f'Invalid substance data, {len(violations)} violations:\n' + '\n'.join(violations))
+
+def _is_validated(data_version: str) -> bool:
+    """Whether the data with this version was validated against the current schema, according to the manifest."""
+    try:
+        with open(DATA_VALIDATION_MANIFEST_PATH, 'rb') as f:
+            return json.load(f) == {'schema_version': _DATA_SCHEMA_VERSION, 'data_version': data_version}
+    except (OSError, json.JSONDecodeError):
+        return False
+
+def _write_validation_manifest(data_version: str) -> None:
+    """Record that the data with this version is valid, so workers skip validating it."""
+    temporary_path = f'{DATA_VALIDATION_MANIFEST_PATH}.{os.getpid()}.tmp'
+    with open(temporary_path, 'w') as f:
+        json.dump({'schema_version': _DATA_SCHEMA_VERSION, 'data_version': data_version}, f)
+    os.replace(temporary_path, DATA_VALIDATION_MANIFEST_PATH)
+
+class _SubstanceSourceView(Mapping[str, Dict]):
+    """
+    Read-only view of the data for one source, looked up in the raw data on access.
+    Used instead of a copied dict when the raw data is a lazily decoded record store.
+    Membership, iteration and length use the names of the substances with data for
+    the source, so only reading a substance decodes its record.
+    """
+
+    def __init__(self, raw_data: Mapping[str, Dict], source: DataSource, substance_names: FrozenSet[str]) -> None:
+        self._raw_data = raw_data
+        self._source = source
+        self._substance_names = substance_names
+
+    def __getitem__(self, substance_name: str) -> Dict:
+        if substance_name not in self._substance_names:
+            raise KeyError(substance_name)
+        return self._raw_data[substance_name][self._source]
+
+    def __contains__(self, substance_name: object) -> bool:
+        return substance_name in self._substance_names
+
+    def __iter__(self) -> Iterator[str]:
+        return (substance_name for substance_name in self._raw_data if substance_name in self._substance_names)
+
+    def __len__(self) -> int:
+        return len(self._substance_names)
 
 def _get_substance_data_for_source(raw_data: Dict, source: DataSource) -> Dict:
     """
@@ -35,40 +165,34 @@ def _get_substance_data_for_source(raw_data: Dict, source: DataSource) -> Dict:
             processed_data[substance_name] = substance_data[source]
     return processed_data
 
-def _init_substance_data() -> Dict[str, Dict]:
+def _read_data_file() -> bytes:
     """
-    Load and validate substance data from the JSON file.
-    Returns a dictionary mapping substance names to their data.
+    Read the raw contents of the JSON data file.
     Raises FileNotFoundError if data file is missing.
-    Raises JSONDecodeError if data file is invalid JSON.
-    Raises AssertionError if data validation fails.
     """
-    path = os.path.join('data', 'datamed', 'data.json')
-    
-    # Load from data.json
     try:
-        with open(path, encoding='utf-8') as f:
-            data = json.load(f)
-            
-        # Validate data structure
-        if not isinstance(data, dict):
-            raise AssertionError(f'Expected dictionary data, got {type(data)}')
-            
-        # Validate each substance has required source data
-        for substance_name, substance_data in data.items():
-            if not isinstance(substance_data, dict):
-                raise AssertionError(f'Invalid data format for substance {substance_name}')
-            if not any(source in substance_data for source in AVAILABLE_SOURCES):
-                raise AssertionError(f'Substance {substance_name} missing required source data')
-        
-        _validate_substance_data(data)
-        return data
-        
+        with open(DATA_FILE_PATH, 'rb') as f:
+            return f.read()
     except FileNotFoundError:
         raise FileNotFoundError('Data file (data.json) not found. This file should exist in the repository. Please clone the repository again or fetch the data files.')
+
+def _init_substance_data(data_file_contents: bytes, data_version: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    Parse and validate substance data from the contents of the JSON file.
+    Validation is skipped if the manifest shows this data version was already validated.
+    Returns a dictionary mapping substance names to their data.
+    Raises JSONDecodeError if data file is invalid JSON.
+    Raises AssertionError listing every violation if data validation fails.
+    """
+    try:
+        data = json.loads(data_file_contents)
     except json.JSONDecodeError as e:
         raise json.JSONDecodeError(f'Invalid JSON in data file: {str(e)}', e.doc, e.pos)
 
+    if data_version is None or not _is_validated(data_version):
+        _assert_valid_substance_data(data)
+    return data
+
 def _init_svg_file_names() -> Set[str]:
     svg_directory = os.path.join('src', 'static', 'svg')
     assert os.path.exists(
@@ -76,20 +200,28 @@ def _init_svg_file_names() -> Set[str]:
 
     return {f for f in os.listdir(svg_directory) if f.endswith('.svg')}
 
-def _init_substance_trie(substance_data: Dict, source: DataSource = 'tripsit') -> SuffixTrie[str]:
-    substance_trie: SuffixTrie[str] = SuffixTrie()
+def _iter_substance_search_terms(substance_data: Dict, source: DataSource = 'tripsit') -> Iterator[Tuple[str, str, int]]:
+    """
+    Yields (search term, substance name, popularity) for every name, pretty name and alias.
+    Substances TripSit lists as common rank above the rest in autocomplete.
+    """
     source_data = _get_substance_data_for_source(substance_data, source)
 
     for substance_name, details in source_data.items():
         pretty_name = details.get('pretty_name', 'Unknown')
         aliases = details.get('aliases', [])
+        popularity = 1 if 'common' in details.get('categories', []) else 0
 
-        substance_trie.insert(substance_name, substance_name)
-        substance_trie.insert(pretty_name, substance_name)
+        yield substance_name, substance_name, popularity
+        yield pretty_name, substance_name, popularity
         for alias in aliases:
-            substance_trie.insert(alias, substance_name)
+            yield alias, substance_name, popularity
+
+def _init_substance_trie(substance_data: Dict, source: DataSource = 'tripsit') -> SuffixArray[str]:
+    return SuffixArray.from_items(_iter_substance_search_terms(substance_data, source))
 
-    return substance_trie
+def _init_substance_fuzzy_index(substance_data: Dict, source: DataSource = 'tripsit') -> FuzzyIndex[str]:
+    return FuzzyIndex.from_items(_iter_substance_search_terms(substance_data, source))
 
 def _init_category_card_names(substance_data: Dict, source: DataSource = 'tripsit') -> List[str]:
     """
@@ -105,6 +237,141 @@ def _init_category_card_names(substance_data: Dict, source: DataSource = 'tripsi
                 categories.add(category.capitalize())
     return sorted(categories)
 
+def _init_category_substance_names(substance_data: Dict, category_card_names: List[str]) -> Dict[str, Tuple[str, List[str]]]:
+    """
+    Map each category card's slug to its name and the sorted names of the substances in it.
+    Uses TripSit data only, like the category cards.
+    """
+    category_names_by_lowercase = {category.lower(): category for category in category_card_names}
+    substance_names: Dict[str, List[str]] = {category: [] for category in category_card_names}
+    source_data = _get_substance_data_for_source(substance_data, 'tripsit')
+
+    for substance_name, details in source_data.items():
+        for category in {c.lower() for c in details.get('categories', [])}:
+            if category in category_names_by_lowercase:
+                substance_names[category_names_by_lowercase[category]].append(substance_name)
+
+    return {
+        slugify(category).lower(): (category, sorted(names, key=str.lower))
+        for category, names in substance_names.items()
+    }
+
+def _init_category_index(category_substance_names: Dict[str, Tuple[str, List[str]]], svg_file_names: Set[str]) -> Dict[str, Dict]:
+    """
+    Map each category slug to its name and a record (name, slug, has_svg) for every substance in it,
+    so a category page only touches its own substances.
+    """
+    return {
+        category_slug: {
+            'name': category_name,
+            'slug': category_slug,
+            'substances': [
+                {
+                    'name': substance_name,
+                    'slug': slugify(substance_name),
+                    'has_svg': f"{substance_name.lower()}.svg" in svg_file_names
+                }
+                for substance_name in substance_names
+            ]
+        }
+        for category_slug, (category_name, substance_names) in category_substance_names.items()
+    }
+
+def _resolve_interaction_term(
+    term: str,
+    substance_names_by_term: Dict[str, Set[str]],
+    substance_names_by_category: Dict[str, Set[str]],
+    substance_slugs: Dict[str, str]
+) -> Set[str]:
+    """
+    Resolve a term from an interactions list to the substances it stands for.
+    A term may name a substance by name, pretty name or alias ("ketamine"), a category ("opioids"),
+    a family of substances with `x` as placeholder ("2c-x", "5-meo-xxt") or a name part ("nbomes"),
+    and several terms may be combined with "/" ("ghb/gbl").
+    """
+    substance_names: Set[str] = set()
+    for part in term.split('/'):
+        key = slugify(part)
+        if not key:
+            continue
+        singular_key = key[:-1] if key.endswith('s') else key
+
+        for candidate in (key, singular_key):
+            if candidate in substance_names_by_term:
+                substance_names |= substance_names_by_term[candidate]
+                break
+            if candidate in substance_names_by_category:
+                substance_names |= substance_names_by_category[candidate]
+                break
+        else:
+            if 'x' in singular_key:
+                pattern = re.compile(re.sub('x+', '[a-z0-9]{1,4}', singular_key))
+                substance_names |= {name for name, slug in substance_slugs.items() if pattern.fullmatch(slug)}
+            else:
+                substance_names |= {name for name, slug in substance_slugs.items() if singular_key in slug.split('-')}
+
+    return substance_names
+
+def _init_interaction_matrix(substance_data: Dict, substance_slugs: Dict[str, str]) -> InteractionMatrix:
+    """
+    Build the matrix of interaction severities between every pair of substances
+    from the interactions listed by every source.
+    Terms that match no substance, such as drug classes without a category ("MAOI"),
+    are kept as unresolved interactions of the substances listing them.
+    """
+    substance_names_by_term: Dict[str, Set[str]] = {}
+    substance_names_by_category: Dict[str, Set[str]] = {}
+    for substance_name, sources_data in substance_data.items():
+        for source in AVAILABLE_SOURCES:
+            details = sources_data.get(source) or {}
+            for term in [substance_name, details.get('pretty_name'), *details.get('aliases', [])]:
+                if term:
+                    substance_names_by_term.setdefault(slugify(term), set()).add(substance_name)
+        # Always use TripSit data for categories
+        for category in (sources_data.get('tripsit') or {}).get('categories', []):
+            substance_names_by_category.setdefault(category.lower(), set()).add(substance_name)
+
+    interaction_matrix = InteractionMatrix(substance_data.keys())
+    # the substances of a term are stored once as a group, however many substances list the term
+    term_groups: Dict[str, Optional[int]] = {}
+    for substance_name, sources_data in substance_data.items():
+        for source in AVAILABLE_SOURCES:
+            interactions = (sources_data.get(source) or {}).get('interactions') or {}
+            for severity in INTERACTION_SEVERITIES:
+                for term in interactions.get(severity) or []:
+                    if term not in term_groups:
+                        term_substance_names = _resolve_interaction_term(
+                            term, substance_names_by_term, substance_names_by_category, substance_slugs
+                        )
+                        term_groups[term] = interaction_matrix.add_group(term_substance_names) if term_substance_names else None
+                    term_group = term_groups[term]
+                    if term_group is None:
+                        interaction_matrix.add_unresolved(substance_name, term, severity)
+                    else:
+                        interaction_matrix.add_group_interaction(substance_name, term_group, severity)
+
+    return interaction_matrix
+
+def _init_substance_name_to_slug_map(substance_data: Dict) -> Dict[str, str]:
+    return {substance_name: slugify(substance_name) for substance_name in substance_data}
+
+def _init_autocomplete_entries(substance_data: Mapping[str, Dict], substance_slugs: Dict[str, str]) -> Dict[str, str]:
+    """
+    The JSON-encoded autocomplete result of every substance with TripSit data,
+    so autocomplete requests only join the entries of the substances found.
+    """
+    autocomplete_entries: Dict[str, str] = {}
+    for substance_name, tripsit_data in _get_substance_data_for_source(substance_data, 'tripsit').items():
+        if not tripsit_data:
+            continue
+        autocomplete_entries[substance_name] = json.dumps({
+            'name': substance_name,
+            'pretty_name': tripsit_data.get('pretty_name', substance_name),
+            'aliases': tripsit_data.get('aliases', []),
+            'slug': substance_slugs[substance_name],
+        }, sort_keys=True, separators=(',', ':'))
+    return autocomplete_entries
+
 def _init_slug_to_substance_name_map(substance_data: Dict, source: DataSource = 'tripsit') -> Dict[str, str]:
     map: Dict[str, str] = {}
     source_data = _get_substance_data_for_source(substance_data, source)
@@ -116,25 +383,361 @@ def _init_slug_to_substance_name_map(substance_data: Dict, source: DataSource =
 
     return map
 
-# Initialize raw data that contains all sources
-RAW_SUBSTANCE_DATA = _init_substance_data()
+def _init_source_substance_names(substance_data: Mapping[str, Dict]) -> Dict[DataSource, FrozenSet[str]]:
+    """The names of the substances with data for each source, so a record store need not be decoded to find them."""
+    return {
+        source: frozenset(substance_name for substance_name, sources_data in substance_data.items() if source in sources_data)
+        for source in AVAILABLE_SOURCES
+    }
 
-# Pre-process and cache substance data for each available source
-CACHED_SUBSTANCE_DATA = {
-    source: _get_substance_data_for_source(RAW_SUBSTANCE_DATA, source) 
-    for source in AVAILABLE_SOURCES
-}
+def _init_facet_index(
+    substance_data: Dict,
+    category_substance_names: Dict[str, Tuple[str, List[str]]],
+    interaction_matrix: InteractionMatrix
+) -> FacetIndex[str]:
+    """
+    Build the bitmaps of the substances with each category slug, route of administration,
+    source and interaction severity, to filter substances on any combination of them.
+    The has-SVG facet depends on the svg files, so it is added by the dataset.
+    """
+    substance_names_by_route: Dict[str, List[str]] = {}
+    substance_names_by_source: Dict[str, List[str]] = {source: [] for source in AVAILABLE_SOURCES}
+    substance_names_by_severity: Dict[str, List[str]] = {severity: [] for severity in INTERACTION_SEVERITIES}
+    for substance_name, sources_data in substance_data.items():
+        routes: Set[str] = set()
+        for source in AVAILABLE_SOURCES:
+            details = sources_data.get(source)
+            if details:
+                substance_names_by_source[source].append(substance_name)
+                routes.update(route.lower() for route in (details.get('dosage') or {}).get('routes') or {})
+        for route in routes:
+            substance_names_by_route.setdefault(route, []).append(substance_name)
+        for severity in interaction_matrix.severities(substance_name):
+            substance_names_by_severity[severity].append(substance_name)
+
+    facet_index: FacetIndex[str] = FacetIndex(substance_data.keys())
+    facet_index.add_facet('category', {
+        category_slug: substance_names for category_slug, (_, substance_names) in category_substance_names.items()
+    })
+    facet_index.add_facet('route', dict(sorted(substance_names_by_route.items())))
+    facet_index.add_facet('source', substance_names_by_source)
+    facet_index.add_facet('interaction', substance_names_by_severity)
+    return facet_index
+
+# Every index derived from the substance data, in build order, with the fields of
+# substance records it is built from and the function building it from the data
+# and the indices built before it. Indices built from nothing but the substance
+# names and sources have no fields, they only change when substances or their
+# sources are added or removed, which rebuilds every index.
+_SUBSTANCE_INDEX_BUILDERS: List[Tuple[str, Set[str], Callable[[Mapping[str, Dict], Dict[str, Any]], Any]]] = [
+    ('trie', {'pretty_name', 'aliases', 'categories'},
+        lambda substance_data, indices: _init_substance_trie(substance_data)),
+    ('fuzzy_index', {'pretty_name', 'aliases', 'categories'},
+        lambda substance_data, indices: _init_substance_fuzzy_index(substance_data)),
+    # Always use TripSit data for categories
+    ('category_card_names', {'categories'},
+        lambda substance_data, indices: _init_category_card_names(substance_data, 'tripsit')),
+    ('category_substance_names', {'categories'},
+        lambda substance_data, indices: _init_category_substance_names(substance_data, indices['category_card_names'])),
+    # sources added or removed rebuild every index, so this depends on no field
+    ('source_substance_names', set(),
+        lambda substance_data, indices: _init_source_substance_names(substance_data)),
+    ('slug_to_substance_name', set(),
+        lambda substance_data, indices: _init_slug_to_substance_name_map(substance_data)),
+    ('substance_name_to_slug', set(),
+        lambda substance_data, indices: _init_substance_name_to_slug_map(substance_data)),
+    ('interaction_matrix', {'pretty_name', 'aliases', 'categories', 'interactions'},
+        lambda substance_data, indices: _init_interaction_matrix(substance_data, indices['substance_name_to_slug'])),
+    ('autocomplete_entries', {'pretty_name', 'aliases'},
+        lambda substance_data, indices: _init_autocomplete_entries(substance_data, indices['substance_name_to_slug'])),
+    ('dosage_indices', {'dosage'},
+        lambda substance_data, indices: {
+            source: DosageIndex(_get_substance_data_for_source(substance_data, source)) for source in AVAILABLE_SOURCES
+        }),
+    ('facet_index', {'pretty_name', 'aliases', 'categories', 'interactions', 'dosage'},
+        lambda substance_data, indices: _init_facet_index(
+            substance_data, indices['category_substance_names'], indices['interaction_matrix']
+        )),
+]
+
+def _init_record_hashes(substance_data: Mapping[str, Dict]) -> Dict[str, str]:
+    """Hash the data of every substance, to tell which substances changed between two versions of the data."""
+    return {
+        substance_name: xxhash.xxh3_64_hexdigest(
+            json.dumps(sources_data, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        )
+        for substance_name, sources_data in substance_data.items()
+    }
+
+def _init_substance_indices(substance_data: Mapping[str, Dict]) -> Dict[str, Any]:
+    """
+    Build every index derived from the substance data.
+    """
+    indices: Dict[str, Any] = {'record_hashes': _init_record_hashes(substance_data)}
+    for index_name, _, build_index in _SUBSTANCE_INDEX_BUILDERS:
+        indices[index_name] = build_index(substance_data, indices)
+    return indices
+
+def _update_substance_indices(
+    previous_substance_data: Mapping[str, Dict],
+    previous_indices: Dict[str, Any],
+    substance_data: Mapping[str, Dict]
+) -> Dict[str, Any]:
+    """
+    Build the indices of a new version of the substance data from those of the previous one.
+    Substances whose hash changed are compared field by field with their previous data,
+    and only the indices built from a changed field are rebuilt; the others are reused.
+    """
+    record_hashes = _init_record_hashes(substance_data)
+    previous_record_hashes = previous_indices['record_hashes']
+    if record_hashes.keys() != previous_record_hashes.keys():
+        return _init_substance_indices(substance_data)
+
+    changed_fields: Set[str] = set()
+    for substance_name, record_hash in record_hashes.items():
+        if record_hash == previous_record_hashes[substance_name]:
+            continue
+
+        previous_sources_data, sources_data = previous_substance_data[substance_name], substance_data[substance_name]
+        for source in AVAILABLE_SOURCES:
+            previous_details, details = previous_sources_data.get(source), sources_data.get(source)
+            if bool(previous_details) != bool(details):
+                return _init_substance_indices(substance_data)
+
+            previous_details, details = previous_details or {}, details or {}
+            changed_fields |= {
+                field for field in previous_details.keys() | details.keys()
+                if previous_details.get(field) != details.get(field)
+            }
+
+    indices: Dict[str, Any] = {'record_hashes': record_hashes}
+    for index_name, index_fields, build_index in _SUBSTANCE_INDEX_BUILDERS:
+        if index_fields & changed_fields:
+            indices[index_name] = build_index(substance_data, indices)
+        else:
+            indices[index_name] = previous_indices[index_name]
+    return indices
+
+def _read_data_snapshot(data_version: str, include_data: bool = True) -> Optional[Tuple[Optional[Dict[str, Dict]], Dict[str, Any]]]:
+    """
+    Load the indices, and unless `include_data` is False the substance data, from the snapshot file.
+    Returns None if there is no snapshot or it was built from other data or by other code.
+    """
+    try:
+        with open(DATA_SNAPSHOT_PATH, 'rb') as f:
+            # the header is pickled on its own so a stale snapshot is rejected without loading the rest
+            header = pickle.load(f)
+            if header != {'version': _DATA_SNAPSHOT_VERSION, 'data_version': data_version}:
+                return None
+            substance_indices = pickle.load(f)
+            substance_data = pickle.load(f) if include_data else None
+            return substance_data, substance_indices
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+def write_data_snapshot() -> str:
+    """
+    Validate the JSON data file, build the indices and write both to the snapshot file.
+    The snapshot is written to a temporary file first, so workers never read a partial one.
+    The data version is recorded in the validation manifest, so workers skip validating it.
+    Returns the version (content hash) of the data file the snapshot was built from.
+    """
+    data_file_contents = _read_data_file()
+    data_version = xxhash.xxh3_64_hexdigest(data_file_contents)
+    substance_data = _init_substance_data(data_file_contents, data_version)
+    _write_validation_manifest(data_version)
+    substance_indices = _init_substance_indices(substance_data)
+
+    temporary_path = f'{DATA_SNAPSHOT_PATH}.{os.getpid()}.tmp'
+    with open(temporary_path, 'wb') as f:
+        pickle.dump({'version': _DATA_SNAPSHOT_VERSION, 'data_version': data_version}, f, pickle.HIGHEST_PROTOCOL)
+        # indices come before the data so the record store backend can skip loading the data
+        pickle.dump(substance_indices, f, pickle.HIGHEST_PROTOCOL)
+        pickle.dump(substance_data, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, DATA_SNAPSHOT_PATH)
+
+    return data_version
+
+def validate_data_file() -> Tuple[str, List[str]]:
+    """
+    Validate the JSON data file against the record schema, and if it is valid
+    record its version in the validation manifest, so workers skip validating it.
+    Returns the version (content hash) of the data file and every violation found.
+    Raises JSONDecodeError if data file is invalid JSON.
+    """
+    data_file_contents = _read_data_file()
+    data_version = xxhash.xxh3_64_hexdigest(data_file_contents)
+    violations = validate_substance_data(json.loads(data_file_contents))
+    if not violations:
+        _write_validation_manifest(data_version)
+    return data_version, violations
+
+def write_data_record_store() -> str:
+    """
+    Validate the JSON data file and write it to the record store file used by the `mmap` data backend.
+    Returns the version (content hash) of the data file the record store was built from.
+    """
+    data_file_contents = _read_data_file()
+    data_version = xxhash.xxh3_64_hexdigest(data_file_contents)
+    write_record_store(DATA_RECORD_STORE_PATH, _init_substance_data(data_file_contents, data_version), data_version)
+
+    return data_version
 
-# Initialize data structures with TripSit as default
-SVG_FILES = _init_svg_file_names()
-SUBSTANCE_TRIE = _init_substance_trie(RAW_SUBSTANCE_DATA)
-# Always use TripSit data for categories
-CATEGORY_CARD_NAMES = _init_category_card_names(RAW_SUBSTANCE_DATA, 'tripsit')
-SLUG_TO_SUBSTANCE_NAME = _init_slug_to_substance_name_map(RAW_SUBSTANCE_DATA)
+def _open_record_store(data_file_contents: bytes, data_version: str, substance_data: Optional[Dict[str, Dict]] = None) -> RecordStore:
+    """
+    Open the record store file for a version of the data,
+    (re)building it from the JSON data file when it is missing or stale.
+    """
+    cache_size = DefaultConfig.SUBSTANCE_RECORD_CACHE_SIZE
+    record_store = RecordStore.open_if_current(DATA_RECORD_STORE_PATH, data_version, cache_size)
+    if record_store is None:
+        if substance_data is None:
+            substance_data = _init_substance_data(data_file_contents, data_version)
+        write_record_store(DATA_RECORD_STORE_PATH, substance_data, data_version)
+        record_store = RecordStore(DATA_RECORD_STORE_PATH, cache_size)
+    return record_store
 
-def get_substance_data_for_source(source: DataSource = 'tripsit') -> Dict:
+def _load_substance_data() -> Tuple[str, Mapping[str, Dict], Dict[str, Any]]:
     """
-    Get substance data for a specific source.
-    Returns cached data to avoid reprocessing on every call.
+    Load the substance data and indices, from the snapshot file when it
+    matches the JSON data file and from the JSON data file otherwise.
+    With the `mmap` data backend the substance data is a record store that
+    decodes substances on access; the record store file is (re)built from
+    the JSON data file when it is missing or stale.
+    Returns the data version (content hash of the JSON data file), the data and the indices.
     """
-    return CACHED_SUBSTANCE_DATA[source]
+    data_file_contents = _read_data_file()
+    data_version = xxhash.xxh3_64_hexdigest(data_file_contents)
+    use_record_store = DefaultConfig.SUBSTANCE_DATA_BACKEND == 'mmap'
+
+    substance_data, substance_indices = _read_data_snapshot(data_version, include_data=not use_record_store) or (None, None)
+
+    if use_record_store:
+        record_store = _open_record_store(data_file_contents, data_version)
+        if substance_indices is None:
+            substance_indices = _init_substance_indices(record_store)
+        return data_version, record_store, substance_indices
+
+    if substance_data is None:
+        substance_data = _init_substance_data(data_file_contents, data_version)
+        substance_indices = _init_substance_indices(substance_data)
+
+    return data_version, substance_data, substance_indices
+
+class Dataset:
+    """
+    One version of the substance data, with every index derived from it.
+
+    A dataset is never modified once built. Reloading the data builds a new
+    dataset and swaps it in, so a request that fetches the current dataset
+    once sees one consistent version of the data until it finishes.
+    """
+
+    def __init__(self, version: str, raw_substance_data: Mapping[str, Dict], indices: Dict[str, Any], svg_files: Set[str]) -> None:
+        # content hash of the JSON data file
+        self.version: str = version
+        # raw data that contains all sources
+        self.raw_substance_data: Mapping[str, Dict] = raw_substance_data
+        self.indices: Dict[str, Any] = indices
+
+        # Pre-process and cache substance data for each available source
+        if isinstance(raw_substance_data, RecordStore):
+            self.cached_substance_data: Dict[DataSource, Mapping[str, Dict]] = {
+                source: _SubstanceSourceView(raw_substance_data, source, indices['source_substance_names'][source])
+                for source in AVAILABLE_SOURCES
+            }
+        else:
+            self.cached_substance_data = {
+                source: _get_substance_data_for_source(raw_substance_data, source)
+                for source in AVAILABLE_SOURCES
+            }
+
+        self.svg_files: Set[str] = svg_files
+        self.substance_trie: SuffixArray[str] = indices['trie']
+        self.substance_fuzzy_index: FuzzyIndex[str] = indices['fuzzy_index']
+        self.category_card_names: List[str] = indices['category_card_names']
+        # has_svg depends on the svg files, not the data, so this part is not stored in the snapshot
+        self.category_index: Dict[str, Dict] = _init_category_index(indices['category_substance_names'], svg_files)
+        self.slug_to_substance_name: Dict[str, str] = indices['slug_to_substance_name']
+        self.substance_name_to_slug: Dict[str, str] = indices['substance_name_to_slug']
+        self.interaction_matrix: InteractionMatrix = indices['interaction_matrix']
+        unresolved_terms = self.interaction_matrix.unresolved_terms()
+        if unresolved_terms:
+            _logger.warning(f"Interaction terms matching no substance, reported as unresolved: {', '.join(unresolved_terms)}")
+        # JSON-encoded autocomplete result of every substance with TripSit data
+        self.autocomplete_entries: Dict[str, str] = indices['autocomplete_entries']
+        self.dosage_indices: Dict[DataSource, DosageIndex] = indices['dosage_indices']
+        # has_svg depends on the svg files, so that facet is added here rather than stored in the snapshot
+        has_svg = {substance_name: f"{substance_name.lower()}.svg" in svg_files for substance_name in raw_substance_data}
+        self.facet_index: FacetIndex[str] = indices['facet_index'].with_facet('svg', {
+            'true': [substance_name for substance_name, substance_has_svg in has_svg.items() if substance_has_svg],
+            'false': [substance_name for substance_name, substance_has_svg in has_svg.items() if not substance_has_svg],
+        })
+
+    def get_substance_data_for_source(self, source: DataSource = 'tripsit') -> Mapping[str, Dict]:
+        """
+        Get substance data for a specific source.
+        Returns cached data to avoid reprocessing on every call.
+        """
+        return self.cached_substance_data[source]
+
+# The dataset is loaded on the first call to `get_dataset`, not at import, so commands
+# that build or validate the data file can run while it is missing or invalid
+_dataset: Optional[Dataset] = None
+_reload_lock = Lock()
+
+def get_dataset() -> Dataset:
+    """
+    Returns the current dataset, loading it on the first call.
+    Fetch it once per request and use it throughout, so the request sees one version of the data.
+    """
+    global _dataset
+    dataset = _dataset
+    if dataset is None:
+        with _reload_lock:
+            # another thread may have loaded it while this one waited for the lock
+            if _dataset is None:
+                _dataset = Dataset(*_load_substance_data(), _init_svg_file_names())
+            dataset = _dataset
+    return dataset
+
+def reload_dataset() -> bool:
+    """
+    Rebuild the dataset from the JSON data file if it changed and swap it in.
+    Requests that already fetched the previous dataset keep using it.
+    Returns whether a new dataset was swapped in.
+    """
+    global _dataset
+    with _reload_lock:
+        data_file_contents = _read_data_file()
+        data_version = xxhash.xxh3_64_hexdigest(data_file_contents)
+        previous_dataset = _dataset
+        # nothing loaded yet, the first `get_dataset` call loads the current data file
+        if previous_dataset is None or data_version == previous_dataset.version:
+            return False
+
+        use_record_store = isinstance(previous_dataset.raw_substance_data, RecordStore)
+        # with the `mmap` backend, read the new data through its record store when one was
+        # built for it (by `flask build-data` or `flask build-snapshot`), so the whole data
+        # file is not parsed; otherwise the reload briefly holds all of the parsed data
+        raw_substance_data: Optional[Mapping[str, Dict]] = RecordStore.open_if_current(
+            DATA_RECORD_STORE_PATH, data_version, DefaultConfig.SUBSTANCE_RECORD_CACHE_SIZE
+        ) if use_record_store else None
+        if raw_substance_data is not None:
+            snapshot = _read_data_snapshot(data_version, include_data=False)
+            substance_indices = snapshot[1] if snapshot is not None else _update_substance_indices(
+                previous_dataset.raw_substance_data, previous_dataset.indices, raw_substance_data
+            )
+        else:
+            substance_data = _init_substance_data(data_file_contents, data_version)
+            substance_indices = _update_substance_indices(
+                previous_dataset.raw_substance_data, previous_dataset.indices, substance_data
+            )
+            raw_substance_data = substance_data
+            if use_record_store:
+                raw_substance_data = _open_record_store(data_file_contents, data_version, substance_data)
+
+        # a single assignment, so every request sees either the previous or the new dataset;
+        # the previous record store is closed once the last request using it lets go of it
+        _dataset = Dataset(data_version, raw_substance_data, substance_indices, _init_svg_file_names())
+        return True
@@ -0,0 +1,169 @@
+"""
+Static export of every page and API document, for serving from a CDN or web server.
+
+Pages are written once per variant: `<route>/index.<theme>.html`, and for
+substance pages `<route>/index.<source>.<theme>.html`. API documents are
+written to `<route>.json`, and static assets keep their path. Every file gets
+precompressed `.br` and `.gz` siblings.
+
+`manifest.json` records the content hash of every file, so later exports only
+rewrite files whose content changed and remove files that are no longer produced.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from src.data import AVAILABLE_SOURCES, get_dataset
+from src.utils.compression import COMPRESSED_EXTENSIONS, compress
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+import json
+import os
+import xxhash
+
+MANIFEST_FILE_NAME = 'manifest.json'
+
+_THEMES = ['light', 'dark']
+
+
+class ExportResult(NamedTuple):
+    path: str
+    url: str
+    # None if the route did not answer with 200 OK
+    content_hash: Optional[str]
+    written: bool
+
+
+class ExportSummary(NamedTuple):
+    written: int
+    unchanged: int
+    removed: int
+    failed: List[str]
+
+
+def _iter_export_urls(static_folder: str) -> Iterator[Tuple[str, str]]:
+    """Yields the (url, output path) of everything to export."""
+    dataset = get_dataset()
+    for theme in _THEMES:
+        yield f'/?theme={theme}', f'index.{theme}.html'
+        yield f'/disclaimer?theme={theme}', f'disclaimer/index.{theme}.html'
+        yield f'/api/docs?theme={theme}', f'api/docs/index.{theme}.html'
+
+        for category_slug in dataset.category_index:
+            yield f'/category/{category_slug}?theme={theme}', f'category/{category_slug}/index.{theme}.html'
+
+        for slug in dataset.slug_to_substance_name:
+            for source in AVAILABLE_SOURCES:
+                yield f'/substance/{slug}?source={source}&theme={theme}', f'substance/{slug}/index.{source}.{theme}.html'
+
+    for category_slug in dataset.category_index:
+        yield f'/api/category/{category_slug}', f'api/category/{category_slug}.json'
+
+    for slug, substance_name in dataset.slug_to_substance_name.items():
+        yield f'/api/substance/{slug}', f'api/substance/{slug}.json'
+        for source in AVAILABLE_SOURCES:
+            if dataset.raw_substance_data[substance_name].get(source):
+                yield f'/api/substance/{slug}/sources/{source}', f'api/substance/{slug}/sources/{source}.json'
+
+    for directory, _, file_names in os.walk(static_folder):
+        for file_name in sorted(file_names):
+            # skip siblings written by `flask compress-static`, every exported file gets its own
+            if os.path.splitext(file_name)[1] in COMPRESSED_EXTENSIONS.values():
+                continue
+            static_path = os.path.relpath(os.path.join(directory, file_name), static_folder).replace(os.sep, '/')
+            yield f'/static/{static_path}', f'static/{static_path}'
+
+
+def _write_file(path: str, content: bytes) -> None:
+    """Write a file through a temporary file, so readers never see a partial one."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'wb') as f:
+        f.write(content)
+    os.replace(temporary_path, path)
+
+
+# state of each export worker process, set up by `_init_export_worker`
+_worker_client = None
+_worker_output_directory: str = ''
+_worker_previous_hashes: Dict[str, str] = {}
+
+
+def _init_export_worker(output_directory: str, previous_hashes: Dict[str, str]) -> None:
+    global _worker_client, _worker_output_directory, _worker_previous_hashes
+    from src import create_app
+
+    # every page is rendered once, caching them would only cost memory
+    os.environ['FLASK_PAGE_CACHE_MAX_SIZE'] = '0'
+    _worker_client = create_app().test_client()
+    _worker_output_directory = output_directory
+    _worker_previous_hashes = previous_hashes
+
+
+def _export_url(url_and_path: Tuple[str, str]) -> ExportResult:
+    """Render a url and write it, with its compressed variants, unless its content is unchanged."""
+    url, path = url_and_path
+    response = _worker_client.get(url)
+    if response.status_code != 200:
+        return ExportResult(path, url, None, False)
+
+    content = response.get_data()
+    response.close()
+    content_hash = xxhash.xxh3_64_hexdigest(content)
+    output_path = os.path.join(_worker_output_directory, path)
+    if _worker_previous_hashes.get(path) == content_hash and os.path.exists(output_path):
+        return ExportResult(path, url, content_hash, False)
+
+    _write_file(output_path, content)
+    for encoding, compressed_content in compress(content).items():
+        _write_file(output_path + COMPRESSED_EXTENSIONS[encoding], compressed_content)
+
+    return ExportResult(path, url, content_hash, True)
+
+
+def _read_manifest(output_directory: str) -> Dict[str, Dict[str, str]]:
+    try:
+        with open(os.path.join(output_directory, MANIFEST_FILE_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def export_static_site(static_folder: str, output_directory: str, workers: Optional[int] = None) -> ExportSummary:
+    """
+    Export every page variant, API document and static asset to `output_directory`,
+    rendering them in parallel across `workers` processes (defaults to the CPU count).
+    """
+    previous_manifest = _read_manifest(output_directory)
+    previous_hashes = {path: entry['hash'] for path, entry in previous_manifest.items()}
+    urls = list(_iter_export_urls(static_folder))
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_export_worker,
+        initargs=(output_directory, previous_hashes)
+    ) as executor:
+        results = list(executor.map(_export_url, urls, chunksize=32))
+
+    manifest = {
+        result.path: {'hash': result.content_hash, 'url': result.url}
+        for result in results if result.content_hash is not None
+    }
+
+    # remove files that are no longer exported
+    removed_paths = [path for path in previous_manifest if path not in manifest]
+    for path in removed_paths:
+        for extension in ['', *COMPRESSED_EXTENSIONS.values()]:
+            try:
+                os.remove(os.path.join(output_directory, path + extension))
+            except FileNotFoundError:
+                pass
+
+    _write_file(
+        os.path.join(output_directory, MANIFEST_FILE_NAME),
+        json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8')
+    )
+
+    written = sum(1 for result in results if result.written)
+    return ExportSummary(
+        written=written,
+        unchanged=len(manifest) - written,
+        removed=len(removed_paths),
+        failed=[result.url for result in results if result.content_hash is None]
+    )
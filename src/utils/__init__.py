@@ -1,6 +1,7 @@
 import unicodedata
 import unidecode
 import re
+from functools import lru_cache
 from typing import Tuple
 
 
@@ -38,3 +39,12 @@ def slugify(value: object) -> str:
         return ''
 
     return value
+
+
+@lru_cache(maxsize=4096)
+def cached_slugify(value: str) -> str:
+    """
+    Memoized `slugify` of a string, for the names slugified again on every render.
+    The cache is bounded, as templates may slugify values from requests.
+    """
+    return slugify(value)
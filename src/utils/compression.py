@@ -0,0 +1,161 @@
+from flask import Flask, Response, current_app, request, send_from_directory
+from werkzeug.datastructures import Accept
+from werkzeug.security import safe_join
+from typing import Callable, Dict, Iterable, Iterator, Optional
+import brotli
+import gzip
+import json
+import mimetypes
+import os
+import stat
+
+
+# content encodings we can produce, in order of preference
+CONTENT_ENCODINGS = ['br', 'gzip']
+
+# file extension of each precompressed content encoding
+COMPRESSED_EXTENSIONS = {'br': '.br', 'gzip': '.gz'}
+
+# static files worth compressing; images other than SVG are already compressed
+_COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.json', '.svg', '.txt', '.html', '.ico'}
+
+# file in the static folder recording the encodings skipped for each file
+# because they did not make it smaller, so they are not compressed on every run
+SKIPPED_ENCODINGS_FILE_NAME = '.compress-static-skipped.json'
+
+
+def compress(content: bytes, encodings: Iterable[str] = CONTENT_ENCODINGS, quick: bool = False) -> Dict[str, bytes]:
+    """
+    Compress content with each of `encodings`, at the highest level by default.
+    Meant for content that is compressed once and served many times.
+    The output only depends on the content, so it can be compared between builds.
+    `quick` trades some size for speed, for content compressed while serving a request.
+    """
+    compressors = {
+        'br': lambda: brotli.compress(content, quality=5 if quick else 11),
+        'gzip': lambda: gzip.compress(content, compresslevel=6 if quick else 9, mtime=0),
+    }
+    return {encoding: compressors[encoding]() for encoding in encodings}
+
+
+def select_encoding(accept_encodings: Accept) -> Optional[str]:
+    """Returns the preferred content encoding the client accepts, or None for no encoding."""
+    return accept_encodings.best_match(CONTENT_ENCODINGS)
+
+
+def iter_compressible_files(directory: str) -> Iterator[str]:
+    """Yields the path of every file under `directory` worth precompressing."""
+    for parent_directory, _, file_names in os.walk(directory):
+        for file_name in sorted(file_names):
+            if os.path.splitext(file_name)[1] in _COMPRESSIBLE_EXTENSIONS and file_name != SKIPPED_ENCODINGS_FILE_NAME:
+                yield os.path.join(parent_directory, file_name)
+
+
+def _read_skipped_encodings(path: str) -> Dict[str, Dict]:
+    try:
+        with open(path, 'rb') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def compress_static_files(static_folder: str, prepare: Optional[Callable[[str, bytes], bytes]] = None) -> int:
+    """
+    Write `.br` and `.gz` siblings of every compressible static file whose
+    siblings are missing or older than the file, skipping encodings that do
+    not make the file smaller. Skipped encodings are recorded with the
+    modification time of the file, so they are only tried again once it changes.
+    `prepare` is applied to the content of each file before compressing it,
+    e.g. to minify it the way it is served.
+    Returns the number of files written.
+    """
+    skipped_encodings_path = os.path.join(static_folder, SKIPPED_ENCODINGS_FILE_NAME)
+    previous_skipped_encodings = _read_skipped_encodings(skipped_encodings_path)
+    # skipped encodings by the path of the file relative to the static folder, only
+    # keeping files that still exist, so the record does not grow with every removed file
+    skipped_encodings: Dict[str, Dict] = {}
+    written = 0
+    for path in iter_compressible_files(static_folder):
+        relative_path = os.path.relpath(path, static_folder)
+        modified_time = os.stat(path).st_mtime_ns
+        # encodings skipped for an earlier version of the file are tried again
+        skipped = previous_skipped_encodings.get(relative_path)
+        if skipped is not None and skipped['modified_time'] == modified_time:
+            skipped_encodings[relative_path] = {'modified_time': modified_time, 'encodings': list(skipped['encodings'])}
+        stale_encodings = [
+            encoding for encoding, extension in COMPRESSED_EXTENSIONS.items()
+            if encoding not in skipped_encodings.get(relative_path, {}).get('encodings', []) and (
+                not os.path.exists(path + extension) or os.stat(path + extension).st_mtime_ns < modified_time
+            )
+        ]
+        if not stale_encodings:
+            continue
+
+        with open(path, 'rb') as f:
+            content = f.read()
+        if prepare is not None:
+            content = prepare(path, content)
+        for encoding, compressed_content in compress(content, stale_encodings).items():
+            compressed_path = path + COMPRESSED_EXTENSIONS[encoding]
+            if len(compressed_content) >= len(content):
+                if os.path.exists(compressed_path):
+                    os.remove(compressed_path)
+                skipped_encodings.setdefault(relative_path, {'modified_time': modified_time, 'encodings': []})['encodings'].append(encoding)
+                continue
+
+            temporary_path = f'{compressed_path}.{os.getpid()}.tmp'
+            with open(temporary_path, 'wb') as f:
+                f.write(compressed_content)
+            os.replace(temporary_path, compressed_path)
+            written += 1
+
+    if skipped_encodings != previous_skipped_encodings:
+        temporary_path = f'{skipped_encodings_path}.{os.getpid()}.tmp'
+        with open(temporary_path, 'w') as f:
+            json.dump(skipped_encodings, f, indent=2, sort_keys=True)
+        os.replace(temporary_path, skipped_encodings_path)
+
+    return written
+
+
+def _is_current(path: str, compressed_path: str) -> bool:
+    """Whether the compressed sibling of a file exists and is not older than the file, like `flask compress-static` checks."""
+    try:
+        compressed_stat = os.stat(compressed_path)
+        return stat.S_ISREG(compressed_stat.st_mode) and compressed_stat.st_mtime_ns >= os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+class PrecompressedStatic:
+    """
+    Serves the precompressed siblings of static files, written by
+    `flask compress-static`, to clients that accept their encoding.
+    Files without siblings, or with siblings older than the file because
+    it changed since they were written, are served as usual.
+    """
+
+    def init_app(self, app: Flask) -> None:
+        app.view_functions['static'] = self.send_static_file
+
+    def send_static_file(self, filename: str) -> Response:
+        app = current_app
+        encoding = select_encoding(request.accept_encodings)
+        if encoding is not None:
+            compressed_filename = filename + COMPRESSED_EXTENSIONS[encoding]
+            path = safe_join(app.static_folder, filename)
+            compressed_path = safe_join(app.static_folder, compressed_filename)
+            if path is not None and compressed_path is not None and _is_current(path, compressed_path):
+                response = send_from_directory(
+                    app.static_folder,
+                    compressed_filename,
+                    mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                    max_age=app.get_send_file_max_age(filename)
+                )
+                response.content_encoding = encoding
+                response.vary.add('Accept-Encoding')
+                return response
+
+        response = app.send_static_file(filename)
+        response.vary.add('Accept-Encoding')
+        return response
@@ -0,0 +1,135 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Generic, Iterable, List, Mapping, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+# dose levels from lowest to highest
+DOSE_LEVELS: List[str] = ['threshold', 'light', 'common', 'strong', 'heavy']
+
+# base unit and factor to it of units of mass and volume, by lowercase unit;
+# other units, such as seeds, are their own base unit
+_UNIT_BASES: Dict[str, Tuple[str, float]] = {
+    'ug': ('mg', 0.001),
+    'µg': ('mg', 0.001),
+    'μg': ('mg', 0.001),
+    'mcg': ('mg', 0.001),
+    'mg': ('mg', 1.0),
+    'g': ('mg', 1000.0),
+    'ml': ('ml', 1.0),
+    'l': ('ml', 1000.0),
+}
+
+
+def normalize_units(units: Optional[str]) -> Optional[Tuple[str, float]]:
+    """
+    Returns the base unit of a unit, and the factor converting doses to it.
+    Returns None for doses without units.
+    """
+    units = (units or '').strip().lower()
+    if not units:
+        return None
+    return _UNIT_BASES.get(units, (units, 1.0))
+
+
+def to_base(value: float, factor: float) -> float:
+    """
+    Converts a dose to its base unit with the factor from `normalize_units`.
+    Rounded, so 250ug is 0.25mg rather than 0.25000000000000006mg; doses and
+    the bounds searched for have to be converted alike to compare equal.
+    """
+    return round(value * factor, 9)
+
+
+class IntervalIndex(Generic[T]):
+    """
+    Closed intervals with a key each, searchable for the intervals overlapping a range.
+
+    Bounds are stored in flat arrays twice: sorted by lower bound, and sorted by
+    upper bound. The intervals overlapping [low, high] start at or before `high`,
+    a prefix of the first order, and end at or after `low`, a suffix of the
+    second, both found by binary search. Only the shorter of the two is scanned.
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[float, float, T]]) -> None:
+        sorted_intervals = sorted(intervals, key=lambda interval: (interval[0], interval[1]))
+        self._lows: array = array('d', (low for low, _, _ in sorted_intervals))
+        self._highs: array = array('d', (high for _, high, _ in sorted_intervals))
+        self._keys: List[T] = [key for _, _, key in sorted_intervals]
+        # positions in lower bound order, sorted by upper bound
+        high_order = sorted(range(len(sorted_intervals)), key=self._highs.__getitem__)
+        self._high_order: array = array('l', high_order)
+        self._sorted_highs: array = array('d', (self._highs[position] for position in high_order))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def overlapping(self, low: float, high: float) -> List[Tuple[T, float, float]]:
+        """Returns the (key, low, high) of every interval overlapping [low, high], by lower bound."""
+        starting_before_end = bisect_right(self._lows, high)
+        ending_after_start = bisect_left(self._sorted_highs, low)
+        if starting_before_end <= len(self._keys) - ending_after_start:
+            positions = [position for position in range(starting_before_end) if self._highs[position] >= low]
+        else:
+            positions = sorted(
+                position for position in self._high_order[ending_after_start:] if position < starting_before_end
+            )
+        return [(self._keys[position], self._lows[position], self._highs[position]) for position in positions]
+
+
+def _dose_interval(route_data: Dict, level: str) -> Optional[Tuple[float, float]]:
+    """
+    The range of doses of a level of a route, in its own units.
+    Threshold doses are a single dose and heavy doses have no upper bound.
+    A range with one unknown bound is taken to be the known dose alone.
+    """
+    dose = route_data.get(level)
+    if level == 'threshold':
+        return None if dose is None else (dose, dose)
+    if level == 'heavy':
+        return None if dose is None else (dose, float('inf'))
+
+    minimum, maximum = (dose or {}).get('min'), (dose or {}).get('max')
+    if minimum is None and maximum is None:
+        return None
+    minimum = maximum if minimum is None else minimum
+    maximum = minimum if maximum is None else maximum
+    return (minimum, maximum) if minimum <= maximum else (maximum, minimum)
+
+
+class DosageIndex:
+    """
+    Dose ranges of every substance by route and level, converted to a base unit
+    (mg for mass, ml for volume), in an `IntervalIndex` per route, level and base unit.
+    Doses without units can not be compared and are left out.
+    """
+
+    def __init__(self, substance_data: Mapping[str, Dict]) -> None:
+        intervals: Dict[Tuple[str, str, str], List[Tuple[float, float, str]]] = {}
+        for substance_name, details in substance_data.items():
+            routes = ((details or {}).get('dosage') or {}).get('routes') or {}
+            for route, route_data in routes.items():
+                unit_base = normalize_units(route_data.get('units'))
+                if unit_base is None:
+                    continue
+                base_units, factor = unit_base
+                for level in DOSE_LEVELS:
+                    interval = _dose_interval(route_data, level)
+                    if interval is not None:
+                        intervals.setdefault((route.lower(), level, base_units), []).append(
+                            (to_base(interval[0], factor), to_base(interval[1], factor), substance_name)
+                        )
+
+        self._indices: Dict[Tuple[str, str, str], IntervalIndex[str]] = {
+            index_key: IntervalIndex(index_intervals) for index_key, index_intervals in intervals.items()
+        }
+
+    def search(self, route: str, level: str, base_units: str, low: float, high: float) -> List[Tuple[str, float, float]]:
+        """
+        Returns the (substance name, low, high) of every substance whose doses of a level of a route
+        overlap [low, high], all in base units, by lowest dose.
+        """
+        interval_index = self._indices.get((route.lower(), level, base_units))
+        if interval_index is None:
+            return []
+        return interval_index.overlapping(low, high)
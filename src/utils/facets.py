@@ -0,0 +1,102 @@
+from typing import Any, Dict, Generic, Iterable, List, Mapping, NamedTuple, Sequence, TypeVar
+
+T = TypeVar('T')
+
+
+def _count(bitmap: int) -> int:
+    return bin(bitmap).count('1')
+
+
+class FacetResult(NamedTuple):
+    # matching keys, in id order
+    keys: List[Any]
+    # matching keys with each value of each facet, by facet and value
+    counts: Dict[str, Dict[str, int]]
+
+
+class FacetIndex(Generic[T]):
+    """
+    Bitmaps of the keys with each value of each facet, to filter keys on any combination of facet values.
+
+    Every key has an id, its position in `keys`, and the keys with a facet value are an int with
+    the bit of each of their ids set. Filtering is then an OR of the selected values of a facet
+    and an AND across facets, a few operations on ints however many keys match.
+    """
+
+    def __init__(self, keys: Iterable[T]) -> None:
+        self.keys: List[T] = list(keys)
+        self._ids: Dict[T, int] = {key: key_id for key_id, key in enumerate(self.keys)}
+        self._all: int = (1 << len(self.keys)) - 1
+        # bitmap of every value of every facet, by facet and value
+        self._bitmaps: Dict[str, Dict[str, int]] = {}
+
+    def add_facet(self, facet: str, keys_by_value: Mapping[str, Iterable[T]]) -> None:
+        """Add a facet with the keys having each of its values. A key may have any number of values."""
+        bitmaps = self._bitmaps[facet] = {}
+        for value, keys in keys_by_value.items():
+            bitmap = 0
+            for key in keys:
+                bitmap |= 1 << self._ids[key]
+            bitmaps[value] = bitmap
+
+    def with_facet(self, facet: str, keys_by_value: Mapping[str, Iterable[T]]) -> 'FacetIndex[T]':
+        """Returns a copy of the index with another facet added, sharing the bitmaps of the others."""
+        facet_index: FacetIndex[T] = FacetIndex.__new__(FacetIndex)
+        facet_index.keys, facet_index._ids, facet_index._all = self.keys, self._ids, self._all
+        facet_index._bitmaps = dict(self._bitmaps)
+        facet_index.add_facet(facet, keys_by_value)
+        return facet_index
+
+    @property
+    def facets(self) -> List[str]:
+        return list(self._bitmaps)
+
+    def values(self, facet: str) -> List[str]:
+        return list(self._bitmaps[facet])
+
+    def _select(self, facet: str, values: Sequence[str]) -> int:
+        """Bitmap of the keys with any of the values of a facet. Values the facet does not have match nothing."""
+        bitmaps = self._bitmaps[facet]
+        bitmap = 0
+        for value in values:
+            bitmap |= bitmaps.get(value, 0)
+        return bitmap
+
+    def search(self, selections: Mapping[str, Sequence[str]]) -> FacetResult:
+        """
+        Returns the keys with any of the selected values of every selected facet, in id order,
+        and the count of matching keys for every value of every facet.
+
+        The counts of a facet are taken with the selections of every other facet, but not its own,
+        so they are the number of keys selecting that value as well would match.
+        """
+        selected = {facet: self._select(facet, values) for facet, values in selections.items() if values}
+
+        matches = self._all
+        for bitmap in selected.values():
+            matches &= bitmap
+
+        counts: Dict[str, Dict[str, int]] = {}
+        for facet, bitmaps in self._bitmaps.items():
+            if facet in selected:
+                others = self._all
+                for other_facet, bitmap in selected.items():
+                    if other_facet != facet:
+                        others &= bitmap
+            else:
+                others = matches
+            counts[facet] = {value: _count(bitmap & others) for value, bitmap in bitmaps.items()}
+
+        return FacetResult(self.keys_of(matches), counts)
+
+    def keys_of(self, bitmap: int) -> List[T]:
+        """Returns the keys whose bits are set in a bitmap, in id order."""
+        # bits from the lowest, found in the binary string rather than cleared one at a
+        # time, which would copy the whole int for every key
+        bits = bin(bitmap)[:1:-1]
+        keys = []
+        key_id = bits.find('1')
+        while key_id != -1:
+            keys.append(self.keys[key_id])
+            key_id = bits.find('1', key_id + 1)
+        return keys
@@ -0,0 +1,77 @@
+from threading import Lock, Thread
+from typing import Callable, Optional, Tuple
+import logging
+import os
+import time
+
+
+class FileWatcher:
+    """
+    Calls a function whenever a file changes, from a background thread that
+    checks the modification time and size of the file every `interval` seconds.
+
+    The thread is started by the first request of every worker, since threads
+    started before the worker is forked do not survive the fork. Errors raised
+    by the function are logged and the change is retried on the next check.
+    """
+
+    def __init__(self, on_change: Callable[[], object], path: str = '', interval: float = 0) -> None:
+        self.on_change: Callable[[], object] = on_change
+        self.path: str = path
+        # seconds between checks; 0 disables watching
+        self.interval: float = interval
+
+        self._stat: Optional[Tuple[int, int]] = None
+        self._thread: Optional[Thread] = None
+        # process the watch thread was started in; threads do not survive a fork
+        self._thread_pid: Optional[int] = None
+        self._thread_lock: Lock = Lock()
+        self._logger: logging.Logger = logging.getLogger(__name__)
+
+    def init_app(self, app, path: str) -> None:
+        self.path = path
+        self.interval = app.config['DATA_RELOAD_INTERVAL']
+        self._logger = app.logger
+        # changes are detected from here on; a change before the data is first loaded is a no-op reload
+        self._stat = self._read_stat()
+        if self.interval:
+            app.before_request(self._ensure_watch_thread)
+
+    def check(self) -> bool:
+        """Call the function if the file changed since the last check. Returns whether it was called."""
+        stat = self._read_stat()
+        if stat is None or stat == self._stat:
+            return False
+
+        try:
+            self.on_change()
+        except Exception as e:
+            self._logger.warning(f"Error handling change of {self.path}: {e!r}")
+            return False
+
+        self._stat = stat
+        return True
+
+    def _read_stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            # e.g. while the file is being replaced
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _ensure_watch_thread(self) -> None:
+        if self._thread_pid == os.getpid():
+            return
+
+        with self._thread_lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread = Thread(target=self._run_watch_thread, name='file-watcher', daemon=True)
+            self._thread.start()
+            self._thread_pid = os.getpid()
+
+    def _run_watch_thread(self) -> None:
+        while True:
+            self.check()
+            time.sleep(self.interval)
@@ -0,0 +1,117 @@
+from array import array
+from collections import Counter
+from itertools import chain
+from rapidfuzz import fuzz, process
+from typing import TypeVar, Generic, Dict, List, Iterable, Tuple
+
+
+_DataType = TypeVar('_DataType')
+
+
+def _trigrams(word: str) -> List[str]:
+    """
+    Returns the distinct trigrams of a word, padded so that the start and
+    end of the word form trigrams of their own.
+    """
+    padded = f'  {word} '
+    return list({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+class FuzzyIndex(Generic[_DataType]):
+    """
+    Typo-tolerant index over a collection of words.
+
+    Candidates are the words sharing the most trigrams with the query, found
+    through an inverted index of trigram -> word indices. Only those
+    candidates are scored with RapidFuzz, so the cost of a query depends on
+    `candidate_limit` and on the posting lists it touches rather than on the
+    number of indexed words.
+    """
+
+    def __init__(self, candidate_limit: int = 50, max_posting_ratio: float = 0.05) -> None:
+        self.data_store: List[_DataType] = []
+        self._data_store_indices: Dict[_DataType, int] = {}
+        self._data_popularity: List[int] = []
+
+        self._words: List[str] = []
+        self._word_data: array = array('i')
+        self._postings: Dict[str, array] = {}
+
+        # number of candidates handed to RapidFuzz
+        self.candidate_limit: int = candidate_limit
+        # trigrams found in more than this share of words (and in more than
+        # `candidate_limit` words) are too common to narrow the search down
+        # and are skipped when rarer ones exist
+        self.max_posting_ratio: float = max_posting_ratio
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple], **kwargs) -> 'FuzzyIndex[_DataType]':
+        """
+        Build an index from (word, data) or (word, data, popularity) tuples.
+        """
+        fuzzy_index: FuzzyIndex[_DataType] = cls(**kwargs)
+        for item in items:
+            fuzzy_index.insert(*item)
+
+        return fuzzy_index
+
+    def insert(self, word: str, data: _DataType, popularity: int = 0) -> None:
+        data_store_index = self._data_store_indices.get(data)
+        if data_store_index is None:
+            data_store_index = len(self.data_store)
+            self._data_store_indices[data] = data_store_index
+            self.data_store.append(data)
+            self._data_popularity.append(popularity)
+        elif popularity > self._data_popularity[data_store_index]:
+            self._data_popularity[data_store_index] = popularity
+
+        word = word.lower()
+        word_index = len(self._words)
+        self._words.append(word)
+        self._word_data.append(data_store_index)
+        for trigram in _trigrams(word):
+            self._postings.setdefault(trigram, array('i')).append(word_index)
+
+    def search(self, query: str, k: int, score_cutoff: float = 75) -> List[_DataType]:
+        """
+        Returns at most `k` distinct data entries whose words are similar to
+        `query`, best first. Ties are broken by popularity.
+        """
+        query = query.lower()
+        if not query or k <= 0:
+            return []
+
+        postings = [self._postings[trigram] for trigram in _trigrams(query) if trigram in self._postings]
+        if not postings:
+            return []
+
+        # skip very common trigrams, unless nothing else matches
+        max_posting_length = max(self.candidate_limit, int(len(self._words) * self.max_posting_ratio))
+        selective_postings = [posting for posting in postings if len(posting) <= max_posting_length]
+        if selective_postings:
+            postings = selective_postings
+        else:
+            postings = [min(postings, key=len)]
+
+        shared_trigram_counts = Counter(chain.from_iterable(postings))
+        candidates = shared_trigram_counts.most_common(self.candidate_limit)
+        matches = process.extract(
+            query,
+            {word_index: self._words[word_index] for word_index, _ in candidates},
+            scorer=fuzz.ratio,
+            limit=None,
+            score_cutoff=score_cutoff
+        )
+
+        # best score per data entry, then order by score and popularity
+        best_scores: Dict[int, float] = {}
+        for _, score, word_index in matches:
+            data_store_index = self._word_data[word_index]
+            if score > best_scores.get(data_store_index, -1):
+                best_scores[data_store_index] = score
+
+        ranked = sorted(
+            best_scores,
+            key=lambda index: (-best_scores[index], -self._data_popularity[index], index)
+        )
+        return [self.data_store[data_store_index] for data_store_index in ranked[:k]]
@@ -0,0 +1,158 @@
+from itertools import combinations
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+
+# interaction severities from least to most severe; the severity of an
+# interaction is stored as its position in this list plus one, 0 is none
+INTERACTION_SEVERITIES: List[str] = ['caution', 'unsafe', 'dangerous']
+
+
+class InteractionMatrix:
+    """
+    Symmetric matrix of the interaction severity between every pair of keys, stored sparsely.
+
+    Sources list interactions with whole classes of substances ("opioids"), so the
+    matrix is mostly filled by a few large groups of keys. Rather than a cell per
+    pair, a group is stored once as a set of key ids, and every key keeps the groups
+    it interacts with and the groups it is a member of. Memory grows with the sizes
+    of the groups and the interactions listed, not with the square of the number of
+    keys, and the severity of a pair is found in the few groups of either key.
+    """
+
+    def __init__(self, keys: Iterable[str]) -> None:
+        self.keys: List[str] = list(keys)
+        self._ids: Dict[str, int] = {key: key_id for key_id, key in enumerate(self.keys)}
+        # key ids of every group, by group id
+        self._groups: List[FrozenSet[int]] = []
+        # most severe interaction of each key with each group, by key id, then group id
+        self._group_severities: List[Dict[int, int]] = [{} for _ in self.keys]
+        # ids of the groups each key is a member of, by key id
+        self._member_groups: List[List[int]] = [[] for _ in self.keys]
+        # most severe interaction with each group of the keys interacting with it, by group id, then key id
+        self._group_keys: List[Dict[int, int]] = []
+        # most severe interaction listed with each term that matched no key, by key id, then term
+        self._unresolved: Dict[int, Dict[str, int]] = {}
+        # id of the group holding only that key, for keys added one pair at a time, by key id
+        self._key_groups: Dict[int, int] = {}
+
+    def add_group(self, keys: Iterable[str]) -> int:
+        """Store a group of keys, returning its id. Add the interactions of many keys with one group through its id."""
+        group_id = len(self._groups)
+        group = frozenset(self._ids[key] for key in keys)
+        self._groups.append(group)
+        self._group_keys.append({})
+        for key_id in group:
+            self._member_groups[key_id].append(group_id)
+        return group_id
+
+    def add_group_interaction(self, key: str, group_id: int, severity: str) -> None:
+        """
+        Record an interaction of a key with every key of a group, in both directions.
+        Keeps the most severe interaction if the key already interacts with the group.
+        """
+        key_id = self._ids[key]
+        severity_value = INTERACTION_SEVERITIES.index(severity) + 1
+        group_severities, group_keys = self._group_severities[key_id], self._group_keys[group_id]
+        if group_severities.get(group_id, 0) < severity_value:
+            group_severities[group_id] = group_keys[key_id] = severity_value
+
+    def add(self, key: str, other_key: str, severity: str) -> None:
+        """
+        Record an interaction between two keys in both directions.
+        Keeps the most severe interaction if the pair already has one.
+        Every pair with `other_key` shares one group holding only that key.
+        """
+        other_key_id = self._ids[other_key]
+        group_id = self._key_groups.get(other_key_id)
+        if group_id is None:
+            group_id = self._key_groups[other_key_id] = self.add_group([other_key])
+        self.add_group_interaction(key, group_id, severity)
+
+    def add_unresolved(self, key: str, term: str, severity: str) -> None:
+        """
+        Record an interaction of a key with a term that matched no key, so it is reported
+        as unknown rather than looking like the absence of an interaction.
+        """
+        severity_value = INTERACTION_SEVERITIES.index(severity) + 1
+        terms = self._unresolved.setdefault(self._ids[key], {})
+        if terms.get(term, 0) < severity_value:
+            terms[term] = severity_value
+
+    def unresolved(self, key: str) -> List[Tuple[str, str]]:
+        """Returns (term, severity) for every interaction of `key` with a term that matched no key, most severe first."""
+        terms = self._unresolved.get(self._ids[key], {})
+        return [
+            (term, INTERACTION_SEVERITIES[severity_value - 1])
+            for term, severity_value in sorted(terms.items(), key=lambda term_severity: (-term_severity[1], term_severity[0]))
+        ]
+
+    def unresolved_terms(self) -> List[str]:
+        """Returns every term that matched no key, sorted."""
+        return sorted({term for terms in self._unresolved.values() for term in terms})
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._ids
+
+    def _severity_value(self, key_id: int, other_key_id: int) -> int:
+        if key_id == other_key_id:
+            return 0
+
+        severity_value = 0
+        for group_id, group_severity_value in self._group_severities[key_id].items():
+            if group_severity_value > severity_value and other_key_id in self._groups[group_id]:
+                severity_value = group_severity_value
+        for group_id, group_severity_value in self._group_severities[other_key_id].items():
+            if group_severity_value > severity_value and key_id in self._groups[group_id]:
+                severity_value = group_severity_value
+        return severity_value
+
+    def _severity_values_with(self, key_id: int) -> Dict[int, int]:
+        """The severity of every interaction of a key, by the id of the other key."""
+        severity_values: Dict[int, int] = {}
+        for group_id, severity_value in self._group_severities[key_id].items():
+            for other_key_id in self._groups[group_id]:
+                if severity_values.get(other_key_id, 0) < severity_value:
+                    severity_values[other_key_id] = severity_value
+        for group_id in self._member_groups[key_id]:
+            for other_key_id, severity_value in self._group_keys[group_id].items():
+                if severity_values.get(other_key_id, 0) < severity_value:
+                    severity_values[other_key_id] = severity_value
+        severity_values.pop(key_id, None)
+        return severity_values
+
+    def severity(self, key: str, other_key: str) -> Optional[str]:
+        """Returns the severity of the interaction between two keys, or None."""
+        severity_value = self._severity_value(self._ids[key], self._ids[other_key])
+        return INTERACTION_SEVERITIES[severity_value - 1] if severity_value else None
+
+    def check(self, keys: List[str]) -> List[Tuple[str, str, str]]:
+        """
+        Returns (key, other key, severity) for every interacting pair of `keys`,
+        most severe first.
+        """
+        interactions = []
+        for key, other_key in combinations(keys, 2):
+            severity_value = self._severity_value(self._ids[key], self._ids[other_key])
+            if severity_value:
+                interactions.append((severity_value, key, other_key))
+
+        interactions.sort(key=lambda interaction: -interaction[0])
+        return [(key, other_key, INTERACTION_SEVERITIES[severity_value - 1])
+                for severity_value, key, other_key in interactions]
+
+    def severities(self, key: str) -> List[str]:
+        """
+        Returns the severity of every interaction of `key`, least severe first. Like
+        `interactions_with`, a pair listed with several severities counts as the most severe.
+        """
+        severity_values = set(self._severity_values_with(self._ids[key]).values())
+        return [severity for severity_value, severity in enumerate(INTERACTION_SEVERITIES, 1) if severity_value in severity_values]
+
+    def interactions_with(self, key: str, severity: str) -> List[str]:
+        """Returns every key whose interaction with `key` has exactly `severity`."""
+        severity_value = INTERACTION_SEVERITIES.index(severity) + 1
+        severity_values = self._severity_values_with(self._ids[key])
+        return [
+            self.keys[other_key_id] for other_key_id in sorted(severity_values)
+            if severity_values[other_key_id] == severity_value
+        ]
@@ -0,0 +1,173 @@
+from src.utils.metrics import Metrics
+from threading import Event, Lock, Thread
+from typing import Any, Dict, List, Optional
+import csv
+import logging
+import os
+import time
+import requests
+
+
+def _rank_to_display_string(rank: int) -> str:
+    """Convert a numerical rank to a display string with emoji."""
+    emoji = ''
+    if rank == 1:
+        emoji = '🥇 '
+    elif rank == 2:
+        emoji = '🥈 '
+    elif rank == 3:
+        emoji = '🥉 '
+    return f'{emoji}{rank}'
+
+
+def _rank_contributors(contributors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Sort contributors by contributions and label them with their rank."""
+    contributors = sorted(contributors, key=lambda contributor: contributor['contributions'], reverse=True)
+    return [
+        {**contributor, 'rank': _rank_to_display_string(index + 1)}
+        for index, contributor in enumerate(contributors)
+    ]
+
+
+class LeaderboardProvider:
+    """
+    Contributors shown on the leaderboard, refreshed from the GitHub API in a background thread.
+
+    Requests never wait for GitHub: they get the last good list of contributors,
+    seeded from a CSV file until the first fetch succeeds. A request that finds the
+    list out of date wakes the refresh thread, and concurrent requests share that
+    single fetch. Failed fetches keep the previous list and are retried later.
+    """
+
+    def __init__(
+        self,
+        url: str = '',
+        seed_path: str = '',
+        auth_token: Optional[str] = None,
+        refresh_interval: float = 60 * 60,
+        retry_interval: float = 60,
+        timeout: float = 5,
+        metrics: Optional[Metrics] = None
+    ) -> None:
+        self.url: str = url
+        self.seed_path: str = seed_path
+        self.auth_token: Optional[str] = auth_token
+        # seconds between refreshes, and before retrying a failed one
+        self.refresh_interval: float = refresh_interval
+        self.retry_interval: float = retry_interval
+        # seconds to wait for GitHub to connect and to respond
+        self.timeout: float = timeout
+        # times every fetch from GitHub
+        self.metrics: Metrics = metrics or Metrics()
+
+        self._contributors: List[Dict[str, Any]] = []
+        # monotonic time the next refresh is due
+        self._next_refresh_time: float = 0.0
+        self._refresh_requested: Event = Event()
+        self._thread: Optional[Thread] = None
+        # process the refresh thread was started in; threads do not survive a fork
+        self._thread_pid: Optional[int] = None
+        self._thread_lock: Lock = Lock()
+        self._session: Optional[requests.Session] = None
+        self._logger: logging.Logger = logging.getLogger(__name__)
+
+        if seed_path:
+            self._contributors = self._read_seed()
+
+    def init_app(self, app) -> None:
+        self.url = app.config['LEADERBOARD_URL']
+        self.seed_path = app.config['LEADERBOARD_SEED_PATH']
+        self.auth_token = app.config['GITHUB_AUTH_TOKEN']
+        self.refresh_interval = app.config['LEADERBOARD_REFRESH_INTERVAL']
+        self.retry_interval = app.config['LEADERBOARD_RETRY_INTERVAL']
+        self.timeout = app.config['LEADERBOARD_REQUEST_TIMEOUT']
+        self._logger = app.logger
+        if not self._contributors:
+            self._contributors = self._read_seed()
+
+    def get_contributors(self) -> List[Dict[str, Any]]:
+        """
+        Returns the last good list of contributors, ranked by contributions.
+        Wakes the refresh thread if the list is due for a refresh, without waiting for it.
+        """
+        self._ensure_refresh_thread()
+        if time.monotonic() >= self._next_refresh_time:
+            self._refresh_requested.set()
+        return self._contributors
+
+    def request_refresh(self) -> None:
+        """Refresh the list of contributors as soon as possible, without waiting for it."""
+        self._next_refresh_time = 0.0
+        self._ensure_refresh_thread()
+        self._refresh_requested.set()
+
+    def refresh(self) -> bool:
+        """
+        Fetch the contributors from GitHub, replacing the list if the fetch succeeds.
+        Returns whether it succeeded.
+        """
+        try:
+            with self.metrics.timer('leaderboard_fetch'):
+                contributors = self._fetch()
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            self._logger.warning(f"Error fetching leaderboard data: {e!r}")
+            self._next_refresh_time = time.monotonic() + self.retry_interval
+            return False
+
+        self._contributors = contributors
+        self._next_refresh_time = time.monotonic() + self.refresh_interval
+        return True
+
+    def _fetch(self) -> List[Dict[str, Any]]:
+        if self._session is None:
+            self._session = requests.Session()
+            self._session.headers.update({
+                'Accept': 'application/vnd.github+json',
+                'X-Github-Api-Version': '2022-11-28'
+            })
+            if self.auth_token:
+                self._session.headers['Authorization'] = f'Bearer {self.auth_token}'
+
+        self._logger.info("Fetching leaderboard data")
+        response = self._session.get(self.url, params={'per_page': 100}, timeout=self.timeout)
+        response.raise_for_status()
+        contributors = response.json()
+        if not isinstance(contributors, list):
+            raise ValueError(f"Unexpected contributors format: {type(contributors)}")
+
+        return _rank_contributors([
+            {'login': contributor['login'], 'contributions': contributor['contributions']}
+            for contributor in contributors
+            # Filter out GitHub Actions bot
+            if contributor.get('login') != 'github-actions[bot]'
+        ])
+
+    def _read_seed(self) -> List[Dict[str, Any]]:
+        """Read the contributors from the seed CSV file, served until the first fetch succeeds."""
+        try:
+            with open(self.seed_path, newline='', encoding='utf-8') as f:
+                return _rank_contributors([
+                    {'login': row['Contributor'], 'contributions': int(row['Contributions'])}
+                    for row in csv.DictReader(f)
+                ])
+        except (OSError, KeyError, ValueError) as e:
+            self._logger.warning(f"Error reading leaderboard seed data: {e}")
+            return []
+
+    def _ensure_refresh_thread(self) -> None:
+        if self._thread_pid == os.getpid():
+            return
+
+        with self._thread_lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread = Thread(target=self._run_refresh_thread, name='leaderboard-refresh', daemon=True)
+            self._thread.start()
+            self._thread_pid = os.getpid()
+
+    def _run_refresh_thread(self) -> None:
+        while True:
+            self._refresh_requested.wait(max(self._next_refresh_time - time.monotonic(), 0))
+            self.refresh()
+            # requests made during the fetch are answered by it
+            self._refresh_requested.clear()
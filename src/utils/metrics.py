@@ -0,0 +1,198 @@
+from bisect import bisect_left
+from flask import Flask, Response, g, request
+from flask.signals import before_render_template, template_rendered
+from threading import Lock
+from typing import Dict, List, Tuple
+import time
+
+
+# upper bounds in seconds of the histogram buckets, from fast index lookups to slow pages
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# every metric family, with its help text
+_METRIC_HELP: Dict[str, str] = {
+    'substancesearch_request_duration_seconds': 'Time spent handling requests.',
+    'substancesearch_operation_duration_seconds': 'Time spent in named operations within requests and background jobs.',
+}
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Counts of observed values per bucket, with their sum, as exposed by Prometheus histograms."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets: Tuple[float, ...] = buckets
+        # one count per bucket, plus one for values above the last bucket
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.sum: float = 0.0
+        self._lock: Lock = Lock()
+
+    def observe(self, value: float) -> None:
+        bucket_index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[bucket_index] += 1
+            self.sum += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        """Returns the cumulative count of every bucket, ending with +Inf, and the sum."""
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+
+        cumulative_counts = []
+        count = 0
+        for bucket_count in counts:
+            count += bucket_count
+            cumulative_counts.append(count)
+        return cumulative_counts, total
+
+
+class _Timer:
+    __slots__ = ('_histogram', '_started')
+
+    def __init__(self, histogram: Histogram) -> None:
+        self._histogram: Histogram = histogram
+        self._started: float = 0.0
+
+    def __enter__(self) -> '_Timer':
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._histogram.observe(time.perf_counter() - self._started)
+
+
+class _NullTimer:
+    """Timer used while metrics are disabled, so timed code only pays for entering a no-op block."""
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullTimer':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """
+    Latency histograms of requests and of named operations, exposed at `/metrics`
+    in the Prometheus text format.
+
+    Requests are timed by endpoint, method and status, and templates by name.
+    Other operations are timed where they run with `with metrics.timer('name'):`.
+    While disabled no hooks are registered, `/metrics` does not exist and timers
+    do nothing.
+
+    Histograms are kept per worker process, so every worker has to be scraped.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.enabled: bool = False
+        self.buckets: Tuple[float, ...] = buckets
+        self._histograms: Dict[Tuple[str, _Labels], Histogram] = {}
+        self._lock: Lock = Lock()
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Start collecting metrics for an app if `METRICS_ENABLED` is set.
+        Call before other extensions that add `after_request` hooks, so requests are timed including them.
+        """
+        self.enabled = app.config['METRICS_ENABLED']
+        if not self.enabled:
+            return
+
+        app.before_request(self._start_request)
+        app.after_request(self._observe_request)
+        before_render_template.connect(self._start_render, app)
+        template_rendered.connect(self._observe_render, app)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+
+    def timer(self, operation: str, **labels: str):
+        """Context manager timing an operation into its histogram."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self._fetch_histogram('substancesearch_operation_duration_seconds', operation=operation, **labels))
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        self._fetch_histogram(name, **labels).observe(value)
+
+    def render(self) -> str:
+        """Render every histogram in the Prometheus text exposition format."""
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+
+        lines = []
+        for name, help_text in _METRIC_HELP.items():
+            family = [(labels, histogram) for (histogram_name, labels), histogram in histograms if histogram_name == name]
+            if not family:
+                continue
+
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for labels, histogram in family:
+                cumulative_counts, total = histogram.snapshot()
+                bucket_bounds = [_format_value(bound) for bound in histogram.buckets] + ['+Inf']
+                for bound, count in zip(bucket_bounds, cumulative_counts):
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", bound),))} {count}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(total)}')
+                lines.append(f'{name}_count{_format_labels(labels)} {cumulative_counts[-1]}')
+
+        return ''.join(f'{line}\n' for line in lines)
+
+    def metrics_view(self) -> Response:
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+    def _fetch_histogram(self, name: str, **labels: str) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def _start_request(self) -> None:
+        g._metrics_request_started = time.perf_counter()
+
+    def _observe_request(self, response: Response) -> Response:
+        started = g.pop('_metrics_request_started', None)
+        if started is not None:
+            self.observe(
+                'substancesearch_request_duration_seconds',
+                time.perf_counter() - started,
+                endpoint=request.endpoint or 'none',
+                method=request.method,
+                status=str(response.status_code)
+            )
+        return response
+
+    def _start_render(self, app: Flask, template, context, **extra) -> None:
+        g.setdefault('_metrics_render_started', []).append(time.perf_counter())
+
+    def _observe_render(self, app: Flask, template, context, **extra) -> None:
+        render_started = g.get('_metrics_render_started')
+        if render_started:
+            self.observe(
+                'substancesearch_operation_duration_seconds',
+                time.perf_counter() - render_started.pop(),
+                operation='render_template',
+                template=template.name or 'string'
+            )
+
+
+def _format_labels(labels: _Labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label_value(value)}"' for name, value in labels) + '}'
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value))
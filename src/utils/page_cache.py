@@ -0,0 +1,82 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Hashable, Optional
+
+
+class PageCache:
+    """
+    Size-limited LRU cache of rendered pages.
+
+    Every entry belongs to a version of the data it was rendered from.
+    Storing or looking up a page for another version drops all entries, so
+    pages rendered from old data are never served.
+    """
+
+    def __init__(self, max_size: int = 0) -> None:
+        # total size in bytes of the cached pages; 0 disables the cache
+        self.max_size: int = max_size
+        self._version: Optional[str] = None
+        self._pages: OrderedDict = OrderedDict()
+        self._size: int = 0
+        self._lock: Lock = Lock()
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def init_app(self, app) -> None:
+        self.max_size = app.config['PAGE_CACHE_MAX_SIZE']
+
+    def get(self, version: str, key: Hashable) -> Optional[bytes]:
+        if not self.max_size:
+            return None
+
+        with self._lock:
+            self._check_version(version)
+            page = self._pages.get(key)
+            if page is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._pages.move_to_end(key)
+            return page
+
+    def set(self, version: str, key: Hashable, page: bytes) -> None:
+        if len(page) > self.max_size:
+            return
+
+        with self._lock:
+            self._check_version(version)
+            previous_page = self._pages.pop(key, None)
+            if previous_page is not None:
+                self._size -= len(previous_page)
+
+            self._pages[key] = page
+            self._size += len(page)
+            while self._size > self.max_size:
+                _, evicted_page = self._pages.popitem(last=False)
+                self._size -= len(evicted_page)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._pages),
+                'size': self._size,
+                'max_size': self.max_size,
+            }
+
+    def _check_version(self, version: str) -> None:
+        if version != self._version:
+            self._pages.clear()
+            self._size = 0
+            self._version = version
@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+import json
+import mmap
+import os
+import struct
+import weakref
+
+
+# magic, format version, index offset, index length
+_HEADER = struct.Struct('<4sIQQ')
+_MAGIC = b'SSRS'
+_FORMAT_VERSION = 1
+
+
+def write_record_store(path: str, records: Mapping[str, Any], version: str) -> None:
+    """
+    Write records to a record store file: a header, every record encoded as
+    JSON one after the other, and an index of where each record starts.
+    The file is written to a temporary path first and renamed into place,
+    so readers never see a partial file and keep their mapping of the old one.
+    """
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    index = []
+    with open(temporary_path, 'wb') as f:
+        f.write(b'\0' * _HEADER.size)
+        offset = _HEADER.size
+        for key, record in records.items():
+            encoded = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            f.write(encoded)
+            index.append((key, offset, len(encoded)))
+            offset += len(encoded)
+
+        encoded_index = json.dumps({'version': version, 'records': index}).encode('utf-8')
+        f.write(encoded_index)
+        f.seek(0)
+        f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, offset, len(encoded_index)))
+    os.replace(temporary_path, path)
+
+
+class RecordStore(Mapping[str, Any]):
+    """
+    Read-only mapping over a record store file.
+
+    The file is memory-mapped, so processes reading the same file share its
+    pages through the page cache. A record is only decoded when it is looked
+    up, and the most recently used decoded records are kept in a small LRU.
+    Decoded records are shared between callers and must not be modified.
+    The mapping is closed once the store is no longer referenced, so a store
+    replaced by a reload is released when the last request reading it finishes.
+    """
+
+    def __init__(self, path: str, cache_size: int = 64) -> None:
+        with open(path, 'rb') as f:
+            self._mmap: mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # the callback holds the mapping but not the store, so it does not keep the store alive
+        self._close_mmap = weakref.finalize(self, self._mmap.close)
+
+        magic, format_version, index_offset, index_length = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC or format_version != _FORMAT_VERSION:
+            raise ValueError(f'{path} is not a record store in format version {_FORMAT_VERSION}')
+
+        index = json.loads(self._mmap[index_offset:index_offset + index_length])
+        self.version: str = index['version']
+        self._offsets: Dict[str, Tuple[int, int]] = {
+            key: (offset, length) for key, offset, length in index['records']
+        }
+
+        self._cache_size: int = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_lock: Lock = Lock()
+
+    @classmethod
+    def open_if_current(cls, path: str, version: str, cache_size: int = 64) -> Optional['RecordStore']:
+        """
+        Open a record store file if it exists and was written for `version`.
+        Returns None otherwise.
+        """
+        try:
+            record_store = cls(path, cache_size)
+        except (OSError, ValueError, struct.error):
+            return None
+
+        if record_store.version != version:
+            record_store.close()
+            return None
+        return record_store
+
+    def get_encoded(self, key: str) -> Optional[bytes]:
+        """Returns the encoded JSON of a record without decoding it."""
+        location = self._offsets.get(key)
+        if location is None:
+            return None
+
+        offset, length = location
+        return self._mmap[offset:offset + length]
+
+    def close(self) -> None:
+        self._close_mmap()
+
+    def __getitem__(self, key: str) -> Any:
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        encoded = self.get_encoded(key)
+        if encoded is None:
+            raise KeyError(key)
+        record = json.loads(encoded)
+
+        with self._cache_lock:
+            self._cache[key] = record
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+        return record
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._offsets
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
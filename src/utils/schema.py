@@ -0,0 +1,203 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+# appends the violations of a value at a path to a list
+Validator = Callable[[Any, str, List[str]], None]
+
+
+class Number:
+    """Schema of an int or float, but not a bool."""
+
+
+class Nullable:
+    """Schema of None or a value matching `schema`."""
+
+    def __init__(self, schema: 'Schema') -> None:
+        self.schema = schema
+
+
+class ListOf:
+    """Schema of a list of values all matching `schema`."""
+
+    def __init__(self, schema: 'Schema') -> None:
+        self.schema = schema
+
+
+class DictOf:
+    """Schema of a dict with string keys and values all matching `schema`."""
+
+    def __init__(self, schema: 'Schema') -> None:
+        self.schema = schema
+
+
+# a type (`object` for any value), one of the classes above, or a dict of the schema
+# of every required key; keys that are not in the schema are allowed
+Schema = Union[type, Nullable, ListOf, DictOf, Dict[str, Any]]
+
+
+def _describe(schema: Schema) -> str:
+    if schema is Number:
+        return 'number'
+    if isinstance(schema, type):
+        return schema.__name__
+    if isinstance(schema, Nullable):
+        return f'null or {_describe(schema.schema)}'
+    if isinstance(schema, ListOf):
+        return 'list'
+    return 'dict'
+
+
+def _is_number(value: Any) -> bool:
+    return value.__class__ is int or value.__class__ is float
+
+
+def _generate_check(schema: Schema, variable: str, lines: List[str], indent: str, constants: Dict[str, Any]) -> None:
+    """
+    Append the lines of code returning False unless `variable` matches `schema`.
+    Blocks start with `pass`, so they are valid even if nothing is checked in them.
+    """
+    if schema is object:
+        return
+    if schema is Number:
+        lines.append(f'{indent}if {variable}.__class__ is not int and {variable}.__class__ is not float: return False')
+        return
+    if isinstance(schema, type):
+        constant = f'_type{len(constants)}'
+        constants[constant] = schema
+        lines.append(f'{indent}if not isinstance({variable}, {constant}): return False')
+        return
+    if isinstance(schema, Nullable):
+        lines.append(f'{indent}if {variable} is not None:')
+        lines.append(f'{indent}    pass')
+        _generate_check(schema.schema, variable, lines, indent + '    ', constants)
+        return
+
+    child = f'v{len(lines)}'
+    if isinstance(schema, ListOf):
+        lines.append(f'{indent}if not isinstance({variable}, list): return False')
+        lines.append(f'{indent}for {child} in {variable}:')
+        lines.append(f'{indent}    pass')
+        _generate_check(schema.schema, child, lines, indent + '    ', constants)
+    elif isinstance(schema, DictOf):
+        lines.append(f'{indent}if not isinstance({variable}, dict): return False')
+        lines.append(f'{indent}for k{child}, {child} in {variable}.items():')
+        lines.append(f'{indent}    if not isinstance(k{child}, str): return False')
+        _generate_check(schema.schema, child, lines, indent + '    ', constants)
+    elif isinstance(schema, dict):
+        lines.append(f'{indent}if not isinstance({variable}, dict): return False')
+        for key, key_schema in schema.items():
+            key_variable = f'v{len(lines)}'
+            lines.append(f'{indent}{key_variable} = {variable}.get({key!r}, _missing)')
+            lines.append(f'{indent}if {key_variable} is _missing: return False')
+            _generate_check(key_schema, key_variable, lines, indent, constants)
+    else:
+        raise TypeError(f'Unsupported schema: {schema!r}')
+
+
+def _compile_check(schema: Schema) -> Callable[[Any], bool]:
+    """
+    Generate and compile the code of a function checking whether a value matches a schema,
+    with every check inlined, as a fast path for the common case of valid data.
+    """
+    lines = ['def check(value):']
+    constants: Dict[str, Any] = {'_missing': object()}
+    _generate_check(schema, 'value', lines, '    ', constants)
+    lines.append('    return True')
+    namespace: Dict[str, Any] = dict(constants)
+    exec(compile('\n'.join(lines), '<schema>', 'exec'), namespace)
+    return namespace['check']
+
+
+def compile_schema(schema: Schema) -> Validator:
+    """
+    Compile a schema into a validator, so the schema is only interpreted once
+    rather than for every value validated.
+
+    A validator is called with a value, its path and a list, and appends a
+    message to the list for every violation found, rather than stopping at
+    the first one. Values are first checked by generated code with every check
+    inlined, and only walked again to find the violations if that fails.
+    """
+    check = _compile_check(schema)
+    validate = _compile_validator(schema)
+
+    def validate_checked(value: Any, path: str, violations: List[str]) -> None:
+        if not check(value):
+            validate(value, path, violations)
+    return validate_checked
+
+
+def _compile_validator(schema: Schema, expected: Optional[str] = None) -> Validator:
+    """Compile a schema into a validator reporting every violation, described as `expected`."""
+    expected = expected or _describe(schema)
+
+    def violation(value: Any, path: str) -> str:
+        return f'{path}: expected {expected}, got {type(value).__name__}'
+
+    if schema is object:
+        def validate_any(value: Any, path: str, violations: List[str]) -> None:
+            pass
+        return validate_any
+
+    if schema is Number:
+        def validate_number(value: Any, path: str, violations: List[str]) -> None:
+            if not _is_number(value):
+                violations.append(violation(value, path))
+        return validate_number
+
+    if isinstance(schema, type):
+        value_type = schema
+
+        def validate_type(value: Any, path: str, violations: List[str]) -> None:
+            if not isinstance(value, value_type):
+                violations.append(violation(value, path))
+        return validate_type
+
+    if isinstance(schema, Nullable):
+        validate_value = _compile_validator(schema.schema, expected)
+
+        def validate_nullable(value: Any, path: str, violations: List[str]) -> None:
+            if value is not None:
+                validate_value(value, path, violations)
+        return validate_nullable
+
+    if isinstance(schema, ListOf):
+        validate_item = _compile_validator(schema.schema)
+
+        def validate_list(value: Any, path: str, violations: List[str]) -> None:
+            if not isinstance(value, list):
+                violations.append(violation(value, path))
+            else:
+                for item_index, item in enumerate(value):
+                    validate_item(item, f'{path}[{item_index}]', violations)
+        return validate_list
+
+    if isinstance(schema, DictOf):
+        validate_dict_value = _compile_validator(schema.schema)
+
+        def validate_dict_of(value: Any, path: str, violations: List[str]) -> None:
+            if not isinstance(value, dict):
+                violations.append(violation(value, path))
+                return
+            for key, key_value in value.items():
+                if not isinstance(key, str):
+                    violations.append(f'{path}: expected str keys, got {type(key).__name__}')
+                validate_dict_value(key_value, f'{path}.{key}', violations)
+        return validate_dict_of
+
+    if isinstance(schema, dict):
+        key_validators: Tuple[Tuple[str, Validator], ...] = tuple(
+            (key, _compile_validator(key_schema)) for key, key_schema in schema.items()
+        )
+
+        def validate_record(value: Any, path: str, violations: List[str]) -> None:
+            if not isinstance(value, dict):
+                violations.append(violation(value, path))
+                return
+            for key, validate_key in key_validators:
+                if key in value:
+                    validate_key(value[key], f'{path}.{key}', violations)
+                else:
+                    violations.append(f'{path}.{key}: missing')
+        return validate_record
+
+    raise TypeError(f'Unsupported schema: {schema!r}')
@@ -0,0 +1,229 @@
+from array import array
+from heapq import heappush, heappop
+from typing import TypeVar, Generic, Dict, List, Iterable, Tuple, Set
+
+
+_DataType = TypeVar('_DataType')
+
+# separates words in the concatenated text. it sorts before every other
+# character, so a suffix that is a prefix of another sorts first
+_WORD_SEPARATOR = '\x00'
+
+
+class SuffixArray(Generic[_DataType]):
+    """
+    Substring index over a collection of words.
+
+    Every word is lower-cased and appended to a single text. The suffix
+    array stores the offset of every suffix of every word in sorted order,
+    so all suffixes starting with a given substring form one contiguous
+    range that is found with two binary searches.
+
+    Words may be inserted one at a time with `insert`; the array is
+    (re)built in a single bulk pass on the next search.
+
+    For ranked queries every suffix is also given a rank (prefix matches,
+    then shorter words, then more popular data) and a min-segment tree over
+    those ranks lets `search_top_k` pull the k best matches out of a range
+    without visiting the rest of it.
+    """
+
+    def __init__(self) -> None:
+        self.data_store: List[_DataType] = []
+        self._data_store_indices: Dict[_DataType, int] = {}
+        # popularity of every data store entry, higher ranks first
+        self._data_popularity: List[int] = []
+
+        # words waiting to be indexed as (word, data_store_index)
+        self._pending: List[Tuple[str, int]] = []
+
+        self._text: str = ''
+        # data store index of every word, in insertion order
+        self._word_data: array = array('i')
+        # start offset of every suffix in `_text`, sorted by suffix
+        self._suffix_offsets: array = array('i')
+        # index of the word each entry of `_suffix_offsets` belongs to
+        self._suffix_words: array = array('i')
+        # min-segment tree over the rank of every entry of `_suffix_offsets`;
+        # leaves start at `_rank_tree_size`
+        self._rank_tree: array = array('i')
+        self._rank_tree_size: int = 0
+        # position in `_suffix_offsets` of every rank
+        self._rank_positions: array = array('i')
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple]) -> 'SuffixArray[_DataType]':
+        """
+        Build an index in one pass from (word, data) or
+        (word, data, popularity) tuples.
+        """
+        suffix_array: SuffixArray[_DataType] = cls()
+        for item in items:
+            suffix_array.insert(*item)
+        suffix_array._build()
+
+        return suffix_array
+
+    def insert(self, word: str, data: _DataType, popularity: int = 0) -> None:
+        data_store_index = self._data_store_indices.get(data)
+        if data_store_index is None:
+            data_store_index = len(self.data_store)
+            self._data_store_indices[data] = data_store_index
+            self.data_store.append(data)
+            self._data_popularity.append(popularity)
+        elif popularity > self._data_popularity[data_store_index]:
+            self._data_popularity[data_store_index] = popularity
+
+        self._pending.append((word.lower().replace(_WORD_SEPARATOR, ''), data_store_index))
+
+    def search_substring(self, substring: str) -> List[_DataType]:
+        start, end = self._find_range(substring.lower())
+        suffix_words = self._suffix_words
+        word_data = self._word_data
+
+        data_store_indices = {word_data[suffix_words[i]] for i in range(start, end)}
+        return [self.data_store[data_store_index]
+                for data_store_index in sorted(data_store_indices)]
+
+    def search_top_k(self, substring: str, k: int) -> List[_DataType]:
+        """
+        Returns at most `k` distinct data entries matching `substring`, best
+        first: exact matches, then prefix matches, then shorter words, then
+        more popular data. Only the part of the range needed to produce `k`
+        distinct results is visited.
+        """
+        start, end = self._find_range(substring.lower())
+        tree = self._rank_tree
+        tree_size = self._rank_tree_size
+        rank_positions = self._rank_positions
+        suffix_words = self._suffix_words
+        word_data = self._word_data
+
+        # seed the heap with the canonical tree nodes covering [start, end)
+        heap: List[Tuple[int, int]] = []
+        low, high = start + tree_size, end + tree_size
+        while low < high:
+            if low & 1:
+                heappush(heap, (tree[low], low))
+                low += 1
+            if high & 1:
+                high -= 1
+                heappush(heap, (tree[high], high))
+            low >>= 1
+            high >>= 1
+
+        results: List[_DataType] = []
+        seen: Set[int] = set()
+        while heap and len(results) < k:
+            rank, node = heappop(heap)
+            # walk down to the leaf holding `rank`, leaving the siblings for later
+            while node < tree_size:
+                node *= 2
+                if tree[node] != rank:
+                    heappush(heap, (tree[node], node))
+                    node += 1
+                else:
+                    heappush(heap, (tree[node + 1], node + 1))
+
+            data_store_index = word_data[suffix_words[rank_positions[rank]]]
+            if data_store_index not in seen:
+                seen.add(data_store_index)
+                results.append(self.data_store[data_store_index])
+
+        return results
+
+    def _find_range(self, substring: str) -> Tuple[int, int]:
+        """
+        Returns the [start, end) range of `_suffix_offsets` whose suffixes
+        start with `substring`.
+        """
+        if self._pending:
+            self._build()
+
+        text = self._text
+        offsets = self._suffix_offsets
+        length = len(substring)
+
+        # lower bound: first suffix whose prefix is >= substring
+        low, high = 0, len(offsets)
+        while low < high:
+            middle = (low + high) // 2
+            offset = offsets[middle]
+            if text[offset:offset + length] < substring:
+                low = middle + 1
+            else:
+                high = middle
+        start = low
+
+        # upper bound: first suffix whose prefix is > substring
+        high = len(offsets)
+        while low < high:
+            middle = (low + high) // 2
+            offset = offsets[middle]
+            if text[offset:offset + length] <= substring:
+                low = middle + 1
+            else:
+                high = middle
+
+        return start, low
+
+    def _build(self) -> None:
+        """
+        Append pending words to the text and rebuild the suffix array.
+        """
+        text_parts = [self._text]
+        for word, data_store_index in self._pending:
+            self._word_data.append(data_store_index)
+            text_parts.append(word)
+            text_parts.append(_WORD_SEPARATOR)
+        self._pending = []
+        self._text = ''.join(text_parts)
+
+        # collect (suffix, offset, word index) for every suffix of every word.
+        # suffixes are sliced per word so the sort never copies the whole text
+        suffixes: List[Tuple[str, int, int, int]] = []
+        offset = 0
+        for word_index, word in enumerate(self._text.split(_WORD_SEPARATOR)[:-1]):
+            for suffix_index in range(len(word) + 1):
+                suffixes.append((word[suffix_index:], offset + suffix_index, word_index, suffix_index))
+            offset += len(word) + 1
+        suffixes.sort()
+
+        self._suffix_offsets = array('i', (suffix[1] for suffix in suffixes))
+        self._suffix_words = array('i', (suffix[2] for suffix in suffixes))
+        self._build_rank_tree(suffixes)
+
+    def _build_rank_tree(self, suffixes: List[Tuple[str, int, int, int]]) -> None:
+        """
+        Rank every suffix for `search_top_k` and build the min-segment tree
+        over those ranks.
+        """
+        word_data = self._word_data
+        data_popularity = self._data_popularity
+
+        def rank_key(position: int) -> Tuple[bool, int, int, int, int]:
+            suffix, _, word_index, suffix_index = suffixes[position]
+            data_store_index = word_data[word_index]
+            return (
+                suffix_index > 0,
+                suffix_index + len(suffix),
+                -data_popularity[data_store_index],
+                data_store_index,
+                position
+            )
+
+        self._rank_positions = array('i', sorted(range(len(suffixes)), key=rank_key))
+
+        tree_size = 1
+        while tree_size < len(suffixes):
+            tree_size *= 2
+
+        # empty leaves hold a rank larger than any real one
+        tree = array('i', [len(suffixes)]) * (2 * tree_size)
+        for rank, position in enumerate(self._rank_positions):
+            tree[tree_size + position] = rank
+        for node in range(tree_size - 1, 0, -1):
+            tree[node] = min(tree[2 * node], tree[2 * node + 1])
+
+        self._rank_tree = tree
+        self._rank_tree_size = tree_size
@@ -1,59 +1,66 @@
-from typing import TypeVar, Generic, Dict, List
+from typing import TypeVar, Generic, Dict, List, Iterable, Optional, Tuple
 
 
 _DataType = TypeVar('_DataType')
 
 
-class _SuffixTrieNodeMetadatum:
-    """
-    Metadata for what data a suffix trie node points to
-    and which search suffix it points to
-    """
-
-    def __init__(self, data_store_index: int = -1, suffix_index: int = -1) -> None:
-        assert data_store_index >= 0
-        assert suffix_index >= 0
-
-        self.data_store_index: int = data_store_index
-        self.suffix_index: int = suffix_index
-
-
 class _SuffixTrieNode:
+    __slots__ = ('children', 'is_end', 'metadata')
+
     def __init__(self) -> None:
         self.children: Dict[str, _SuffixTrieNode] = {}
         self.is_end: bool = False
-        self.metadata: List[_SuffixTrieNodeMetadatum] = []
+        # what data this node points to and which search suffix it points to,
+        # as data_store_index -> suffix_index. keyed by data store index so
+        # each (node, data) pair is stored once. created on the first insert
+        # that ends at this node
+        self.metadata: Optional[Dict[int, int]] = None
 
 
 class SuffixTrie(Generic[_DataType]):
     def __init__(self) -> None:
         self.root: _SuffixTrieNode = _SuffixTrieNode()
         self.data_store: List[_DataType] = []
+        self._data_store_indices: Dict[_DataType, int] = {}
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple[str, _DataType]]) -> 'SuffixTrie[_DataType]':
+        """
+        Build a trie from (word, data) pairs.
+        """
+        suffix_trie: SuffixTrie[_DataType] = cls()
+        for word, data in items:
+            suffix_trie.insert(word, data)
+
+        return suffix_trie
 
     def insert(self, word: str, data: _DataType) -> None:
-        try:
-            # check to see if the data is already in the store
-            data_store_index: int = self.data_store.index(data)
-        except ValueError:
+        # check to see if the data is already in the store
+        data_store_index = self._data_store_indices.get(data)
+        if data_store_index is None:
             # if data is not in the store, add it
-            data_store_index: int = len(self.data_store)
+            data_store_index = len(self.data_store)
+            self._data_store_indices[data] = data_store_index
             self.data_store.append(data)
 
         # insert for all suffixes (including the empty string)
+        word = word.lower()
         for suffix_index in range(len(word) + 1):
             self._insert_suffix(word[suffix_index:],
                                 suffix_index, data_store_index)
 
     def _insert_suffix(self, suffix: str, suffix_index: int, data_store_index: int) -> None:
         node: _SuffixTrieNode = self.root
-        for char in suffix.lower():
-            if char not in node.children:
-                node.children[char] = _SuffixTrieNode()
-            node = node.children[char]
+        for char in suffix:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _SuffixTrieNode()
+            node = child
         node.is_end = True
 
-        suffix_node_metadatum = _SuffixTrieNodeMetadatum(data_store_index, suffix_index)
-        node.metadata.append(suffix_node_metadatum)
+        if node.metadata is None:
+            node.metadata = {}
+        node.metadata.setdefault(data_store_index, suffix_index)
 
     def search_substring(self, substring: str) -> List[_DataType]:
         node: _SuffixTrieNode = self.root
@@ -72,8 +79,7 @@ class SuffixTrie(Generic[_DataType]):
 
     def _collect_words(self, node: _SuffixTrieNode, substring: str, data_store_indices: List[int]) -> None:
         if node.is_end:
-            data_store_indices.extend(
-                [metadatum.data_store_index for metadatum in node.metadata])
+            data_store_indices.extend(node.metadata)
 
         for char, child in node.children.items():
             self._collect_words(child, substring + char, data_store_indices)
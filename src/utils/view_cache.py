@@ -0,0 +1,111 @@
+from collections import OrderedDict
+from flask import Response, make_response, request
+from flask_caching import Cache
+from functools import wraps
+from threading import Lock
+from typing import Callable, Dict, Hashable, Optional
+import time
+import uuid
+
+
+class ViewCache:
+    """
+    Caches the responses of views in a Flask-Caching backend, so with a shared
+    backend (file system or Redis) every worker serves what one of them rendered.
+
+    Every cached view has a generation stored in the backend and part of its
+    cache keys. Invalidating a view replaces its generation, which every
+    worker reads on its next request, so invalidation reaches all workers
+    without knowing which keys they stored.
+
+    Counts hits, misses and evictions per view in each worker. An eviction is
+    a miss for an entry this worker stored that the backend dropped before it
+    expired, e.g. because the backend was full.
+    """
+
+    # stored entries remembered per worker to tell evictions from expired entries
+    _MAX_TRACKED_ENTRIES = 4096
+
+    def __init__(self, cache: Cache) -> None:
+        self.cache: Cache = cache
+        self._view_stats: Dict[str, Dict[str, int]] = {}
+        # cache key -> monotonic time its entry expires
+        self._stored_entries: OrderedDict = OrderedDict()
+        self._lock: Lock = Lock()
+
+    def cached(self, timeout: Optional[int] = None, vary: Optional[Callable[[], Hashable]] = None) -> Callable:
+        """
+        Decorator caching the response of a view per path for `timeout` seconds,
+        defaulting to the backend's default timeout. The cache key also includes
+        the result of `vary`, for views that depend on more than the path.
+        """
+        def decorator(view: Callable) -> Callable:
+            @wraps(view)
+            def cached_view(*args, **kwargs) -> Response:
+                endpoint = request.endpoint
+                key = f'view:{endpoint}:{self._fetch_generation(endpoint)}:{request.path}'
+                if vary is not None:
+                    key = f'{key}:{vary()}'
+
+                entry = self.cache.get(key)
+                if entry is not None:
+                    self._count(endpoint, 'hits')
+                    body, status_code, mimetype = entry
+                    return Response(body, status=status_code, mimetype=mimetype)
+
+                self._count(endpoint, 'misses')
+                if self._forget_stored_entry(key):
+                    self._count(endpoint, 'evictions')
+
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200:
+                    entry_timeout = timeout if timeout is not None else self.cache.cache.default_timeout
+                    self.cache.set(key, (response.get_data(), response.status_code, response.mimetype), timeout=entry_timeout)
+                    self._remember_stored_entry(key, entry_timeout)
+                return response
+
+            return cached_view
+        return decorator
+
+    def invalidate(self, endpoint: str) -> None:
+        """Drop every cached response of the view of an endpoint, in every worker."""
+        self.cache.set(self._generation_key(endpoint), uuid.uuid4().hex, timeout=0)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {endpoint: dict(view_stats) for endpoint, view_stats in self._view_stats.items()}
+
+    def _fetch_generation(self, endpoint: str) -> str:
+        generation_key = self._generation_key(endpoint)
+        generation = self.cache.get(generation_key)
+        if generation is None:
+            # a lost generation is replaced by a new one rather than restarted,
+            # so responses cached before it was lost are never served again
+            new_generation = uuid.uuid4().hex
+            self.cache.add(generation_key, new_generation, timeout=0)
+            # another worker may have added its generation first
+            generation = self.cache.get(generation_key) or new_generation
+        return generation
+
+    def _count(self, endpoint: str, counter: str) -> None:
+        with self._lock:
+            view_stats = self._view_stats.setdefault(endpoint, {'hits': 0, 'misses': 0, 'evictions': 0})
+            view_stats[counter] += 1
+
+    def _remember_stored_entry(self, key: str, timeout: int) -> None:
+        with self._lock:
+            # a timeout of 0 never expires
+            self._stored_entries[key] = time.monotonic() + timeout if timeout else float('inf')
+            self._stored_entries.move_to_end(key)
+            if len(self._stored_entries) > self._MAX_TRACKED_ENTRIES:
+                self._stored_entries.popitem(last=False)
+
+    def _forget_stored_entry(self, key: str) -> bool:
+        """Forget an entry this worker stored; returns whether it was dropped before it expired."""
+        with self._lock:
+            expires = self._stored_entries.pop(key, None)
+        return expires is not None and time.monotonic() < expires
+
+    @staticmethod
+    def _generation_key(endpoint: str) -> str:
+        return f'view-generation:{endpoint}'
@@ -10,12 +10,7 @@ from flask import (
 from flask_caching import Cache, CachedResponse
 import os
 from src.data import (
-    RAW_SUBSTANCE_DATA,
-    SUBSTANCE_TRIE,
-    CATEGORY_CARD_NAMES,
-    SVG_FILES,
-    SLUG_TO_SUBSTANCE_NAME,
-    get_substance_data_for_source,
+    get_dataset,
     DEFAULT_SOURCE,
     AVAILABLE_SOURCES,
     DataSource
@@ -69,7 +64,7 @@ cache = Cache()
 def home() -> Response:
     return make_response(render_template(
         'index.html',
-        categories=CATEGORY_CARD_NAMES,
+        categories=get_dataset().category_card_names,
         theme=_fetch_theme(request)
     ))
 
@@ -163,11 +158,11 @@ def autocomplete() -> Response:
     limit = request.args.get('limit', 10)
     source = _fetch_data_source(request)
     
-    result_substance_names = set(SUBSTANCE_TRIE.search_substring(query))
+    result_substance_names = set(get_dataset().substance_trie.search_substring(query))
     sorted_result_substance_names = sorted(result_substance_names, key=lambda substance_name: distance(substance_name.lower(), query.lower()))
     
     # Get data from user's preferred source
-    substance_data = get_substance_data_for_source(source)
+    substance_data = get_dataset().get_substance_data_for_source(source)
     result_substances = []
     
     # Process each substance to include TripSit categories
@@ -175,7 +170,7 @@ def autocomplete() -> Response:
         substance = substance_data.get(substance_name)
         if substance:
             # Get TripSit categories if available
-            tripsit_data = get_substance_data_for_source('tripsit')
+            tripsit_data = get_dataset().get_substance_data_for_source('tripsit')
             if substance_name in tripsit_data and tripsit_data[substance_name].get('categories'):
                 substance['categories'] = tripsit_data[substance_name]['categories']
             result_substances.append(substance)
@@ -196,10 +191,10 @@ def substance(slug: str) -> Response:
         return make_response(slug_validation_error_mesage, 400)
 
     decoded_slug = unquote(slug)
-    substance_name = SLUG_TO_SUBSTANCE_NAME.get(decoded_slug.lower(), '')
+    substance_name = get_dataset().slug_to_substance_name.get(decoded_slug.lower(), '')
     
     # Get data from both sources
-    substance_data = RAW_SUBSTANCE_DATA.get(substance_name, {})
+    substance_data = get_dataset().raw_substance_data.get(substance_name, {})
     if not substance_data:
         return make_response("Substance not found", 404)
     
@@ -235,7 +230,7 @@ def substance(slug: str) -> Response:
         current_source=source,
         available_sources=substance_available_sources,
         all_sources_data=substance_data,
-        svg_files=SVG_FILES,
+        svg_files=get_dataset().svg_files,
         theme=_fetch_theme(request)
     ))
     
@@ -256,7 +251,7 @@ def category(category_slug: str) -> Response:
     user_source = _fetch_data_source(request)
     
     # Always use TripSit data for category listings
-    tripsit_data = get_substance_data_for_source('tripsit')
+    tripsit_data = get_dataset().get_substance_data_for_source('tripsit')
 
     # Map of slugified category names to their original form
     category_name_mapping = {}
@@ -275,7 +270,7 @@ def category(category_slug: str) -> Response:
     for substance_name, details in tripsit_data.items():
         if any(slugify(cat) == decoded_slug for cat in details.get('categories', [])):
             # Get substance data from user's preferred source
-            source_data = get_substance_data_for_source(user_source)
+            source_data = get_dataset().get_substance_data_for_source(user_source)
             if substance_name in source_data:
                 filtered_substances[substance_name] = source_data[substance_name]
             else:
@@ -1,9 +1,18 @@
+import brotli
+import gzip
+import json
+import os
 import pytest
-from src import create_app
-from src.data import RAW_SUBSTANCE_DATA
+import time
+from src import create_app, data
+from src.blueprints.views import utils as views_utils
+from src.data import get_dataset
 from src.utils import slugify
 
 
+RAW_SUBSTANCE_DATA = get_dataset().raw_substance_data
+
+
 class TestAppClass:
     @pytest.fixture()
     def app(self):
@@ -31,3 +40,285 @@ class TestAppClass:
     def test_substance_endpoint_failure(self, client):
         response = client.get("/substance/NON-EXISTENT-SUBSTANCE")
         assert response.status_code == 404
+
+    def test_leaderboard_endpoint(self, monkeypatch):
+        # GitHub is not reachable, so the contributors seeded from leaderboard.csv are shown
+        monkeypatch.setenv('FLASK_LEADERBOARD_URL', 'http://127.0.0.1:9/contributors')
+        response = create_app().test_client().get("/leaderboard")
+        assert response.status_code == 200
+        assert b'ded-grl' in response.data
+
+    def test_metrics_endpoint(self, client, monkeypatch):
+        # disabled by default
+        assert client.get("/metrics").status_code == 404
+
+        # the page cache would serve the page without rendering it, and histograms recorded by
+        # other tests would add to the counts, as both are shared by every app in the process
+        monkeypatch.setenv('FLASK_METRICS_ENABLED', 'true')
+        monkeypatch.setenv('FLASK_PAGE_CACHE_MAX_SIZE', '0')
+        monkeypatch.setattr(views_utils.metrics, '_histograms', {})
+        monkeypatch.setattr(views_utils.metrics, 'enabled', views_utils.metrics.enabled)
+        client = create_app().test_client()
+        client.get("/autocomplete?query=ketamine")
+        client.get("/substance/ketamine")
+
+        metrics = client.get("/metrics").data.decode('utf-8')
+        assert 'substancesearch_request_duration_seconds_count{endpoint="views.substance",method="GET",status="200"} 1' in metrics
+        assert 'substancesearch_operation_duration_seconds_count{operation="trie_search"} 1' in metrics
+        assert 'substancesearch_operation_duration_seconds_count{operation="render_template",template="substance.html"} 1' in metrics
+        assert 'operation="minify"' in metrics
+
+    def test_autocomplete_endpoint(self, client):
+        response = client.get("/autocomplete?query=ketamine")
+        assert response.status_code == 200
+        assert response.json[0] == {
+            'name': 'ketamine',
+            'pretty_name': RAW_SUBSTANCE_DATA['ketamine']['tripsit']['pretty_name'],
+            'aliases': RAW_SUBSTANCE_DATA['ketamine']['tripsit']['aliases'],
+            'slug': 'ketamine'
+        }
+
+    def test_autocomplete_endpoint_typo(self, client):
+        response = client.get("/autocomplete?query=ketamne")
+        assert response.status_code == 200
+        assert 'ketamine' in [result['name'] for result in response.json]
+
+    def test_api_substance_endpoint(self, client):
+        response = client.get("/api/substance/ketamine")
+        assert response.status_code == 200
+        assert response.json == RAW_SUBSTANCE_DATA['ketamine']
+        assert response.headers['ETag']
+        assert 'max-age' in response.headers['Cache-Control']
+
+    def test_api_substance_endpoint_not_modified(self, client):
+        etag = client.get("/api/substance/ketamine/sources/tripsit").headers['ETag']
+        response = client.get("/api/substance/ketamine/sources/tripsit", headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+
+    def test_api_substance_endpoint_fields(self, client):
+        response = client.get("/api/substance/ketamine/sources/tripsit?fields=timing,dosage")
+        assert response.status_code == 200
+        assert response.json == {
+            'dosage': RAW_SUBSTANCE_DATA['ketamine']['tripsit']['dosage'],
+            'timing': RAW_SUBSTANCE_DATA['ketamine']['tripsit']['timing'],
+        }
+        assert response.headers['ETag'] != client.get("/api/substance/ketamine/sources/tripsit").headers['ETag']
+        assert response.headers['ETag'] == client.get("/api/substance/ketamine/sources/tripsit?fields=dosage,timing").headers['ETag']
+
+        response = client.get("/api/substance/ketamine?fields=dosage")
+        assert list(response.json['tripsit']) == ['dosage']
+        assert client.get("/api/substance/ketamine?fields=INVALID!").status_code == 400
+
+    def test_api_substance_endpoint_compressed(self, client):
+        response = client.get("/api/substance/ketamine", headers={'Accept-Encoding': 'gzip, br'})
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'br'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert json.loads(brotli.decompress(response.data)) == RAW_SUBSTANCE_DATA['ketamine']
+        assert response.headers['ETag'] != client.get("/api/substance/ketamine").headers['ETag']
+
+        response = client.get("/api/substance/ketamine", headers={'Accept-Encoding': 'gzip'})
+        assert json.loads(gzip.decompress(response.data)) == RAW_SUBSTANCE_DATA['ketamine']
+
+    def test_api_substance_endpoint_failure(self, client):
+        assert client.get("/api/substance/NON-EXISTENT-SUBSTANCE").status_code == 404
+        assert client.get("/api/substance/ketamine/sources/unknown").status_code == 400
+
+    def test_api_substances_endpoint(self, client):
+        response = client.get("/api/substances?slugs=ketamine,NON-EXISTENT-SUBSTANCE&source=tripsit")
+        assert response.status_code == 200
+        assert response.json['substances'] == {'ketamine': RAW_SUBSTANCE_DATA['ketamine']['tripsit']}
+        assert response.json['errors'] == {'non-existent-substance': 'Substance not found'}
+
+    def test_api_substances_endpoint_ndjson(self, client):
+        response = client.post("/api/substances", json={'slugs': ['ketamine', 'lsd'], 'format': 'ndjson'})
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.data.splitlines()]
+        assert lines[0] == {'slug': 'ketamine', 'data': RAW_SUBSTANCE_DATA['ketamine']}
+        assert lines[1]['slug'] == 'lsd'
+
+    def test_api_substances_endpoint_fields(self, client):
+        response = client.post("/api/substances", json={'slugs': ['ketamine', 'lsd'], 'fields': ['dosage']})
+        assert response.status_code == 200
+        assert all(
+            list(source_data) == ['dosage']
+            for substance_data in response.json['substances'].values()
+            for source_data in substance_data.values()
+        )
+
+    def test_api_substances_endpoint_fields_type(self, client):
+        response = client.post("/api/substances", json={'slugs': ['ketamine'], 'fields': 5})
+        assert response.status_code == 400
+        assert response.json['error'] == "fields must be a comma-separated string or a list"
+        assert client.post("/api/substances", json={'slugs': ['ketamine'], 'fields': 'dosage'}).status_code == 200
+
+    def test_api_substances_endpoint_failure(self, client):
+        assert client.get("/api/substances").status_code == 400
+        assert client.get("/api/substances?slugs=ketamine&source=unknown").status_code == 400
+        assert client.post("/api/substances", json={'slugs': ['ketamine'] * 51}).status_code == 400
+
+    def test_category_endpoint(self, client):
+        response = client.get("/category/stimulant")
+        assert response.status_code == 200
+        assert client.get("/category/NON-EXISTENT-CATEGORY").status_code == 404
+
+    def test_api_category_endpoint(self, client):
+        response = client.get("/api/category/stimulant")
+        assert response.status_code == 200
+        assert response.json['name'] == 'Stimulant'
+        substance_names = [substance['name'] for substance in response.json['substances']]
+        assert 'amphetamine' in substance_names
+        assert substance_names == sorted(substance_names, key=str.lower)
+        assert client.get("/api/category/NON-EXISTENT-CATEGORY").status_code == 404
+
+    def test_static_endpoint_compressed(self, app, client, tmp_path):
+        app.static_folder = str(tmp_path)
+        with open(os.path.join(tmp_path, 'style.css'), 'wb') as f:
+            f.write(b'body{color:red}')
+        with open(os.path.join(tmp_path, 'style.css.br'), 'wb') as f:
+            f.write(brotli.compress(b'body{color:red}'))
+
+        response = client.get("/static/style.css", headers={'Accept-Encoding': 'br'})
+        assert response.headers['Content-Encoding'] == 'br'
+        assert response.mimetype == 'text/css'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert brotli.decompress(response.data) == b'body{color:red}'
+
+        response = client.get("/static/style.css", headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+        assert response.data == b'body{color:red}'
+
+        # a sibling older than its file is stale, the file was edited since it was compressed
+        with open(os.path.join(tmp_path, 'style.css'), 'wb') as f:
+            f.write(b'body{color:blue}')
+        compressed_stat = os.stat(os.path.join(tmp_path, 'style.css.br'))
+        os.utime(os.path.join(tmp_path, 'style.css'), ns=(compressed_stat.st_atime_ns, compressed_stat.st_mtime_ns + 10 ** 9))
+        response = client.get("/static/style.css", headers={'Accept-Encoding': 'br'})
+        assert 'Content-Encoding' not in response.headers
+        assert response.data == b'body{color:blue}'
+
+    def test_substance_endpoint_page_cache(self, app, client):
+        # the stats are only exposed with metrics enabled
+        assert client.get("/page-cache/stats").status_code == 404
+        assert client.get("/cache/stats").status_code == 404
+        app.config['METRICS_ENABLED'] = True
+        assert client.get("/cache/stats").status_code == 200
+
+        first_response = client.get("/substance/ketamine?theme=dark")
+        hits = client.get("/page-cache/stats").json['hits']
+        second_response = client.get("/substance/ketamine?theme=dark")
+
+        assert second_response.data == first_response.data
+        assert client.get("/page-cache/stats").json['hits'] == hits + 1
+
+    def test_api_interactions_endpoint(self, client):
+        response = client.get("/api/interactions?slugs=tramadol,mdma,lsd")
+        assert response.status_code == 200
+        assert response.json['substances'] == ['tramadol', 'mdma', 'lsd']
+        assert response.json['interactions'][0] == {'substances': ['tramadol', 'mdma'], 'severity': 'dangerous'}
+
+    def test_api_interactions_endpoint_unresolved(self, client):
+        # mdma lists "maois" as dangerous, which matches no substance, so it is reported rather than dropped
+        response = client.get("/api/interactions?slugs=mdma,lsd")
+        assert {'substance': 'mdma', 'term': 'maois', 'severity': 'dangerous'} in response.json['unresolved']
+
+        response = client.get("/api/interactions/mdma?severity=dangerous")
+        assert {'term': 'maois', 'severity': 'dangerous'} in response.json['unresolved']
+
+    def test_api_interactions_endpoint_failure(self, client):
+        assert client.get("/api/interactions?slugs=ketamine").status_code == 400
+        assert client.get("/api/interactions?slugs=ketamine,NON-EXISTENT-SUBSTANCE").status_code == 404
+
+    def test_api_substance_interactions_endpoint(self, client):
+        response = client.get("/api/interactions/lithium?severity=dangerous")
+        assert response.status_code == 200
+        assert list(response.json['interactions']) == ['dangerous']
+        assert 'lsd' in response.json['interactions']['dangerous']
+        assert client.get("/api/interactions/lithium?severity=unknown").status_code == 400
+        assert client.get("/api/interactions/NON-EXISTENT-SUBSTANCE").status_code == 404
+
+    def test_api_dosage_endpoint(self, client):
+        response = client.get("/api/dosage?route=oral&level=common&min=10&max=20")
+        assert response.status_code == 200
+        assert response.json['units'] == 'mg'
+        substances = {substance['slug']: substance for substance in response.json['substances']}
+        assert 'aminorex' in substances
+        assert all(substance['min'] <= 20 and substance['max'] >= 10 for substance in substances.values())
+
+        # micrograms are converted to milligrams, and heavy doses have no upper bound
+        response = client.get("/api/dosage?route=oral&level=heavy&min=500&units=ug")
+        assert response.json['min'] == 0.5
+        assert all(substance['max'] is None for substance in response.json['substances'])
+
+    def test_api_dosage_endpoint_unit_boundaries(self, client):
+        # bounds given in other units are rounded like the indexed doses, so doses at a bound still match
+        response = client.get("/api/dosage?route=oral&level=strong&min=175&max=175&units=ug")
+        assert response.json['min'] == 0.175
+        assert {'slug': 'al-lad', 'min': 0.175, 'max': 0.25} in response.json['substances']
+
+        response = client.get("/api/dosage?route=oral&level=common&min=700&units=ug")
+        assert {'slug': '25p-nbome', 'min': 0.45, 'max': 0.7} in response.json['substances']
+
+    def test_api_dosage_endpoint_failure(self, client):
+        assert client.get("/api/dosage?min=10").status_code == 400
+        assert client.get("/api/dosage?route=oral").status_code == 400
+        assert client.get("/api/dosage?route=oral&min=ten").status_code == 400
+        assert client.get("/api/dosage?route=oral&min=20&max=10").status_code == 400
+        # finite in grams, but not once converted to milligrams
+        assert client.get("/api/dosage?route=oral&min=1e308&units=g").status_code == 400
+        assert client.get("/api/dosage?route=oral&max=1e308&units=g").status_code == 400
+        assert client.get("/api/dosage?route=oral&level=unknown&min=10").status_code == 400
+        assert client.get("/api/dosage?route=oral&source=unknown&min=10").status_code == 400
+
+    def test_api_search_endpoint(self, client):
+        response = client.get("/api/search?category=psychedelic,dissociative&route=oral&source=psychonautwiki")
+        assert response.status_code == 200
+        assert 'lsd' in response.json['substances']
+        assert 'ketamine' in response.json['substances']
+        assert response.json['total'] == len(response.json['substances'])
+        assert response.json['facets']['source']['psychonautwiki'] == response.json['total']
+        assert response.json['facets']['category']['psychedelic'] < response.json['total']
+        assert set(response.json['facets']) == {'category', 'route', 'source', 'interaction', 'svg'}
+
+        assert client.get("/api/search?route=unknown").json['substances'] == []
+
+    @pytest.mark.parametrize('severity', ['dangerous', 'unsafe', 'caution'])
+    def test_api_search_interaction_facet_matches_interactions(self, client, severity):
+        slugs = get_dataset().slug_to_substance_name
+        # substances with PsychonautWiki data only have no interactions endpoint
+        searched_slugs = set(client.get(f"/api/search?interaction={severity}").json['substances']) & slugs.keys()
+
+        interacting_slugs = set()
+        for slug in slugs:
+            response = client.get(f"/api/interactions/{slug}?severity={severity}")
+            if response.json['interactions'][severity]:
+                interacting_slugs.add(slug)
+        assert searched_slugs == interacting_slugs
+
+    def test_data_reload_endpoint(self, client, app, tmp_path, monkeypatch):
+        data_file_path = os.path.join(tmp_path, 'data.json')
+        substance_data = json.loads(data._read_data_file())
+        substance_data['ketamine']['tripsit']['dose_note'] = 'reloaded'
+        with open(data_file_path, 'w') as f:
+            json.dump(substance_data, f)
+        monkeypatch.setattr(data, 'DATA_FILE_PATH', data_file_path)
+        # restore the dataset every other test uses
+        monkeypatch.setattr(data, '_dataset', get_dataset())
+        etag = client.get("/api/substance/ketamine").headers['ETag']
+
+        # disabled without a token
+        assert client.post("/data/reload").status_code == 404
+        app.config['DATA_RELOAD_TOKEN'] = 'secret'
+        assert client.post("/data/reload", headers={'Authorization': 'Bearer wrong'}).status_code == 401
+
+        response = client.post("/data/reload", headers={'Authorization': 'Bearer secret'})
+        assert response.status_code == 202
+        deadline = time.monotonic() + 10
+        while get_dataset().raw_substance_data is RAW_SUBSTANCE_DATA:
+            assert time.monotonic() < deadline, 'timed out'
+            time.sleep(0.01)
+
+        response = client.get("/api/substance/ketamine")
+        assert response.json['tripsit']['dose_note'] == 'reloaded'
+        assert response.headers['ETag'] != etag
@@ -0,0 +1,24 @@
+import json
+import os
+import subprocess
+import sys
+from src import data
+
+
+class TestBenchmarksClass:
+    def test_benchmarks_run_end_to_end(self, tmp_path):
+        output_path = os.path.join(tmp_path, 'results.json')
+        size = len(data.get_dataset().raw_substance_data) + 50
+        subprocess.run(
+            [sys.executable, '-m', 'benchmarks', '--datasets', str(size), '--iterations', '2', '--output', output_path],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+        with open(output_path) as f:
+            result = json.load(f)['datasets'][str(size)]
+        assert 'error' not in result
+        assert result['substances'] == size
+        assert all('error' not in startup for startup in result['startup'].values())
+        assert all('error' not in benchmark for benchmark in result['benchmarks'].values())
+        assert {'substance_page', 'api_interactions', 'api_search'} <= result['benchmarks'].keys()
@@ -0,0 +1,90 @@
+import json
+import os
+import pytest
+from src import build, create_app, data
+
+
+@pytest.fixture
+def build_paths(tmp_path, monkeypatch):
+    """Build a few substances into a temporary directory."""
+    with open(build.RAW_TRIPSIT_PATH, 'rb') as f:
+        raw_tripsit = [raw_substance for raw_substance in json.load(f) if raw_substance['name'] in ('ketamine', 'lsd', 'mdma')]
+    with open(build.RAW_PSYCHONAUT_PATH, 'rb') as f:
+        raw_psychonaut = [raw_substance for raw_substance in json.load(f) if raw_substance['name'] in ('Ketamine', 'LSD')]
+
+    paths = {name: str(tmp_path / name) for name in ('raw_tripsit.json', 'raw_psychonaut.json', 'data.json')}
+    with open(paths['raw_tripsit.json'], 'w') as f:
+        json.dump(raw_tripsit, f)
+    with open(paths['raw_psychonaut.json'], 'w') as f:
+        json.dump(raw_psychonaut, f)
+
+    monkeypatch.setattr(build, 'RAW_TRIPSIT_PATH', paths['raw_tripsit.json'])
+    monkeypatch.setattr(build, 'RAW_PSYCHONAUT_PATH', paths['raw_psychonaut.json'])
+    monkeypatch.setattr(build, 'BUILD_CACHE_PATH', str(tmp_path / 'data.build-cache'))
+    monkeypatch.setattr(build, 'DATA_FILE_PATH', paths['data.json'])
+    monkeypatch.setattr(data, 'DATA_FILE_PATH', paths['data.json'])
+    monkeypatch.setattr(data, 'DATA_SNAPSHOT_PATH', str(tmp_path / 'data.snapshot'))
+    monkeypatch.setattr(data, 'DATA_RECORD_STORE_PATH', str(tmp_path / 'data.records'))
+    monkeypatch.setattr(data, 'DATA_VALIDATION_MANIFEST_PATH', str(tmp_path / 'data.validated'))
+    return paths
+
+
+class TestBuildClass:
+    def test_normalize_matches_data_file(self):
+        with open(data.DATA_FILE_PATH, 'rb') as f:
+            substance_data = json.load(f)
+
+        assert build._read_raw_sources().keys() == substance_data.keys()
+        for substance_name, raw_sources in build._read_raw_sources().items():
+            assert build._build_substance(raw_sources) == substance_data[substance_name], substance_name
+
+    def test_parse_tripsit_dose(self):
+        assert build._parse_tripsit_dose('10-20mg', 'mg') == {'min': 10.0, 'max': 20.0}
+        assert build._parse_tripsit_dose('.5mg', 'mg') == {'min': 0.5, 'max': 0.5}
+        assert build._parse_tripsit_dose('20-40mg+', 'mg') == {'min': 20.0, 'max': None}
+        assert build._parse_tripsit_dose('10mg-20mg', 'mg') == {'min': None, 'max': 20.0}
+        assert build._parse_tripsit_dose('1.6g', 'mg') == {'min': None, 'max': None}
+        assert build._parse_tripsit_dose(None, 'mg') == {'min': None, 'max': None}
+
+    def test_build_data_file(self, build_paths):
+        summary = build.build_data_file(workers=1)
+
+        assert summary.substances == 3
+        assert summary.built == 3
+        assert summary.changed
+        with open(build_paths['data.json'], 'rb') as f:
+            substance_data = json.load(f)
+        assert sorted(substance_data) == ['ketamine', 'lsd', 'mdma']
+        assert sorted(substance_data['ketamine']) == ['psychonautwiki', 'tripsit']
+        assert os.path.exists(data.DATA_SNAPSHOT_PATH)
+        assert os.path.exists(data.DATA_RECORD_STORE_PATH)
+
+    def test_build_data_file_rebuilds_changed_substances(self, build_paths):
+        build.build_data_file(workers=1)
+        assert build.build_data_file(workers=1) == build.BuildSummary(
+            substances=3, built=0, data_version=data.write_data_snapshot(), changed=False
+        )
+
+        with open(build_paths['raw_tripsit.json']) as f:
+            raw_tripsit = json.load(f)
+        raw_tripsit[0]['pretty_name'] = 'Edited'
+        with open(build_paths['raw_tripsit.json'], 'w') as f:
+            json.dump(raw_tripsit, f)
+
+        summary = build.build_data_file(workers=1)
+        assert summary.built == 1
+        assert summary.changed
+        with open(build_paths['data.json'], 'rb') as f:
+            assert json.load(f)[raw_tripsit[0]['name']]['tripsit']['pretty_name'] == 'Edited'
+
+    def test_build_data_command_without_data_file(self, build_paths, monkeypatch):
+        # as on a fresh checkout: no data.json, and no dataset loaded yet
+        assert not os.path.exists(build_paths['data.json'])
+        monkeypatch.setattr(data, '_dataset', None)
+
+        result = create_app().test_cli_runner().invoke(args=['build-data', '--workers', '1'])
+
+        assert result.exit_code == 0, result.output
+        assert 'Normalized 3 of 3 substances' in result.output
+        assert os.path.exists(build_paths['data.json'])
+        assert data._dataset is None
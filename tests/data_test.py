@@ -0,0 +1,249 @@
+import gc
+import json
+import os
+import pytest
+import weakref
+from src import create_app, data
+from src.utils.record_store import RecordStore, write_record_store
+
+
+class TestDataSnapshotClass:
+    @pytest.fixture()
+    def snapshot_path(self, tmp_path, monkeypatch):
+        path = os.path.join(tmp_path, 'data.snapshot')
+        monkeypatch.setattr(data, 'DATA_SNAPSHOT_PATH', path)
+        monkeypatch.setattr(data, 'DATA_VALIDATION_MANIFEST_PATH', os.path.join(tmp_path, 'data.validated'))
+
+        yield path
+
+    def test_snapshot_round_trip(self, snapshot_path):
+        data_version = data.write_data_snapshot()
+        assert data_version == data.get_dataset().version
+
+        substance_data, substance_indices = data._read_data_snapshot(data_version)
+        assert substance_data == data.get_dataset().raw_substance_data
+        assert substance_indices['slug_to_substance_name'] == data.get_dataset().slug_to_substance_name
+        assert substance_indices['trie'].search_top_k('ketamine', 1) == ['ketamine']
+
+    def test_snapshot_for_other_data_is_ignored(self, snapshot_path):
+        data.write_data_snapshot()
+
+        assert data._read_data_snapshot('other-data-version') is None
+
+    def test_missing_snapshot_is_ignored(self, snapshot_path):
+        assert data._read_data_snapshot(data.get_dataset().version) is None
+
+
+class TestSubstanceSourceViewClass:
+    def test_source_view_matches_source_data(self, tmp_path):
+        substance_data = data._init_substance_data(data._read_data_file())
+        path = os.path.join(tmp_path, 'data.records')
+        write_record_store(path, substance_data, 'version')
+        record_store = RecordStore(path)
+        source_substance_names = data._init_source_substance_names(substance_data)
+
+        for source in data.AVAILABLE_SOURCES:
+            source_data = data._get_substance_data_for_source(substance_data, source)
+            source_view = data._SubstanceSourceView(record_store, source, source_substance_names[source])
+
+            assert len(source_view) == len(source_data)
+            assert list(source_view) == list(source_data)
+            assert [substance_name for substance_name in substance_data if substance_name in source_view] == list(source_data)
+            assert 'missing substance' not in source_view
+        # membership is looked up in the names, without decoding any record
+        assert not record_store._cache
+
+        for source in data.AVAILABLE_SOURCES:
+            source_data = data._get_substance_data_for_source(substance_data, source)
+            source_view = data._SubstanceSourceView(record_store, source, source_substance_names[source])
+            substance_name = next(iter(source_data))
+            assert source_view[substance_name] == source_data[substance_name]
+            with pytest.raises(KeyError):
+                source_view['missing substance']
+
+
+class TestDataReloadClass:
+    @pytest.fixture()
+    def data_file_path(self, tmp_path, monkeypatch):
+        path = os.path.join(tmp_path, 'data.json')
+        with open(data.DATA_FILE_PATH, 'rb') as f, open(path, 'wb') as copy:
+            copy.write(f.read())
+        monkeypatch.setattr(data, 'DATA_FILE_PATH', path)
+        monkeypatch.setattr(data, 'DATA_VALIDATION_MANIFEST_PATH', os.path.join(tmp_path, 'data.validated'))
+        # restore the dataset every other test uses
+        monkeypatch.setattr(data, '_dataset', data.get_dataset())
+
+        yield path
+
+    def _modify_data_file(self, data_file_path, modify) -> None:
+        with open(data_file_path, 'rb') as f:
+            substance_data = json.load(f)
+        modify(substance_data)
+        with open(data_file_path, 'w') as f:
+            json.dump(substance_data, f)
+
+    def test_reload_unchanged_data_file(self, data_file_path):
+        dataset = data.get_dataset()
+
+        assert not data.reload_dataset()
+        assert data.get_dataset() is dataset
+
+    def test_reload_rebuilds_changed_indices(self, data_file_path):
+        previous_dataset = data.get_dataset()
+        self._modify_data_file(data_file_path, lambda substance_data: substance_data['ketamine']['tripsit'].update(dose_note='updated'))
+
+        assert data.reload_dataset()
+        dataset = data.get_dataset()
+        assert dataset.version != previous_dataset.version
+        assert dataset.raw_substance_data['ketamine']['tripsit']['dose_note'] == 'updated'
+        # the previous dataset is left as it was for requests still using it
+        assert previous_dataset.raw_substance_data['ketamine']['tripsit'].get('dose_note') != 'updated'
+        # no indexed field changed, so every index is reused
+        assert dataset.substance_trie is previous_dataset.substance_trie
+        assert dataset.interaction_matrix is previous_dataset.interaction_matrix
+
+    def test_reload_rebuilds_indices_of_changed_fields(self, data_file_path):
+        previous_dataset = data.get_dataset()
+        self._modify_data_file(data_file_path, lambda substance_data: substance_data['ketamine']['tripsit']['aliases'].append('reloadedalias'))
+
+        assert data.reload_dataset()
+        dataset = data.get_dataset()
+        assert dataset.substance_trie.search_top_k('reloadedalias', 1) == ['ketamine']
+        assert dataset.substance_trie is not previous_dataset.substance_trie
+        assert 'reloadedalias' in json.loads(dataset.autocomplete_entries['ketamine'])['aliases']
+        # categories did not change, so their indices are reused
+        assert dataset.category_card_names is previous_dataset.category_card_names
+
+    def test_reload_added_substance(self, data_file_path):
+        def add_substance(substance_data):
+            substance_data['reloadedsubstance'] = {'tripsit': {**substance_data['ketamine']['tripsit'], 'name': 'reloadedsubstance', 'pretty_name': 'Reloaded'}}
+        self._modify_data_file(data_file_path, add_substance)
+
+        assert data.reload_dataset()
+        assert data.get_dataset().slug_to_substance_name['reloadedsubstance'] == 'reloadedsubstance'
+
+    def test_reload_record_store(self, data_file_path, tmp_path, monkeypatch):
+        monkeypatch.setattr(data, 'DATA_RECORD_STORE_PATH', os.path.join(tmp_path, 'data.records'))
+        monkeypatch.setattr(data, 'DATA_SNAPSHOT_PATH', os.path.join(tmp_path, 'data.snapshot'))
+        dataset = data.get_dataset()
+        previous_record_store = data._open_record_store(data._read_data_file(), dataset.version)
+        data._dataset = data.Dataset(dataset.version, previous_record_store, dataset.indices, dataset.svg_files)
+        self._modify_data_file(data_file_path, lambda substance_data: substance_data['ketamine']['tripsit'].update(dose_note='updated'))
+        data.write_data_record_store()
+
+        # the record store built for the new data is read instead of parsing the data file
+        monkeypatch.setattr(data, '_init_substance_data', None)
+        assert data.reload_dataset()
+        record_store = data.get_dataset().raw_substance_data
+        assert isinstance(record_store, RecordStore) and record_store is not previous_record_store
+        assert record_store['ketamine']['tripsit']['dose_note'] == 'updated'
+
+        # the previous record store is closed once nothing uses it any more
+        previous_mmap = previous_record_store._mmap
+        previous_record_store = weakref.ref(previous_record_store)
+        gc.collect()
+        assert previous_record_store() is None
+        assert previous_mmap.closed
+
+    def test_reload_invalid_data_file_keeps_dataset(self, data_file_path):
+        dataset = data.get_dataset()
+        with open(data_file_path, 'w') as f:
+            f.write('{')
+
+        with pytest.raises(json.JSONDecodeError):
+            data.reload_dataset()
+        assert data.get_dataset() is dataset
+
+    def test_reload_data_file_violating_schema_keeps_dataset(self, data_file_path):
+        dataset = data.get_dataset()
+        self._modify_data_file(data_file_path, lambda substance_data: substance_data['ketamine']['tripsit'].pop('timing'))
+
+        with pytest.raises(AssertionError, match='ketamine.tripsit.timing: missing'):
+            data.reload_dataset()
+        assert data.get_dataset() is dataset
+
+
+class TestDataValidationClass:
+    @pytest.fixture()
+    def manifest_path(self, tmp_path, monkeypatch):
+        path = os.path.join(tmp_path, 'data.validated')
+        monkeypatch.setattr(data, 'DATA_VALIDATION_MANIFEST_PATH', path)
+
+        yield path
+
+    def test_data_file_is_valid(self):
+        assert data.validate_substance_data(json.loads(data._read_data_file())) == []
+
+    def test_every_violation_is_reported(self):
+        substance_data = json.loads(data._read_data_file())
+        substance_data['ketamine']['tripsit']['dosage']['routes']['insufflated']['light']['min'] = '20'
+        substance_data['ketamine']['tripsit']['aliases'].append(None)
+        del substance_data['lsd']['psychonautwiki']['interactions']
+        substance_data['mdma'] = {}
+
+        assert sorted(data.validate_substance_data(substance_data)) == [
+            'ketamine.tripsit.aliases[4]: expected str, got NoneType',
+            'ketamine.tripsit.dosage.routes.insufflated.light.min: expected null or number, got str',
+            'lsd.psychonautwiki.interactions: missing',
+            'mdma: missing required source data',
+        ]
+        with pytest.raises(AssertionError, match='4 violations'):
+            data._init_substance_data(json.dumps(substance_data).encode('utf-8'))
+
+    def test_validated_data_version_skips_validation(self, manifest_path):
+        data_file_contents = json.dumps({'ketamine': {'tripsit': {}}}).encode('utf-8')
+        with pytest.raises(AssertionError):
+            data._init_substance_data(data_file_contents, 'validated-version')
+
+        data._write_validation_manifest('validated-version')
+        assert data._init_substance_data(data_file_contents, 'validated-version') == {'ketamine': {'tripsit': {}}}
+        with pytest.raises(AssertionError):
+            data._init_substance_data(data_file_contents, 'other-version')
+
+    def test_validate_data_file_writes_manifest(self, manifest_path):
+        data_version, violations = data.validate_data_file()
+
+        assert violations == []
+        assert data._is_validated(data_version)
+
+    def test_validate_data_command_reports_every_violation(self, manifest_path, tmp_path, monkeypatch):
+        substance_data = json.loads(data._read_data_file())
+        substance_data['ketamine']['tripsit']['aliases'].append(None)
+        substance_data['mdma'] = {}
+        path = os.path.join(tmp_path, 'data.json')
+        with open(path, 'w') as f:
+            json.dump(substance_data, f)
+        monkeypatch.setattr(data, 'DATA_FILE_PATH', path)
+        # the invalid data file must not be loaded to run the command
+        monkeypatch.setattr(data, '_dataset', None)
+        runner = create_app().test_cli_runner()
+
+        result = runner.invoke(args=['validate-data'])
+        assert result.exit_code == 1
+        assert 'ketamine.tripsit.aliases[4]: expected str, got NoneType' in result.output
+        assert 'mdma: missing required source data' in result.output
+        assert '2 violations' in result.output
+        assert not os.path.exists(manifest_path)
+        assert data._dataset is None
+
+        with open(path, 'w') as f:
+            f.write('{')
+        result = runner.invoke(args=['validate-data'])
+        assert result.exit_code == 1
+        assert 'is not valid JSON' in result.output
+
+
+class TestInteractionsClass:
+    def test_dangerous_interactions_are_resolved_or_reported(self):
+        dataset = data.get_dataset()
+        interaction_matrix = dataset.interaction_matrix
+
+        for substance_name, sources_data in dataset.raw_substance_data.items():
+            unresolved_terms = {term for term, severity in interaction_matrix.unresolved(substance_name) if severity == 'dangerous'}
+            interacting = interaction_matrix.interactions_with(substance_name, 'dangerous')
+            for term in ((sources_data.get('tripsit') or {}).get('interactions') or {}).get('dangerous') or []:
+                assert term in unresolved_terms or interacting, (substance_name, term)
+
+        # class terms without a category, like "maois", are reported instead of dropped
+        assert ('maois', 'dangerous') in interaction_matrix.unresolved('mdma')
+        assert 'MAOI' in interaction_matrix.unresolved_terms()
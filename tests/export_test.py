@@ -0,0 +1,41 @@
+import gzip
+import os
+import brotli
+from src import export
+
+
+class TestExportClass:
+    def test_export_url(self, tmp_path, monkeypatch):
+        # restored after the test, the export worker disables the page cache through it
+        monkeypatch.setenv('FLASK_PAGE_CACHE_MAX_SIZE', '0')
+        export._init_export_worker(str(tmp_path), {})
+
+        result = export._export_url(('/api/substance/ketamine', 'api/substance/ketamine.json'))
+        path = os.path.join(tmp_path, 'api', 'substance', 'ketamine.json')
+        with open(path, 'rb') as f:
+            content = f.read()
+
+        assert result.written
+        with open(path + '.gz', 'rb') as f:
+            assert gzip.decompress(f.read()) == content
+        with open(path + '.br', 'rb') as f:
+            assert brotli.decompress(f.read()) == content
+
+    def test_export_url_unchanged(self, tmp_path, monkeypatch):
+        monkeypatch.setenv('FLASK_PAGE_CACHE_MAX_SIZE', '0')
+        export._init_export_worker(str(tmp_path), {})
+        first_result = export._export_url(('/disclaimer?theme=dark', 'disclaimer/index.dark.html'))
+
+        export._init_export_worker(str(tmp_path), {first_result.path: first_result.content_hash})
+        second_result = export._export_url(('/disclaimer?theme=dark', 'disclaimer/index.dark.html'))
+
+        assert second_result.content_hash == first_result.content_hash
+        assert not second_result.written
+
+    def test_export_url_failure(self, tmp_path, monkeypatch):
+        monkeypatch.setenv('FLASK_PAGE_CACHE_MAX_SIZE', '0')
+        export._init_export_worker(str(tmp_path), {})
+        result = export._export_url(('/substance/NON-EXISTENT-SUBSTANCE', 'substance/NON-EXISTENT-SUBSTANCE/index.html'))
+
+        assert result.content_hash is None
+        assert not os.listdir(tmp_path)
@@ -0,0 +1,56 @@
+import gzip
+import os
+import brotli
+from src.utils import compression
+from src.utils.compression import compress, compress_static_files
+
+
+class TestCompressionClass:
+    def test_compress(self):
+        content = b'substance ' * 100
+        compressed = compress(content)
+
+        assert brotli.decompress(compressed['br']) == content
+        assert gzip.decompress(compressed['gzip']) == content
+        assert compress(content, ['gzip'], quick=True).keys() == {'gzip'}
+
+    def test_compress_static_files(self, tmp_path):
+        with open(os.path.join(tmp_path, 'style.css'), 'wb') as f:
+            f.write(b'body { color: red; }\n' * 100)
+        with open(os.path.join(tmp_path, 'tiny.svg'), 'wb') as f:
+            f.write(b'<svg/>')
+        with open(os.path.join(tmp_path, 'image.png'), 'wb') as f:
+            f.write(b'\x89PNG' * 100)
+
+        assert compress_static_files(str(tmp_path), lambda path, content: content.upper()) == 2
+        with open(os.path.join(tmp_path, 'style.css.br'), 'rb') as f:
+            assert brotli.decompress(f.read()) == b'BODY { COLOR: RED; }\n' * 100
+        # compressing would not make these smaller, or they are not compressible
+        assert not os.path.exists(os.path.join(tmp_path, 'tiny.svg.gz'))
+        assert not os.path.exists(os.path.join(tmp_path, 'image.png.gz'))
+
+        # up to date siblings are not written again
+        assert compress_static_files(str(tmp_path)) == 0
+
+    def test_compress_static_files_records_skipped_encodings(self, tmp_path, monkeypatch):
+        path = os.path.join(tmp_path, 'tiny.svg')
+        with open(path, 'wb') as f:
+            f.write(b'<svg/>')
+        compressed_encodings = []
+
+        def compress_and_record(content, encodings):
+            compressed_encodings.append(encodings)
+            return compress(content, encodings)
+        monkeypatch.setattr(compression, 'compress', compress_and_record)
+
+        assert compress_static_files(str(tmp_path)) == 0
+        # encodings that did not make the file smaller are not tried again
+        assert compress_static_files(str(tmp_path)) == 0
+        assert compressed_encodings == [['br', 'gzip']]
+
+        # until the file changes
+        with open(path, 'wb') as f:
+            f.write(b'<svg>' + b'<g/>' * 100 + b'</svg>')
+        os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10 ** 9))
+        assert compress_static_files(str(tmp_path)) == 2
+        assert compressed_encodings == [['br', 'gzip'], ['br', 'gzip']]
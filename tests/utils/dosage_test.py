@@ -0,0 +1,44 @@
+import random
+from src.utils.dosage import DosageIndex, IntervalIndex, normalize_units
+
+
+class TestIntervalIndexClass:
+    def test_interval_index_overlapping(self):
+        interval_index = IntervalIndex([(5, 10, 'a'), (1, 2, 'b'), (10, 20, 'c'), (3, float('inf'), 'd')])
+
+        assert [key for key, _, _ in interval_index.overlapping(10, 12)] == ['d', 'a', 'c']
+        assert [key for key, _, _ in interval_index.overlapping(2.5, 2.9)] == []
+        assert interval_index.overlapping(0, 1) == [('b', 1, 2)]
+
+    def test_interval_index_matches_brute_force(self):
+        rng = random.Random(0)
+        intervals = []
+        for key in range(200):
+            low = rng.uniform(0, 100)
+            intervals.append((low, low + rng.uniform(0, 30), key))
+        interval_index = IntervalIndex(intervals)
+
+        for _ in range(100):
+            low = rng.uniform(0, 120)
+            high = low + rng.uniform(0, 20)
+            expected = sorted(key for interval_low, interval_high, key in intervals if interval_low <= high and interval_high >= low)
+            assert sorted(key for key, _, _ in interval_index.overlapping(low, high)) == expected
+
+
+class TestDosageIndexClass:
+    def test_normalize_units(self):
+        assert normalize_units('ug') == ('mg', 0.001)
+        assert normalize_units('G') == ('mg', 1000.0)
+        assert normalize_units('seeds') == ('seeds', 1.0)
+        assert normalize_units('') is None
+
+    def test_dosage_index_search(self):
+        dosage_index = DosageIndex({
+            'a': {'dosage': {'routes': {'Oral': {'units': 'ug', 'common': {'min': 100, 'max': 200}, 'heavy': 300}}}},
+            'b': {'dosage': {'routes': {'oral': {'units': 'mg', 'common': {'min': 0.15, 'max': None}}}}},
+            'c': {'dosage': {'routes': {'oral': {'units': '', 'common': {'min': 0.1, 'max': 0.2}}}}},
+        })
+
+        assert dosage_index.search('oral', 'common', 'mg', 0.15, 0.15) == [('a', 0.1, 0.2), ('b', 0.15, 0.15)]
+        assert dosage_index.search('oral', 'heavy', 'mg', 100, 200) == [('a', 0.3, float('inf'))]
+        assert dosage_index.search('insufflated', 'common', 'mg', 0, 100) == []
@@ -0,0 +1,40 @@
+from src.utils.facets import FacetIndex
+
+
+def _facet_index():
+    facet_index = FacetIndex(['a', 'b', 'c', 'd'])
+    facet_index.add_facet('color', {'red': ['a', 'b'], 'blue': ['c'], 'green': []})
+    facet_index.add_facet('size', {'small': ['a', 'c'], 'large': ['b', 'c', 'd']})
+    return facet_index
+
+
+class TestFacetIndexClass:
+    def test_facet_index_search(self):
+        facet_index = _facet_index()
+
+        assert facet_index.search({}).keys == ['a', 'b', 'c', 'd']
+        assert facet_index.search({'color': ['red', 'blue']}).keys == ['a', 'b', 'c']
+        assert facet_index.search({'color': ['red'], 'size': ['large']}).keys == ['b']
+        assert facet_index.search({'color': ['unknown']}).keys == []
+
+    def test_facet_index_counts(self):
+        result = _facet_index().search({'color': ['red'], 'size': []})
+
+        # the counts of a facet ignore its own selection
+        assert result.counts == {
+            'color': {'red': 2, 'blue': 1, 'green': 0},
+            'size': {'small': 1, 'large': 1},
+        }
+
+    def test_facet_index_with_facet(self):
+        facet_index = _facet_index()
+        extended_facet_index = facet_index.with_facet('shape', {'round': ['d']})
+
+        assert extended_facet_index.search({'shape': ['round'], 'size': ['large']}).keys == ['d']
+        assert facet_index.facets == ['color', 'size']
+
+    def test_facet_index_keys_of(self):
+        facet_index = FacetIndex(range(200))
+        facet_index.add_facet('parity', {'even': range(0, 200, 2)})
+
+        assert facet_index.search({'parity': ['even']}).keys == list(range(0, 200, 2))
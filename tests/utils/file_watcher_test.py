@@ -0,0 +1,39 @@
+import os
+from src.utils.file_watcher import FileWatcher
+
+
+class TestFileWatcherClass:
+    def test_file_watcher_calls_on_change(self, tmp_path):
+        path = os.path.join(tmp_path, 'data.json')
+        with open(path, 'w') as f:
+            f.write('{}')
+        changes = []
+        watcher = FileWatcher(lambda: changes.append(path), path)
+        watcher._stat = watcher._read_stat()
+
+        assert not watcher.check()
+        with open(path, 'w') as f:
+            f.write('{"changed": true}')
+        assert watcher.check()
+        assert not watcher.check()
+        assert changes == [path]
+
+    def test_file_watcher_retries_failed_change(self, tmp_path):
+        path = os.path.join(tmp_path, 'data.json')
+        with open(path, 'w') as f:
+            f.write('{}')
+        attempts = []
+
+        def on_change():
+            attempts.append(path)
+            if len(attempts) == 1:
+                raise ValueError('invalid data')
+
+        watcher = FileWatcher(on_change, path)
+        watcher._stat = watcher._read_stat()
+        with open(path, 'w') as f:
+            f.write('{"changed": true}')
+
+        assert not watcher.check()
+        assert watcher.check()
+        assert len(attempts) == 2
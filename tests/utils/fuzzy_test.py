@@ -0,0 +1,26 @@
+import pytest
+from src.utils.fuzzy import FuzzyIndex
+
+
+class TestFuzzyIndexClass:
+    @pytest.fixture()
+    def fuzzy_index(self) -> FuzzyIndex:
+        yield FuzzyIndex.from_items([
+            ('ketamine', 'ketamine'),
+            ('ket', 'ketamine'),
+            ('methoxetamine', 'methoxetamine'),
+            ('mescaline', 'mescaline', 1),
+            ('escaline', 'escaline'),
+        ])
+
+    def test_fuzzy_search_typo(self, fuzzy_index):
+        assert fuzzy_index.search('ketamne', 1) == ['ketamine']
+        assert fuzzy_index.search('KETAMNE', 1) == ['ketamine']
+
+    def test_fuzzy_search_ranking(self, fuzzy_index):
+        assert fuzzy_index.search('mescalin', 2) == ['mescaline', 'escaline']
+
+    def test_fuzzy_search_no_match(self, fuzzy_index):
+        assert fuzzy_index.search('xyzzy', 5) == []
+        assert fuzzy_index.search('', 5) == []
+        assert fuzzy_index.search('ketamine', 0) == []
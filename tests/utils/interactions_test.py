@@ -0,0 +1,79 @@
+from src.utils.interactions import InteractionMatrix
+
+
+class TestInteractionMatrixClass:
+    def test_interaction_matrix_is_symmetric(self):
+        interaction_matrix = InteractionMatrix(['a', 'b', 'c'])
+        interaction_matrix.add('a', 'b', 'unsafe')
+
+        assert interaction_matrix.severity('a', 'b') == 'unsafe'
+        assert interaction_matrix.severity('b', 'a') == 'unsafe'
+        assert interaction_matrix.severity('a', 'c') is None
+
+    def test_interaction_matrix_keeps_most_severe(self):
+        interaction_matrix = InteractionMatrix(['a', 'b'])
+        interaction_matrix.add('a', 'b', 'dangerous')
+        interaction_matrix.add('b', 'a', 'caution')
+        interaction_matrix.add('a', 'b', 'unsafe')
+
+        assert interaction_matrix.severity('a', 'b') == 'dangerous'
+        # pairs with the same key share its group rather than adding one per call
+        assert len(interaction_matrix._groups) == 2
+
+    def test_interaction_matrix_ignores_self_interactions(self):
+        interaction_matrix = InteractionMatrix(['a'])
+        interaction_matrix.add('a', 'a', 'dangerous')
+
+        assert interaction_matrix.severity('a', 'a') is None
+
+    def test_interaction_matrix_check(self):
+        interaction_matrix = InteractionMatrix(['a', 'b', 'c', 'd'])
+        interaction_matrix.add('a', 'b', 'caution')
+        interaction_matrix.add('c', 'a', 'dangerous')
+        interaction_matrix.add('b', 'd', 'unsafe')
+
+        assert interaction_matrix.check(['a', 'b', 'c']) == [('a', 'c', 'dangerous'), ('a', 'b', 'caution')]
+
+    def test_interaction_matrix_severities(self):
+        interaction_matrix = InteractionMatrix(['a', 'b', 'c', 'd'])
+        interaction_matrix.add('a', 'b', 'dangerous')
+        interaction_matrix.add('c', 'a', 'caution')
+
+        assert interaction_matrix.severities('a') == ['caution', 'dangerous']
+        assert interaction_matrix.severities('d') == []
+
+    def test_interaction_matrix_interactions_with(self):
+        interaction_matrix = InteractionMatrix(['a', 'b', 'c', 'd'])
+        interaction_matrix.add('a', 'b', 'dangerous')
+        interaction_matrix.add('a', 'c', 'caution')
+        interaction_matrix.add('d', 'a', 'dangerous')
+
+        assert interaction_matrix.interactions_with('a', 'dangerous') == ['b', 'd']
+        assert interaction_matrix.interactions_with('a', 'unsafe') == []
+
+    def test_interaction_matrix_groups(self):
+        interaction_matrix = InteractionMatrix(['a', 'b', 'c', 'd'])
+        group_id = interaction_matrix.add_group(['a', 'b', 'c'])
+        interaction_matrix.add_group_interaction('a', group_id, 'caution')
+        interaction_matrix.add_group_interaction('d', group_id, 'unsafe')
+        interaction_matrix.add('a', 'b', 'dangerous')
+
+        assert interaction_matrix.severity('b', 'a') == 'dangerous'
+        assert interaction_matrix.severity('c', 'a') == 'caution'
+        assert interaction_matrix.severity('c', 'd') == 'unsafe'
+        assert interaction_matrix.severity('b', 'c') is None
+        assert interaction_matrix.interactions_with('a', 'caution') == ['c']
+        assert interaction_matrix.interactions_with('d', 'unsafe') == ['a', 'b', 'c']
+        assert interaction_matrix.severities('a') == ['caution', 'unsafe', 'dangerous']
+        # the caution of a with the group does not count for b, which interacts with a dangerously
+        assert interaction_matrix.severities('b') == ['unsafe', 'dangerous']
+
+    def test_interaction_matrix_unresolved(self):
+        interaction_matrix = InteractionMatrix(['a', 'b'])
+        interaction_matrix.add_unresolved('a', 'maois', 'caution')
+        interaction_matrix.add_unresolved('a', 'maois', 'dangerous')
+        interaction_matrix.add_unresolved('a', 'snris', 'unsafe')
+
+        assert interaction_matrix.unresolved('a') == [('maois', 'dangerous'), ('snris', 'unsafe')]
+        assert interaction_matrix.unresolved('b') == []
+        assert interaction_matrix.unresolved_terms() == ['maois', 'snris']
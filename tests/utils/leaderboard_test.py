@@ -0,0 +1,106 @@
+import json
+import os
+import time
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from src.utils.leaderboard import LeaderboardProvider
+
+
+class _StubGitHubHandler(BaseHTTPRequestHandler):
+    """Answers every request with the server's status and contributors, after its delay."""
+
+    def do_GET(self):
+        self.server.request_count += 1
+        time.sleep(self.server.delay)
+        body = json.dumps(self.server.contributors).encode('utf-8')
+        self.send_response(self.server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _wait_for(condition, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+class TestLeaderboardProviderClass:
+    @pytest.fixture()
+    def server(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _StubGitHubHandler)
+        server.request_count = 0
+        server.delay = 0
+        server.status = 200
+        server.contributors = [
+            {'login': 'contributor1', 'contributions': 3},
+            {'login': 'github-actions[bot]', 'contributions': 100},
+            {'login': 'contributor2', 'contributions': 5},
+        ]
+        Thread(target=server.serve_forever, daemon=True).start()
+
+        yield server
+
+        server.shutdown()
+        server.server_close()
+
+    @pytest.fixture()
+    def seed_path(self, tmp_path) -> str:
+        seed_path = os.path.join(tmp_path, 'leaderboard.csv')
+        with open(seed_path, 'w') as f:
+            f.write('Contributor,Contributions\nseeded1,1\nseeded2,2\n')
+
+        yield seed_path
+
+    def _provider(self, server, seed_path, **kwargs) -> LeaderboardProvider:
+        return LeaderboardProvider(url=f'http://127.0.0.1:{server.server_port}/contributors', seed_path=seed_path, **kwargs)
+
+    def test_leaderboard_provider_seeded(self, server, seed_path):
+        provider = self._provider(server, seed_path)
+        contributors = provider._contributors
+
+        assert [contributor['login'] for contributor in contributors] == ['seeded2', 'seeded1']
+        assert contributors[0]['rank'] == '🥇 1'
+
+    def test_leaderboard_provider_refresh(self, server, seed_path):
+        provider = self._provider(server, seed_path)
+
+        assert provider.refresh()
+        assert provider._contributors == [
+            {'login': 'contributor2', 'contributions': 5, 'rank': '🥇 1'},
+            {'login': 'contributor1', 'contributions': 3, 'rank': '🥈 2'},
+        ]
+
+    def test_leaderboard_provider_keeps_last_good_contributors(self, server, seed_path):
+        provider = self._provider(server, seed_path)
+        provider.refresh()
+        server.status = 500
+
+        assert not provider.refresh()
+        assert provider._contributors[0]['login'] == 'contributor2'
+
+    def test_leaderboard_provider_timeout(self, server, seed_path):
+        provider = self._provider(server, seed_path, timeout=0.1)
+        server.delay = 0.5
+
+        assert not provider.refresh()
+        assert provider._contributors[0]['login'] == 'seeded2'
+
+    def test_leaderboard_provider_refreshes_in_background(self, server, seed_path):
+        provider = self._provider(server, seed_path)
+        server.delay = 0.2
+
+        # every request is answered right away, and concurrent requests share one fetch
+        started = time.monotonic()
+        for _ in range(20):
+            assert provider.get_contributors()[0]['login'] == 'seeded2'
+        assert time.monotonic() - started < 0.2
+
+        _wait_for(lambda: provider.get_contributors()[0]['login'] == 'contributor2')
+        assert server.request_count == 1
@@ -0,0 +1,51 @@
+from flask import Flask, render_template_string
+from src.utils.metrics import Histogram, Metrics
+
+
+def _create_app(enabled: bool) -> Flask:
+    app = Flask(__name__)
+    app.config['METRICS_ENABLED'] = enabled
+    metrics = app.metrics = Metrics()
+    metrics.init_app(app)
+
+    @app.route('/page')
+    def page():
+        with metrics.timer('search'):
+            pass
+        return render_template_string('{{ value }}', value='rendered')
+
+    return app
+
+
+class TestMetricsClass:
+    def test_histogram_buckets(self):
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+
+        cumulative_counts, total = histogram.snapshot()
+        assert cumulative_counts == [2, 3, 4]
+        assert total == 2.65
+
+    def test_metrics_endpoint(self):
+        app = _create_app(enabled=True)
+        client = app.test_client()
+        assert client.get('/page').data == b'rendered'
+
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        lines = response.data.decode('utf-8').splitlines()
+        assert '# TYPE substancesearch_request_duration_seconds histogram' in lines
+        assert 'substancesearch_request_duration_seconds_count{endpoint="page",method="GET",status="200"} 1' in lines
+        assert 'substancesearch_request_duration_seconds_bucket{endpoint="page",method="GET",status="200",le="+Inf"} 1' in lines
+        assert 'substancesearch_operation_duration_seconds_count{operation="search"} 1' in lines
+        assert 'substancesearch_operation_duration_seconds_count{operation="render_template",template="string"} 1' in lines
+
+    def test_metrics_disabled(self):
+        app = _create_app(enabled=False)
+        client = app.test_client()
+        client.get('/page')
+
+        assert client.get('/metrics').status_code == 404
+        assert app.metrics.render() == ''
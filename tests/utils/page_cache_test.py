@@ -0,0 +1,37 @@
+from src.utils.page_cache import PageCache
+
+
+class TestPageCacheClass:
+    def test_page_cache_hit_and_miss(self):
+        page_cache = PageCache(max_size=100)
+        page_cache.set('v1', 'key1', b'page1')
+
+        assert page_cache.get('v1', 'key1') == b'page1'
+        assert page_cache.get('v1', 'key2') is None
+        assert page_cache.stats()['hits'] == 1
+        assert page_cache.stats()['misses'] == 1
+
+    def test_page_cache_evicts_least_recently_used(self):
+        page_cache = PageCache(max_size=10)
+        page_cache.set('v1', 'key1', b'1234')
+        page_cache.set('v1', 'key2', b'1234')
+        page_cache.get('v1', 'key1')
+        page_cache.set('v1', 'key3', b'1234')
+
+        assert page_cache.get('v1', 'key2') is None
+        assert page_cache.get('v1', 'key1') == b'1234'
+        assert page_cache.stats()['evictions'] == 1
+        assert page_cache.stats()['size'] == 8
+
+    def test_page_cache_skips_pages_over_max_size(self):
+        page_cache = PageCache(max_size=4)
+        page_cache.set('v1', 'key1', b'12345')
+
+        assert page_cache.get('v1', 'key1') is None
+
+    def test_page_cache_invalidated_by_new_version(self):
+        page_cache = PageCache(max_size=100)
+        page_cache.set('v1', 'key1', b'page1')
+
+        assert page_cache.get('v2', 'key1') is None
+        assert page_cache.stats()['entries'] == 0
@@ -0,0 +1,39 @@
+import os
+import pytest
+from src.utils.record_store import RecordStore, write_record_store
+
+
+class TestRecordStoreClass:
+    @pytest.fixture()
+    def path(self, tmp_path) -> str:
+        path = os.path.join(tmp_path, 'test.records')
+        write_record_store(path, {
+            'key1': {'name': 'value1', 'aliases': ['α']},
+            'key2': {'name': 'value2'},
+            'key3': [1, 2, 3],
+        }, 'version1')
+
+        yield path
+
+    def test_record_store_lookup(self, path):
+        record_store = RecordStore(path)
+
+        assert record_store.version == 'version1'
+        assert list(record_store) == ['key1', 'key2', 'key3']
+        assert record_store['key1'] == {'name': 'value1', 'aliases': ['α']}
+        assert record_store.get('key4') is None
+        assert 'key3' in record_store
+        assert record_store.get_encoded('key2') == b'{"name":"value2"}'
+
+    def test_record_store_cache_is_bounded(self, path):
+        record_store = RecordStore(path, cache_size=2)
+        for key in record_store:
+            record_store[key]
+
+        assert list(record_store._cache) == ['key2', 'key3']
+        assert record_store['key2'] is record_store['key2']
+
+    def test_record_store_open_if_current(self, path, tmp_path):
+        assert RecordStore.open_if_current(path, 'version1') is not None
+        assert RecordStore.open_if_current(path, 'version2') is None
+        assert RecordStore.open_if_current(os.path.join(tmp_path, 'missing.records'), 'version1') is None
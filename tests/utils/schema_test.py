@@ -0,0 +1,38 @@
+from src.utils.schema import DictOf, ListOf, Nullable, Number, compile_schema
+
+_SCHEMA = {
+    'name': str,
+    'aliases': ListOf(str),
+    'routes': DictOf({'min': Nullable(Number), 'max': Nullable(Number)}),
+    'extra': object,
+}
+
+
+def _validate(value):
+    violations = []
+    compile_schema(_SCHEMA)(value, 'substance', violations)
+    return violations
+
+
+class TestSchemaClass:
+    def test_valid_value(self):
+        assert _validate({'name': 'ketamine', 'aliases': ['k'], 'routes': {'oral': {'min': 1, 'max': None}}, 'extra': [1]}) == []
+
+    def test_unknown_keys_are_allowed(self):
+        assert _validate({'name': 'ketamine', 'aliases': [], 'routes': {}, 'extra': None, 'unknown': 1}) == []
+
+    def test_every_violation_is_reported(self):
+        assert _validate({'name': 1, 'aliases': ['k', 2], 'routes': {'oral': {'min': '1', 'max': True}}}) == [
+            'substance.name: expected str, got int',
+            'substance.aliases[1]: expected str, got int',
+            'substance.routes.oral.min: expected null or number, got str',
+            'substance.routes.oral.max: expected null or number, got bool',
+            'substance.extra: missing',
+        ]
+
+    def test_wrong_container_types(self):
+        assert _validate({'name': '', 'aliases': 'k', 'routes': [], 'extra': 1}) == [
+            'substance.aliases: expected list, got str',
+            'substance.routes: expected dict, got list',
+        ]
+        assert _validate(None) == ['substance: expected dict, got NoneType']
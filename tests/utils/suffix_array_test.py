@@ -0,0 +1,60 @@
+import pytest
+from src.utils.suffix_array import SuffixArray
+
+
+class TestSuffixArrayClass:
+    @pytest.fixture()
+    def suffix_array(self) -> SuffixArray:
+        test_suffix_array = SuffixArray()
+        test_suffix_array.insert('key1', 'value1')
+        test_suffix_array.insert('key12', 'value12')
+        test_suffix_array.insert('key1-dupe', 'value1')
+        test_suffix_array.insert('key2', 'value2')
+
+        yield test_suffix_array
+
+    def test_suffix_array_substring_search(self, suffix_array):
+        results = suffix_array.search_substring('key1')
+
+        assert len(results) == 2
+        assert set(['value1', 'value12']) == set(results)
+
+    def test_suffix_array_inner_substring_search(self, suffix_array):
+        assert suffix_array.search_substring('DUPE') == ['value1']
+        assert suffix_array.search_substring('y2') == ['value2']
+        assert suffix_array.search_substring('key3') == []
+
+    def test_suffix_array_does_not_match_across_words(self, suffix_array):
+        assert suffix_array.search_substring('1key') == []
+
+    def test_suffix_array_insert_after_search(self, suffix_array):
+        suffix_array.search_substring('key')
+        suffix_array.insert('other', 'value3')
+
+        assert suffix_array.search_substring('the') == ['value3']
+
+    def test_suffix_array_from_items(self):
+        suffix_array = SuffixArray.from_items([('abc', 1), ('bcd', 2), ('cde', 1)])
+
+        assert suffix_array.search_substring('bc') == [1, 2]
+        assert suffix_array.search_substring('de') == [1]
+
+    def test_suffix_array_top_k_ranking(self):
+        suffix_array = SuffixArray.from_items([
+            ('methylone', 'methylone', 0),
+            ('mescaline', 'mescaline', 1),
+            ('me', 'me', 0),
+            ('dimenhydrinate', 'dimenhydrinate', 0),
+            ('meth', 'methamphetamine', 0),
+            ('mephedrone', 'mephedrone', 0),
+        ])
+
+        # exact, then prefix (shorter word, then popularity), then inner matches
+        assert suffix_array.search_top_k('me', 4) == ['me', 'methamphetamine', 'mescaline', 'methylone']
+        assert suffix_array.search_top_k('me', 10)[-1] == 'dimenhydrinate'
+        assert suffix_array.search_top_k('me', 0) == []
+        assert suffix_array.search_top_k('zz', 5) == []
+
+    def test_suffix_array_top_k_matches_search_substring(self, suffix_array):
+        assert set(suffix_array.search_top_k('key', 10)) == set(suffix_array.search_substring('key'))
+        assert len(suffix_array.search_top_k('key', 2)) == 2
@@ -18,3 +18,17 @@ class TestTrieClass:
 
         assert len(results) == 2
         assert set(['value1', 'value12']) == set(results)
+
+    def test_trie_from_items(self):
+        trie = SuffixTrie.from_items([('abc', 1), ('bcd', 2), ('abc', 1), ('cde', 1)])
+
+        assert trie.data_store == [1, 2]
+        assert set(trie.search_substring('bc')) == {1, 2}
+        assert trie.search_substring('de') == [1]
+
+    def test_trie_deduplicates_metadata(self):
+        trie = SuffixTrie.from_items([('aa', 'value'), ('aa', 'value')])
+
+        # the empty suffix of both inserts and the shared "a" suffix point at the same data once
+        assert trie.root.metadata == {0: 2}
+        assert trie.root.children['a'].metadata == {0: 1}
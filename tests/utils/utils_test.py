@@ -1,4 +1,4 @@
-from src.utils import validate_slug, slugify
+from src.utils import validate_slug, slugify, cached_slugify
 
 
 class TestUtilsClass:
@@ -36,3 +36,10 @@ class TestUtilsClass:
         expected_slug = 'a-pbp'
 
         assert expected_slug == slugify(unormalized_str)
+
+    def test_cached_slugify(self):
+        cached_slugify.cache_clear()
+
+        assert cached_slugify('  SLUG! SLUG! SLUG!  ') == 'slug-slug-slug'
+        assert cached_slugify('  SLUG! SLUG! SLUG!  ') == 'slug-slug-slug'
+        assert cached_slugify.cache_info().hits == 1
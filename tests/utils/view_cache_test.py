@@ -0,0 +1,150 @@
+import socketserver
+import time
+import pytest
+from flask import Flask
+from flask_caching import Cache
+from threading import Lock, Thread
+from src.utils.view_cache import ViewCache
+
+
+class _StubRedisHandler(socketserver.StreamRequestHandler):
+    """Speaks enough of the Redis protocol for the Flask-Caching Redis backend."""
+
+    def handle(self):
+        self.protocol = 2
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            with self.server.lock:
+                reply = self._execute(command[0].upper().decode(), command[1:])
+            self.wfile.write(reply)
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        arguments = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            arguments.append(self.rfile.read(length + 2)[:-2])
+        return arguments
+
+    def _execute(self, name, arguments):
+        values = self.server.values
+        now = time.monotonic()
+        for key in [key for key, (_, expires) in values.items() if expires is not None and expires <= now]:
+            del values[key]
+
+        if name == 'GET':
+            return self._bulk(values.get(arguments[0], (None, None))[0])
+        if name == 'MGET':
+            return b'*%d\r\n' % len(arguments) + b''.join(self._bulk(values.get(key, (None, None))[0]) for key in arguments)
+        if name == 'SET':
+            values[arguments[0]] = (arguments[1], None)
+            return b'+OK\r\n'
+        if name == 'SETEX':
+            values[arguments[0]] = (arguments[2], now + int(arguments[1]))
+            return b'+OK\r\n'
+        if name == 'SETNX':
+            if arguments[0] in values:
+                return b':0\r\n'
+            values[arguments[0]] = (arguments[1], None)
+            return b':1\r\n'
+        if name == 'EXPIRE':
+            if arguments[0] not in values:
+                return b':0\r\n'
+            values[arguments[0]] = (values[arguments[0]][0], now + int(arguments[1]))
+            return b':1\r\n'
+        if name in ('DEL', 'EXISTS'):
+            found = [key for key in arguments if key in values]
+            if name == 'DEL':
+                for key in found:
+                    del values[key]
+            return b':%d\r\n' % len(found)
+        if name == 'HELLO':
+            self.protocol = int(arguments[0])
+            return b'%1\r\n+proto\r\n:3\r\n'
+        if name in ('PING', 'CLIENT', 'SELECT'):
+            return b'+OK\r\n'
+        return b'-ERR unknown command\r\n'
+
+    def _bulk(self, value):
+        if value is None:
+            return b'_\r\n' if self.protocol == 3 else b'$-1\r\n'
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+def _create_worker(cache_config) -> Flask:
+    """An app standing in for one worker process, with its own cache client."""
+    app = Flask(__name__)
+    app.config.update(cache_config)
+    cache = Cache(app)
+    view_cache = app.view_cache = ViewCache(cache)
+    app.render_count = 0
+
+    @app.route('/page')
+    @view_cache.cached()
+    def page():
+        app.render_count += 1
+        return f'rendered {app.render_count}'
+
+    return app
+
+
+class TestViewCacheClass:
+    @pytest.fixture()
+    def redis_server(self):
+        pytest.importorskip('redis')
+        server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _StubRedisHandler)
+        server.daemon_threads = True
+        server.values = {}
+        server.lock = Lock()
+        Thread(target=server.serve_forever, daemon=True).start()
+
+        yield server
+
+        server.shutdown()
+        server.server_close()
+
+    @pytest.fixture(params=['FileSystemCache', 'RedisCache'])
+    def cache_config(self, request, tmp_path):
+        if request.param == 'FileSystemCache':
+            return {'CACHE_TYPE': 'FileSystemCache', 'CACHE_DIR': str(tmp_path)}
+
+        redis_server = request.getfixturevalue('redis_server')
+        return {'CACHE_TYPE': 'RedisCache', 'CACHE_REDIS_URL': f'redis://127.0.0.1:{redis_server.server_address[1]}/0'}
+
+    def test_view_cache_shared_between_workers(self, cache_config):
+        worker1, worker2 = _create_worker(cache_config), _create_worker(cache_config)
+
+        assert worker1.test_client().get('/page').data == b'rendered 1'
+        assert worker2.test_client().get('/page').data == b'rendered 1'
+        assert worker2.render_count == 0
+        assert worker1.view_cache.stats() == {'page': {'hits': 0, 'misses': 1, 'evictions': 0}}
+        assert worker2.view_cache.stats() == {'page': {'hits': 1, 'misses': 0, 'evictions': 0}}
+
+    def test_view_cache_invalidation_reaches_all_workers(self, cache_config):
+        worker1, worker2 = _create_worker(cache_config), _create_worker(cache_config)
+        worker1.test_client().get('/page')
+
+        with worker2.app_context():
+            worker2.view_cache.invalidate('page')
+
+        assert worker1.test_client().get('/page').data == b'rendered 2'
+        assert worker1.view_cache.stats()['page']['evictions'] == 0
+
+    def test_view_cache_counts_evictions(self):
+        worker = _create_worker({'CACHE_TYPE': 'SimpleCache'})
+        client = worker.test_client()
+        client.get('/page')
+
+        # drop the cached page the way a full backend would
+        with worker.app_context():
+            backend = worker.view_cache.cache.cache
+            for key in list(backend._cache):
+                if key.startswith('view:'):
+                    backend.delete(key)
+
+        assert client.get('/page').data == b'rendered 2'
+        assert worker.view_cache.stats()['page'] == {'hits': 0, 'misses': 2, 'evictions': 1}
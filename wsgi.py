@@ -0,0 +1,8 @@
+from src import create_app
+from src.data import get_dataset
+
+# WSGI entry point for production servers, e.g. `gunicorn wsgi:app`
+app = create_app()
+# load the data here rather than on the first request, so with `preload_app`
+# it is loaded once in the gunicorn master and shared with the workers
+get_dataset()